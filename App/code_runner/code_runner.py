@@ -1,7 +1,12 @@
 import http.client
 import json
 import time
+import random
 import base64
+import asyncio
+import threading
+import weakref
+import httpx
 from dotenv import load_dotenv  # type: ignore
 import os
 
@@ -33,13 +38,157 @@ LANGUAGE_ID_MAP = {
 }
 
 
+# Judge0 status ids that mean the submission has not finished yet
+PENDING_STATUS_IDS = (1, 2)
+
+# Fields requested when polling a batch of tokens
+BATCH_FIELDS = "token,stdout,stderr,compile_output,message,status,time,memory"
+
+# Judge0's default MAX_SUBMISSION_BATCH_SIZE
+BATCH_SIZE = 20
+
+# Result polling: first check after POLL_INITIAL_DELAY, then back off by
+# POLL_BACKOFF up to POLL_MAX_DELAY, each sleep randomised by +/- POLL_JITTER.
+# A call gives up once EXECUTION_TIMEOUT seconds have passed.
+POLL_INITIAL_DELAY = 0.1
+POLL_MAX_DELAY = 1.5
+POLL_BACKOFF = 2
+POLL_JITTER = 0.25
+EXECUTION_TIMEOUT = 20
+
+# Judge0's default MAX_CPU_TIME_LIMIT, MAX_WALL_TIME_LIMIT (seconds) and
+# MAX_MEMORY_LIMIT (KB); submissions with larger limits are rejected
+MAX_CPU_TIME_LIMIT = float(os.getenv("JUDGE0_MAX_CPU_TIME_LIMIT", 15))
+MAX_WALL_TIME_LIMIT = float(os.getenv("JUDGE0_MAX_WALL_TIME_LIMIT", 20))
+MAX_MEMORY_LIMIT = int(os.getenv("JUDGE0_MAX_MEMORY_LIMIT", 512000))
+
+# Judge0 compiler_options for each compile profile ("run" compiles fastest
+# for the interactive Run action, "submit" optimises judged submissions);
+# only sent for PROFILE_LANGUAGES
+COMPILE_PROFILES = {"run": "-O0", "submit": "-O2"}
+PROFILE_LANGUAGES = ("c", "cpp")
+
+# Judge0 status id for "Time Limit Exceeded"
+TIME_LIMIT_STATUS_ID = 5
+
+# Fields that Judge0 returns base64 encoded when base64_encoded=true
+ENCODED_FIELDS = ("stdout", "stderr", "compile_output", "message")
+
+# Keep-alive connection pool shared by every worker thread
+POOL_SIZE = int(os.getenv("JUDGE0_POOL_SIZE", 8))
+POOL_IDLE_TIMEOUT = float(os.getenv("JUDGE0_POOL_IDLE_TIMEOUT", 30))
+REQUEST_TIMEOUT = float(os.getenv("JUDGE0_REQUEST_TIMEOUT", 30))
+
+# Methods that can be sent again safely when their response is lost
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"})
+
+# Connection limit for the asyncio client, per event loop
+ASYNC_POOL_SIZE = int(os.getenv("JUDGE0_ASYNC_POOL_SIZE", 100))
+
+
+class Judge0Client:
+    """
+    Thread-safe pool of keep-alive connections to a Judge0 API host.
+
+    At most `pool_size` requests are in flight at once; further callers
+    block until a connection is returned. Idle connections older than
+    `idle_timeout` seconds are closed instead of reused, and a request that
+    fails on a reused connection (closed by the server in the meantime) is
+    retried on a fresh one, as long as it cannot have been processed: it
+    failed while being sent, or its method is idempotent. A POST (such as
+    /submissions/batch) whose response is lost is not sent again, since
+    Judge0 may already have queued it. Set `secure=False` for a self-hosted
+    Judge0 served over plain HTTP.
+    """
+
+    def __init__(
+        self,
+        host,
+        headers,
+        pool_size=POOL_SIZE,
+        idle_timeout=POOL_IDLE_TIMEOUT,
+        timeout=REQUEST_TIMEOUT,
+        secure=True,
+    ):
+        self.host = host
+        self.headers = headers
+        self.secure = secure
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle = []  # stack of (connection, last_used)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    def _acquire(self):
+        """Return (connection, reused) for an idle or new connection."""
+        self._slots.acquire()
+        with self._lock:
+            while self._idle:
+                conn, last_used = self._idle.pop()
+                if time.monotonic() - last_used < self.idle_timeout:
+                    return conn, True
+                conn.close()
+        if self.secure:
+            return http.client.HTTPSConnection(self.host, timeout=self.timeout), False
+        return http.client.HTTPConnection(self.host, timeout=self.timeout), False
+
+    def _release(self, conn, reusable):
+        if reusable:
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        else:
+            conn.close()
+        self._slots.release()
+
+    def request(self, method, path, body=None):
+        """Send a request on a pooled connection and return the decoded JSON."""
+        while True:
+            conn, reused = self._acquire()
+            sent = False
+            try:
+                conn.request(method, path, body=body, headers=self.headers)
+                sent = True
+                res = conn.getresponse()
+                data = res.read()
+            except (http.client.HTTPException, OSError):
+                self._release(conn, False)
+                if reused and (not sent or method in IDEMPOTENT_METHODS):
+                    continue  # Stale keep-alive connection, reconnect
+                raise
+            except BaseException:
+                self._release(conn, False)
+                raise
+            self._release(conn, not res.will_close)
+            if res.status >= 500 or res.status == 429:
+                raise http.client.HTTPException(
+                    f"Judge0 at {self.host} returned status {res.status}"
+                )
+            return json.loads(data)
+
+    def close(self):
+        """Close every idle connection."""
+        with self._lock:
+            for conn, _ in self._idle:
+                conn.close()
+            self._idle.clear()
+
+
+# Shared by every Django worker thread in this process
+default_client = Judge0Client(API_HOST, headers)
+
+
 def get_language_id(language):
     if isinstance(language, int):
         return language
     return LANGUAGE_ID_MAP.get(language.lower(), 71)
 
 
-def send_code_submission(code, language="python", input_data=""):
+def send_code_submission(code, language="python", input_data="", wait=False, client=None):
+    """
+    Queue a program and return its token.
+    With wait=True Judge0 runs it synchronously and the finished result is
+    returned instead of a token.
+    """
     language_id = get_language_id(language)
     encoded_code = base64.b64encode(code.encode()).decode()
     encoded_input = base64.b64encode(input_data.encode()).decode()
@@ -50,43 +199,422 @@ def send_code_submission(code, language="python", input_data=""):
             "stdin": encoded_input,
         }
     )
-    conn = http.client.HTTPSConnection(API_HOST)
-    conn.request(
+    data = (client or default_client).request(
         "POST",
-        "/submissions?base64_encoded=true&wait=false",
+        f"/submissions?base64_encoded=true&wait={'true' if wait else 'false'}",
         body=payload,
-        headers=headers,
     )
-    res = conn.getresponse()
-    data = res.read()
-    conn.close()
-    return json.loads(data)["token"]
+    if wait:
+        return decode_result(data)
+    return data["token"]
 
 
-def get_submission_result(token):
+def get_submission_result(token, client=None):
     """Retrieve the result of code execution."""
-    conn = http.client.HTTPSConnection(API_HOST)
-    conn.request("GET", f"/submissions/{token}?base64_encoded=false", headers=headers)
-    res = conn.getresponse()
-    result = res.read()
-    conn.close()
-    return json.loads(result)
+    return decode_result(
+        (client or default_client).request("GET", f"/submissions/{token}?base64_encoded=true")
+    )
+
+
+def send_batch_submission(
+    codes, language="python", inputs=None, client=None, limits=None, profile=None
+):
+    """Queue several programs with a single POST and return their tokens in order."""
+    payload = json.dumps(build_batch_payload(codes, language, inputs, limits, profile))
+    data = (client or default_client).request(
+        "POST", "/submissions/batch?base64_encoded=true", body=payload
+    )
+    return [entry.get("token") for entry in data]
+
+
+def wall_time_limit(cpu_seconds):
+    """Wall-clock limit sent along with a CPU time limit of `cpu_seconds`."""
+    return cpu_seconds * 2 + 1
+
+
+def limits_fit(limits):
+    """
+    True if `limits` ({"time": CPU seconds, "memory": MB}) are within what
+    Judge0 accepts, so build_batch_payload sends them unclamped.
+    """
+    return (
+        limits["time"] <= MAX_CPU_TIME_LIMIT
+        and wall_time_limit(limits["time"]) <= MAX_WALL_TIME_LIMIT
+        and limits["memory"] * 1024 <= MAX_MEMORY_LIMIT
+    )
+
+
+def build_batch_payload(
+    codes, language="python", inputs=None, limits=None, profile=None
+):
+    """
+    Build the /submissions/batch request body for several programs.
+    `limits` ({"time": CPU seconds, "memory": MB}) become Judge0's per
+    submission cpu_time_limit, wall_time_limit and memory_limit, clamped to
+    MAX_CPU_TIME_LIMIT, MAX_WALL_TIME_LIMIT and MAX_MEMORY_LIMIT so Judge0
+    does not reject them; compile `profile` (see COMPILE_PROFILES) its
+    compiler_options.
+    """
+    language_id = get_language_id(language)
+    inputs = inputs if inputs is not None else [""] * len(codes)
+    extra = {}
+    if limits:
+        extra = {
+            "cpu_time_limit": min(limits["time"], MAX_CPU_TIME_LIMIT),
+            "wall_time_limit": min(
+                wall_time_limit(limits["time"]), MAX_WALL_TIME_LIMIT
+            ),
+            "memory_limit": min(limits["memory"] * 1024, MAX_MEMORY_LIMIT),
+        }
+    if profile and language in PROFILE_LANGUAGES:
+        extra["compiler_options"] = COMPILE_PROFILES[profile]
+    return {
+        "submissions": [
+            {
+                "language_id": language_id,
+                "source_code": base64.b64encode(code.encode()).decode(),
+                "stdin": base64.b64encode((input_data or "").encode()).decode(),
+                **extra,
+            }
+            for code, input_data in zip(codes, inputs)
+        ]
+    }
+
+
+def get_batch_results(tokens, client=None):
+    """Retrieve the results of several submissions with a single GET."""
+    data = (client or default_client).request(
+        "GET",
+        f"/submissions/batch?tokens={','.join(tokens)}&base64_encoded=true"
+        f"&fields={BATCH_FIELDS}",
+    )
+    return [decode_result(result) for result in data.get("submissions", [])]
+
+
+def decode_result(result):
+    """Decode the base64 encoded text fields of a Judge0 result in place."""
+    for field in ENCODED_FIELDS:
+        if result.get(field):
+            result[field] = base64.b64decode(result[field]).decode(errors="replace")
+    return result
+
+
+def is_finished(result):
+    """Judge0 status ids 1 and 2 mean "In Queue" and "Processing"."""
+    status_id = (result.get("status") or {}).get("id", 1)
+    return status_id not in PENDING_STATUS_IDS
+
+
+def poll_until_finished(tokens, fetch, timeout=EXECUTION_TIMEOUT, cancel=None):
+    """
+    Poll Judge0 for the given tokens until every one reaches a final status
+    or the deadline passes.
 
+    `fetch` takes a list of pending tokens and returns their results in the
+    same order. Sleeps grow exponentially with jitter so fast programs come
+    back quickly without hammering the API for slow ones. Setting the optional
+    `cancel` threading.Event stops polling early.
+    Returns a dict of token -> last seen result.
+    """
+    results = {}
+    for delay in poll_delays(timeout):
+        if cancel is not None and cancel.wait(delay):
+            break
+        elif cancel is None:
+            time.sleep(delay)
+        pending = [t for t in tokens if not is_finished(results.get(t, {}))]
+        for token, result in zip(pending, fetch(pending)):
+            results[token] = result
+        if all(is_finished(results.get(t, {})) for t in tokens):
+            break
+    return results
 
-def execute_code(code, language="python", input_data=""):
-    """Execute code and return the result output or error."""
+
+def poll_delays(timeout):
+    """Yield jittered, exponentially growing sleeps until `timeout` seconds pass."""
+    deadline = time.monotonic() + timeout
+    delay = POLL_INITIAL_DELAY
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        yield min(remaining, delay * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER))
+        delay = min(delay * POLL_BACKOFF, POLL_MAX_DELAY)
+
+
+def format_result(result):
+    """Turn a Judge0 result into the output string the views display."""
+    if (result.get("status") or {}).get("id") == TIME_LIMIT_STATUS_ID:
+        return "Time Limit Exceeded"
+    elif result.get("stdout"):
+        return result["stdout"]
+    elif result.get("stderr"):
+        return "Error:\n" + result["stderr"]
+    elif result.get("compile_output"):
+        return "Compilation Error:\n" + result["compile_output"]
+    elif not is_finished(result):
+        status = (result.get("status") or {}).get("description", "In Queue")
+        return f"Execution Timeout: submission still '{status}' at the deadline"
+    else:
+        return "Unknown Error: " + str(result)
+
+
+def to_record(result, limits=None):
+    """
+    Summarize a Judge0 result as {"output", "time", "memory", "verdict"}: the
+    display string, CPU seconds, peak memory in KB (None when Judge0 has
+    none) and "TLE"/"MLE" when a limit was hit. Judge0 has no memory limit
+    status, so MLE means the run failed at or above `limits["memory"]`.
+    """
+    record = {
+        "output": format_result(result),
+        "time": float(result["time"]) if result.get("time") else None,
+        "memory": result.get("memory"),
+        "verdict": None,
+    }
+    status_id = (result.get("status") or {}).get("id")
+    if status_id == TIME_LIMIT_STATUS_ID:
+        record["verdict"] = "TLE"
+    elif (
+        limits
+        and status_id != 3  # Accepted
+        and record["memory"] is not None
+        and record["memory"] >= limits["memory"] * 1024
+    ):
+        record["verdict"] = "MLE"
+        record["output"] = "Memory Limit Exceeded"
+    return record
+
+
+def execute_code(
+    code, language="python", input_data="", wait=False, timeout=None, client=None
+):
+    """
+    Execute code and return the result output or error.
+    Pass wait=True to use Judge0's synchronous mode instead of polling.
+    """
     try:
-        token = send_code_submission(code, language, input_data)
-        time.sleep(2)  # Wait before fetching result
-
-        result = get_submission_result(token)
-        if result.get("stdout"):
-            return result["stdout"]
-        elif result.get("stderr"):
-            return "Error:\n" + result["stderr"]
-        elif result.get("compile_output"):
-            return "Compilation Error:\n" + result["compile_output"]
-        else:
-            return "Unknown Error: " + str(result)
+        if wait:
+            return format_result(
+                send_code_submission(code, language, input_data, wait=True, client=client)
+            )
+
+        token = send_code_submission(code, language, input_data, client=client)
+        results = poll_until_finished(
+            [token],
+            lambda pending: [get_submission_result(t, client) for t in pending],
+            timeout or EXECUTION_TIMEOUT,
+        )
+        return format_result(results.get(token, {}))
     except Exception as e:
         return f"Exception occurred: {str(e)}"
+
+
+def run_batch(
+    codes,
+    language="python",
+    inputs=None,
+    timeout=None,
+    client=None,
+    cancel=None,
+    limits=None,
+    profile=None,
+):
+    """
+    Queue several programs in Judge0 batches and poll them together.
+    Returns one record (see to_record) per program; transport errors are raised.
+    Polling stops early once the optional `cancel` event is set.
+    `limits` is {"time": CPU seconds, "memory": MB} per program and
+    `profile` the compile profile for C and C++.
+    """
+    inputs = inputs if inputs is not None else [""] * len(codes)
+    tokens = []
+    for i in range(0, len(codes), BATCH_SIZE):
+        tokens += send_batch_submission(
+            codes[i : i + BATCH_SIZE],
+            language,
+            inputs[i : i + BATCH_SIZE],
+            client,
+            limits,
+            profile,
+        )
+
+    def fetch(pending):
+        found = []
+        for i in range(0, len(pending), BATCH_SIZE):
+            found += get_batch_results(pending[i : i + BATCH_SIZE], client)
+        return found
+
+    results = poll_until_finished(
+        [t for t in tokens if t], fetch, timeout or EXECUTION_TIMEOUT, cancel
+    )
+    rejected = {
+        "output": "Unknown Error: submission was rejected by Judge0",
+        "time": None,
+        "memory": None,
+        "verdict": None,
+    }
+    return [
+        to_record(results.get(token, {}), limits) if token else rejected
+        for token in tokens
+    ]
+
+
+def execute_code_batch(codes, language="python", inputs=None, timeout=None, client=None):
+    """
+    Execute several programs in one Judge0 batch.
+    Returns one output string per program, in the order they were given.
+    """
+    if not codes:
+        return []
+    try:
+        records = run_batch(codes, language, inputs, timeout, client)
+        return [record["output"] for record in records]
+    except Exception as e:
+        return [f"Exception occurred: {str(e)}"] * len(codes)
+
+
+# ------------------------
+# Asyncio client
+# ------------------------
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client(client=None):
+    """
+    Return the httpx.AsyncClient shared by every coroutine on the running
+    loop for the Judge0 host of `client` (a Judge0Client, default_client if
+    None), with its headers. Closed by close_async_clients.
+    """
+    client = client or default_client
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    async_client = clients.get(client)
+    if async_client is None:
+        scheme = "https" if client.secure else "http"
+        async_client = clients[client] = httpx.AsyncClient(
+            base_url=f"{scheme}://{client.host}",
+            headers=client.headers,
+            timeout=client.timeout,
+            limits=httpx.Limits(
+                max_connections=ASYNC_POOL_SIZE,
+                keepalive_expiry=client.idle_timeout,
+            ),
+        )
+    return async_client
+
+
+async def close_async_clients():
+    """Close the running loop's clients; await it before the loop ends."""
+    clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    await asyncio.gather(*(client.aclose() for client in clients.values()))
+
+
+async def send_batch_submission_async(
+    codes, language="python", inputs=None, client=None, limits=None, profile=None
+):
+    """Async version of send_batch_submission."""
+    res = await get_async_client(client).post(
+        "/submissions/batch?base64_encoded=true",
+        json=build_batch_payload(codes, language, inputs, limits, profile),
+    )
+    res.raise_for_status()
+    return [entry.get("token") for entry in res.json()]
+
+
+async def get_batch_results_async(tokens, client=None):
+    """Async version of get_batch_results."""
+    res = await get_async_client(client).get(
+        f"/submissions/batch?tokens={','.join(tokens)}&base64_encoded=true"
+        f"&fields={BATCH_FIELDS}"
+    )
+    res.raise_for_status()
+    return [decode_result(result) for result in res.json().get("submissions", [])]
+
+
+async def poll_until_finished_async(tokens, fetch, timeout=EXECUTION_TIMEOUT):
+    """Async version of poll_until_finished; `fetch` is a coroutine function."""
+    results = {}
+    for delay in poll_delays(timeout):
+        await asyncio.sleep(delay)
+        pending = [t for t in tokens if not is_finished(results.get(t, {}))]
+        for token, result in zip(pending, await fetch(pending)):
+            results[token] = result
+        if all(is_finished(results.get(t, {})) for t in tokens):
+            break
+    return results
+
+
+async def run_batch_async(
+    codes,
+    language="python",
+    inputs=None,
+    timeout=None,
+    client=None,
+    limits=None,
+    profile=None,
+):
+    """
+    Async version of run_batch: chunks are queued and polled concurrently on
+    the running event loop. Transport errors are raised.
+    """
+    inputs = inputs if inputs is not None else [""] * len(codes)
+    chunks = await asyncio.gather(
+        *(
+            send_batch_submission_async(
+                codes[i : i + BATCH_SIZE],
+                language,
+                inputs[i : i + BATCH_SIZE],
+                client,
+                limits,
+                profile,
+            )
+            for i in range(0, len(codes), BATCH_SIZE)
+        )
+    )
+    tokens = [token for chunk in chunks for token in chunk]
+
+    async def fetch(pending):
+        found = await asyncio.gather(
+            *(
+                get_batch_results_async(pending[i : i + BATCH_SIZE], client)
+                for i in range(0, len(pending), BATCH_SIZE)
+            )
+        )
+        return [result for chunk in found for result in chunk]
+
+    results = await poll_until_finished_async(
+        [t for t in tokens if t], fetch, timeout or EXECUTION_TIMEOUT
+    )
+    rejected = {
+        "output": "Unknown Error: submission was rejected by Judge0",
+        "time": None,
+        "memory": None,
+        "verdict": None,
+    }
+    return [
+        to_record(results.get(token, {}), limits) if token else rejected
+        for token in tokens
+    ]
+
+
+async def execute_code_async(
+    code, language="python", input_data="", timeout=None, client=None
+):
+    """Execute code without blocking the event loop and return the output or error."""
+    outputs = await execute_code_batch_async(
+        [code], language, [input_data], timeout, client
+    )
+    return outputs[0]
+
+
+async def execute_code_batch_async(
+    codes, language="python", inputs=None, timeout=None, client=None
+):
+    """Async version of execute_code_batch."""
+    if not codes:
+        return []
+    try:
+        records = await run_batch_async(codes, language, inputs, timeout, client)
+        return [record["output"] for record in records]
+    except Exception as e:
+        return [f"Exception occurred: {str(e)}"] * len(codes)
@@ -1,39 +1,547 @@
-import requests
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import threading
+import weakref
+import httpx
+import os
 
+try:
+    import msgpack
+except ImportError:  # Optional: only needed for CODE_RUNNER_FORMAT=msgpack
+    msgpack = None
 
-def execute_code(code, language="python", input_data=""):
+logger = logging.getLogger(__name__)
+
+# Base URL of the code_runner_2 FastAPI service; unix:///path/to/runner.sock
+# talks to a runner on the same host over a Unix domain socket
+RUNNER_URL = os.getenv("CODE_EXECUTION_URL", "http://localhost:8002")
+
+# Request/response encoding: "json", or "msgpack" for smaller payloads
+RUNNER_FORMAT = os.getenv("CODE_RUNNER_FORMAT", "json")
+MSGPACK_TYPE = "application/msgpack"
+
+# Keep-alive connections per runner node for the synchronous client
+POOL_SIZE = int(os.getenv("CODE_RUNNER_POOL_SIZE", 16))
+
+REQUEST_TIMEOUT = 10
+
+# Extra request timeout allowed per case of a /run_batch call, in seconds
+BATCH_CASE_TIMEOUT = 6
+
+VERDICT_MESSAGES = {
+    "TLE": "Time Limit Exceeded",
+    "MLE": "Memory Limit Exceeded",
+    "OLE": "Output Limit Exceeded",
+}
+
+# Connection limit for the asyncio client, per event loop
+ASYNC_POOL_SIZE = int(os.getenv("CODE_RUNNER_ASYNC_POOL_SIZE", 100))
+
+
+def format_result(result):
+    """Turn a runner response into the output string the views display."""
+    output = result.get("stdout", "").strip()
+    error = result.get("stderr", "").strip()
+    exit_code = result.get("exit_code", 0)
+
+    if result.get("skipped"):
+        return "Skipped: an earlier test case failed"
+    elif result.get("verdict") == "OLE":
+        # The runner keeps only the head and tail of the output
+        return f"{VERDICT_MESSAGES['OLE']}\n\n{output}"
+    elif result.get("verdict") in VERDICT_MESSAGES:
+        return VERDICT_MESSAGES[result["verdict"]]
+    elif result.get("error") and not error and not output:
+        return f"Error:\n{result['error']}"
+    elif error:
+        return f"Error:\n{error}"
+    elif output:
+        if exit_code == 0:
+            return output  # Don't show exit code on success
+        else:
+            return f"{output}\n\nExit Code: {exit_code}"
+    else:
+        return f"No Output.\nExit Code: {exit_code}"
+
+
+def to_record(result):
+    """
+    Summarize a runner result as {"output", "time", "memory", "verdict",
+    "passed"}: the display string, the program's CPU seconds (wall time from
+    runners that do not report CPU), peak memory in KB, the runner's
+    "TLE"/"MLE"/"OLE" verdict ("WA" for wrong answers it judged), if any, and
+    whether the runner found the expected answer (None if it was not asked).
+    """
+    cpu_time = result.get("cpu_time")
+    return {
+        "output": format_result(result),
+        "time": cpu_time if cpu_time is not None else result.get("time_taken"),
+        "memory": result.get("memory_used"),
+        "verdict": result.get("verdict"),
+        "passed": result.get("passed"),
+    }
+
+
+def normalize_answer(value):
+    """
+    `value` with numbers compared by value, as the views' == comparison
+    does: booleans and integral floats become integers, in nested lists and
+    objects too.
+    """
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, list):
+        return [normalize_answer(item) for item in value]
+    if isinstance(value, dict):
+        return {key: normalize_answer(item) for key, item in value.items()}
+    return value
+
+
+def answer_hash(value):
+    """
+    Hash of an expected answer as the runner computes it (code_runner_2
+    checker.py): SHA-256 of its canonical JSON, normalized so that answers
+    the views would find equal (3 and 3.0, 1 and True, " a" and "a") hash
+    the same.
+    """
+    if isinstance(value, str):
+        value = value.strip()
+    canonical = json.dumps(
+        normalize_answer(value),
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def option_fields(limits, profile=None):
+    """
+    Request fields for {"time": CPU seconds, "memory": MB} limits and a
+    compile profile ("run" or "submit").
+    """
+    fields = {}
+    if limits:
+        fields.update(time_limit=limits["time"], memory_limit=limits["memory"])
+    if profile:
+        fields["profile"] = profile
+    return fields
+
+
+def transport_for(url, transport_class=httpx.HTTPTransport, **kwargs):
+    """
+    Return (base_url, transport) for a runner URL; unix:// URLs connect over
+    the Unix domain socket at that path.
+    """
+    if url.startswith("unix://"):
+        return "http://runner", transport_class(uds=url[len("unix://") :], **kwargs)
+    return url, transport_class(**kwargs)
+
+
+def request_options(payload, use_msgpack):
+    """httpx keyword arguments sending `payload` as msgpack or as JSON."""
+    if use_msgpack:
+        return {
+            "content": msgpack.packb(payload),
+            "headers": {"content-type": MSGPACK_TYPE, "accept": MSGPACK_TYPE},
+        }
+    return {"json": payload}
+
+
+def decode_response(response):
+    """Decode a runner response body, msgpack or JSON by its content type."""
+    if response.headers.get("content-type", "").startswith(MSGPACK_TYPE):
+        return msgpack.unpackb(response.content)
+    return response.json()
+
+
+def msgpack_format(payload_format):
+    """True if `payload_format` asks for msgpack and msgpack is installed."""
+    return payload_format == "msgpack" and msgpack is not None
+
+
+def client_options(url, transport_class, pool_size):
+    """
+    httpx client keyword arguments for a runner URL: its transport (over the
+    Unix socket of a unix:// URL) keeping up to `pool_size` connections
+    alive, and the request timeout. Shared by the sync and asyncio clients.
+    """
+    base_url, transport = transport_for(
+        url,
+        transport_class,
+        limits=httpx.Limits(
+            max_connections=pool_size, max_keepalive_connections=pool_size
+        ),
+    )
+    return {"base_url": base_url, "transport": transport, "timeout": REQUEST_TIMEOUT}
+
+
+class RunnerClient:
+    """
+    Pooled keep-alive session to one runner node, safe to share between
+    threads. With payload_format="msgpack" (and the msgpack package
+    installed) requests and responses are sent as msgpack instead of JSON.
+    """
+
+    def __init__(self, url, pool_size=POOL_SIZE, payload_format=RUNNER_FORMAT):
+        self.http = httpx.Client(**client_options(url, httpx.HTTPTransport, pool_size))
+        self.msgpack = msgpack_format(payload_format)
+        if payload_format == "msgpack" and msgpack is None:
+            logger.warning("msgpack is not installed, sending runner requests as JSON")
+
+    def post(self, path, payload, timeout=REQUEST_TIMEOUT, method="POST"):
+        """
+        Send `payload` (POST, or `method`) and return the decoded response;
+        non-2xx statuses are raised.
+        """
+        response = self.http.request(
+            method, path, timeout=timeout, **request_options(payload, self.msgpack)
+        )
+        response.raise_for_status()
+        return decode_response(response)
+
+    def stream(self, path, payload, timeout=REQUEST_TIMEOUT):
+        """
+        POST `payload` and yield the decoded records of an NDJSON response as
+        they arrive; `timeout` bounds the wait for each record. Closing the
+        generator early closes the connection, which the runner takes as a
+        cancellation.
+        """
+        request = request_options(payload, self.msgpack)
+        with self.http.stream("POST", path, timeout=timeout, **request) as response:
+            if response.is_error:
+                response.read()
+                response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+    def close(self):
+        self.http.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(runner_url=None):
+    """Return the shared RunnerClient for `runner_url` (default RUNNER_URL)."""
+    url = (runner_url or RUNNER_URL).rstrip("/")
+    client = _clients.get(url)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(url)
+            if client is None:
+                client = _clients[url] = RunnerClient(url)
+    return client
+
+
+class TestData:
+    """
+    A problem's test inputs, which runners cache locally per version so run
+    requests can refer to cases by index. The version is a hash of the
+    inputs, so editing the test cases makes a new one.
+    """
+
+    def __init__(self, problem, inputs):
+        self.problem = str(problem)
+        self.inputs = list(inputs)
+        digest = hashlib.sha256(json.dumps(self.inputs).encode())
+        self.version = digest.hexdigest()[:16]
+
+    def sync(self, client):
+        """Upload this version to the runner behind `client`."""
+        client.post(
+            f"/testdata/{self.problem}/{self.version}",
+            {"inputs": self.inputs},
+            method="PUT",
+        )
+
+
+def run_code(
+    code, language="python", input_data="", runner_url=None, limits=None, profile=None
+):
+    """
+    POST one program to a runner node and return its JSON response.
+    Connection errors and non-200 responses are raised.
+    """
+    return get_client(runner_url).post(
+        "/run",
+        {
+            "language": language,
+            "code": code,
+            "input": input_data,
+            **option_fields(limits, profile),
+        },
+    )
+
+
+def execute_code(code, language="python", input_data="", runner_url=None):
     """
     Call FastAPI-based code runner and return output.
     """
     try:
         print(f"code came in execute_code of code_runner3 :{code}")
-        response = requests.post(
-            "http://localhost:8002/run",
-            json={"language": language, "code": code, "input": input_data},
-            timeout=10,
+        return format_result(run_code(code, language, input_data, runner_url))
+    except httpx.HTTPStatusError as e:
+        return f"Error: Status {e.response.status_code}"
+    except Exception as e:
+        return f"Exception occurred: {str(e)}"
+
+
+def run_inputs(
+    code,
+    language="python",
+    inputs=(),
+    runner_url=None,
+    fail_fast=False,
+    limits=None,
+    profile=None,
+):
+    """
+    Compile one program once on a runner node and run it against each input.
+    Returns the runner's per-input results; errors are raised.
+    """
+    case_timeout = BATCH_CASE_TIMEOUT
+    if limits:
+        case_timeout = max(case_timeout, limits["time"] * 2 + 2)
+    data = get_client(runner_url).post(
+        "/run_batch",
+        {
+            "language": language,
+            "code": code,
+            "inputs": list(inputs),
+            "fail_fast": fail_fast,
+            **option_fields(limits, profile),
+        },
+        timeout=REQUEST_TIMEOUT + case_timeout * len(inputs),
+    )
+    if "results" not in data:
+        return [data] * len(inputs)
+    return data["results"]
+
+
+def run_batch(
+    codes,
+    language="python",
+    inputs=None,
+    runner_url=None,
+    cancel=None,
+    limits=None,
+    profile=None,
+):
+    """
+    Run several programs on one runner node and return one record (see
+    to_record) per program; errors are raised.
+    Identical programs are sent together to /run_batch so they compile once.
+    Once the optional `cancel` event is set the remaining programs are skipped.
+    """
+    inputs = inputs if inputs is not None else [""] * len(codes)
+    groups = {}
+    for index, code in enumerate(codes):
+        groups.setdefault(code, []).append(index)
+
+    cancelled = {"output": "Cancelled", "time": None, "memory": None, "verdict": None}
+    records = [cancelled] * len(codes)
+    for code, indices in groups.items():
+        if cancel is not None and cancel.is_set():
+            break
+        results = run_inputs(
+            code,
+            language,
+            [inputs[i] for i in indices],
+            runner_url,
+            limits=limits,
+            profile=profile,
         )
+        for index, result in zip(indices, results):
+            records[index] = to_record(result)
+    return records
 
-        if response.status_code == 200:
-            result = response.json()
-            # print(result)
-            output = result.get("stdout", "").strip()
-            error = result.get("stderr", "").strip()
-            exit_code = result.get("exit_code", 0)
-            time_taken = result.get("time_taken", "None")
-            memory_used = result.get("memory_used", "None")
-            print("output", output)
-            print(f"Time:{time_taken} sec  Memory: {memory_used} KB")
-
-            if error:
-                return f"Error:\n{error}"
-            elif output:
-                if exit_code == 0:
-                    return output  # Don't show exit code on success
-                else:
-                    return f"{output}\n\nExit Code: {exit_code}"
-            else:
-                return f"No Output.\nExit Code: {exit_code}"
-        else:
-            return f"Error: Status {response.status_code}"
+
+def stream_batch(
+    codes,
+    language="python",
+    inputs=None,
+    runner_url=None,
+    fail_fast=False,
+    limits=None,
+    profile=None,
+    expected=None,
+    testdata=None,
+):
+    """
+    Run several programs on one runner node over /run_stream, yielding
+    (index, record) (see to_record) for each program as soon as it finishes.
+    With `expected`, one expected answer per program, the runner judges the
+    answers itself and only sends output back for wrong ones. With
+    `testdata` (a TestData), `inputs` are indices of its cases, read from the
+    runner's cache; a runner without that version is sent it once first.
+    Errors are raised, including a runner that ends the stream early without
+    fail_fast. Closing the generator cancels the programs not yet run.
+    """
+    inputs = inputs if inputs is not None else [""] * len(codes)
+    options = option_fields(limits, profile)
+    if expected is not None:
+        options["expected_hashes"] = [answer_hash(value) for value in expected]
+    if testdata is not None:
+        options["testdata"] = {
+            "problem": testdata.problem,
+            "version": testdata.version,
+            "cases": list(inputs),
+        }
+    else:
+        options["inputs"] = list(inputs)
+    case_timeout = BATCH_CASE_TIMEOUT
+    if limits:
+        case_timeout = max(case_timeout, limits["time"] * 2 + 2)
+
+    client = get_client(runner_url)
+    payload = {"language": language, "codes": list(codes), "fail_fast": fail_fast}
+    received = 0
+    for attempt in range(2):
+        stream = client.stream(
+            "/run_stream",
+            {**payload, **options},
+            timeout=REQUEST_TIMEOUT + case_timeout,
+        )
+        try:
+            with contextlib.closing(stream):
+                for result in stream:
+                    if "index" not in result:
+                        error = result.get("error", "Malformed runner stream")
+                        raise RuntimeError(error)
+                    received += 1
+                    yield result["index"], to_record(result)
+            break
+        except httpx.HTTPStatusError as e:
+            # 409: this runner has not cached the test data version yet
+            if testdata is None or e.response.status_code != 409 or attempt:
+                raise
+            testdata.sync(client)
+    if received < len(codes) and not fail_fast:
+        raise RuntimeError(f"Runner stream ended after {received} of {len(codes)}")
+
+
+def execute_code_batch(codes, language="python", inputs=None, runner_url=None):
+    """
+    Run several programs on the runner.
+    Returns one output string per program, in the order they were given.
+    """
+    try:
+        records = run_batch(codes, language, inputs, runner_url)
+        return [record["output"] for record in records]
+    except httpx.HTTPStatusError as e:
+        return [f"Error: Status {e.response.status_code}"] * len(codes)
     except Exception as e:
-        return f"Exception occurred: {str(e)}"
+        return [f"Exception occurred: {str(e)}"] * len(codes)
+
+
+# ------------------------
+# Asyncio client
+# ------------------------
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client(runner_url=None):
+    """
+    Return the httpx.AsyncClient shared by every coroutine on the running
+    loop for `runner_url` (default RUNNER_URL), set up like RunnerClient's.
+    Closed by close_async_clients.
+    """
+    url = (runner_url or RUNNER_URL).rstrip("/")
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    async_client = clients.get(url)
+    if async_client is None:
+        async_client = clients[url] = httpx.AsyncClient(
+            **client_options(url, httpx.AsyncHTTPTransport, ASYNC_POOL_SIZE)
+        )
+    return async_client
+
+
+async def close_async_clients():
+    """Close the running loop's clients; await it before the loop ends."""
+    clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    await asyncio.gather(*(client.aclose() for client in clients.values()))
+
+
+async def run_inputs_async(
+    code, language="python", inputs=(), runner_url=None, limits=None, profile=None
+):
+    """Async version of run_inputs."""
+    case_timeout = BATCH_CASE_TIMEOUT
+    if limits:
+        case_timeout = max(case_timeout, limits["time"] * 2 + 2)
+    payload = {
+        "language": language,
+        "code": code,
+        "inputs": list(inputs),
+        **option_fields(limits, profile),
+    }
+    response = await get_async_client(runner_url).post(
+        "/run_batch",
+        timeout=REQUEST_TIMEOUT + case_timeout * len(inputs),
+        **request_options(payload, msgpack_format(RUNNER_FORMAT)),
+    )
+    response.raise_for_status()
+    data = decode_response(response)
+    if "results" not in data:
+        return [data] * len(inputs)
+    return data["results"]
+
+
+async def run_batch_async(
+    codes, language="python", inputs=None, runner_url=None, limits=None, profile=None
+):
+    """
+    Async version of run_batch: identical programs still compile once, and
+    the distinct ones run concurrently on the shared event loop.
+    """
+    inputs = inputs if inputs is not None else [""] * len(codes)
+    groups = {}
+    for index, code in enumerate(codes):
+        groups.setdefault(code, []).append(index)
+
+    results = await asyncio.gather(
+        *(
+            run_inputs_async(
+                code,
+                language,
+                [inputs[i] for i in indices],
+                runner_url,
+                limits,
+                profile,
+            )
+            for code, indices in groups.items()
+        )
+    )
+    records = [None] * len(codes)
+    for indices, group_results in zip(groups.values(), results):
+        for index, result in zip(indices, group_results):
+            records[index] = to_record(result)
+    return records
+
+
+async def execute_code_async(code, language="python", input_data="", runner_url=None):
+    """Async version of execute_code that does not block the event loop."""
+    outputs = await execute_code_batch_async([code], language, [input_data], runner_url)
+    return outputs[0]
+
+
+async def execute_code_batch_async(codes, language="python", inputs=None, runner_url=None):
+    """
+    Run several programs concurrently on the shared event loop.
+    Returns one output string per program, in the order they were given.
+    """
+    try:
+        records = await run_batch_async(codes, language, inputs, runner_url)
+        return [record["output"] for record in records]
+    except httpx.HTTPStatusError as e:
+        return [f"Error: Status {e.response.status_code}"] * len(codes)
+    except Exception as e:
+        return [f"Exception occurred: {str(e)}"] * len(codes)
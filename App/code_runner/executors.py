@@ -0,0 +1,786 @@
+"""
+Registry of code execution backends.
+
+Backends are configured with ``CODE_EXECUTORS`` in settings. Each execution
+goes to the least-loaded healthy backend; a backend that keeps failing is
+ejected by its circuit breaker for a while and its work fails over to the
+next one. With ``CODE_EXECUTOR_HEDGE_PERCENTILE`` set, a run that is slower
+than that percentile of recent runs (per program, per language) is
+duplicated on a second backend and the first result wins; the primary runs
+on the caller's thread and hedges on a small bounded pool, so a saturated
+pool skips hedging instead of queueing more work. Streamed runs (stream_programs) deliver each program's
+record as soon as it finishes; they fail over but are never hedged. The
+coroutines (run_programs_async, execute_code_async) take the same route for
+ASGI views, with failover but no hedging; their clients are per event loop
+and closed by close_async_clients.
+"""
+
+import asyncio
+import contextlib
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+from App.code_runner import code_runner, code_runner3
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Closed while a backend is healthy. After `failure_threshold` consecutive
+    failures it opens and rejects calls for `reset_timeout` seconds, then lets
+    a single trial call through (half-open); success closes it again.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        """Return True if a call may be sent to the backend now."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class Backend:
+    """Base class for an execution backend tracked by the registry."""
+
+    kind = None
+
+    def __init__(self, name, weight=1, breaker=None):
+        self.name = name
+        self.weight = weight
+        self.breaker = breaker or CircuitBreaker()
+        self.in_flight = 0
+
+    @property
+    def load(self):
+        return self.in_flight / self.weight
+
+    def run_batch(
+        self, codes, language, inputs, cancel=None, limits=None, profile=None
+    ):
+        """
+        Return one record per program, {"output", "time", "memory", "verdict"}
+        with the display string, CPU seconds, peak KB and "TLE"/"MLE"/"OLE" (or
+        None); raise on backend failure.
+        `cancel` is a threading.Event set when the result is no longer wanted.
+        `limits` is {"time": CPU seconds, "memory": MB} per program, or None
+        for the backend's defaults; `profile` is the C/C++ compile profile,
+        "run" or "submit".
+        """
+        raise NotImplementedError
+
+    async def run_batch_async(
+        self, codes, language, inputs, limits=None, profile=None
+    ):
+        """
+        Coroutine version of run_batch. Backends without an async client run
+        run_batch on a thread.
+        """
+        return await asyncio.to_thread(
+            self.run_batch, codes, language, inputs, None, limits, profile
+        )
+
+    def stream_batch(
+        self,
+        codes,
+        language,
+        inputs,
+        limits=None,
+        profile=None,
+        expected=None,
+        testdata=None,
+    ):
+        """
+        Yield (index, record) for each program as it finishes, in any order;
+        raise on backend failure. Closing the generator abandons the rest.
+        Backends without streaming deliver the records once the batch is done.
+        `expected` holds each program's expected answer for backends that can
+        judge it themselves (their records then carry "passed"); others
+        ignore it. With `testdata` (code_runner3.TestData), `inputs` are
+        indices of its cases.
+        """
+        if testdata is not None:
+            inputs = [testdata.inputs[i] for i in inputs]
+        yield from enumerate(
+            self.run_batch(codes, language, inputs, limits=limits, profile=profile)
+        )
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name} ({self.breaker.state})>"
+
+
+class Judge0Backend(Backend):
+    kind = "judge0"
+
+    def __init__(self, url, api_key=None, auth_token=None, **kwargs):
+        parsed = urlparse(url)
+        super().__init__(kwargs.pop("name", parsed.netloc), **kwargs)
+        if parsed.netloc == code_runner.API_HOST and not (api_key or auth_token):
+            self.client = code_runner.default_client
+        else:
+            headers = {"content-type": "application/json"}
+            if api_key:
+                headers["x-rapidapi-key"] = api_key
+                headers["x-rapidapi-host"] = parsed.netloc
+            if auth_token:
+                headers["X-Auth-Token"] = auth_token
+            self.client = code_runner.Judge0Client(
+                parsed.netloc, headers, secure=parsed.scheme != "http"
+            )
+
+    def run_batch(
+        self, codes, language, inputs, cancel=None, limits=None, profile=None
+    ):
+        return code_runner.run_batch(
+            codes,
+            language,
+            inputs,
+            client=self.client,
+            cancel=cancel,
+            limits=limits,
+            profile=profile,
+        )
+
+    async def run_batch_async(
+        self, codes, language, inputs, limits=None, profile=None
+    ):
+        return await code_runner.run_batch_async(
+            codes, language, inputs, client=self.client, limits=limits, profile=profile
+        )
+
+
+class LocalRunnerBackend(Backend):
+    kind = "local"
+
+    def __init__(self, url, **kwargs):
+        super().__init__(kwargs.pop("name", url), **kwargs)
+        self.url = url.rstrip("/")
+
+    def run_batch(
+        self, codes, language, inputs, cancel=None, limits=None, profile=None
+    ):
+        return code_runner3.run_batch(
+            codes,
+            language,
+            inputs,
+            runner_url=self.url,
+            cancel=cancel,
+            limits=limits,
+            profile=profile,
+        )
+
+    async def run_batch_async(
+        self, codes, language, inputs, limits=None, profile=None
+    ):
+        return await code_runner3.run_batch_async(
+            codes, language, inputs, runner_url=self.url, limits=limits, profile=profile
+        )
+
+    def stream_batch(
+        self,
+        codes,
+        language,
+        inputs,
+        limits=None,
+        profile=None,
+        expected=None,
+        testdata=None,
+    ):
+        return code_runner3.stream_batch(
+            codes,
+            language,
+            inputs,
+            runner_url=self.url,
+            limits=limits,
+            profile=profile,
+            expected=expected,
+            testdata=testdata,
+        )
+
+
+BACKEND_TYPES = {
+    "judge0": Judge0Backend,
+    "local": LocalRunnerBackend,
+}
+
+
+class LatencyHistogram:
+    """Sliding window of recent latencies, in seconds."""
+
+    def __init__(self, size=500):
+        self.samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, p):
+        """Return the p-th percentile of the window, or None if it is empty."""
+        with self._lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return None
+        index = min(len(ordered) - 1, int(len(ordered) * p / 100))
+        return ordered[index]
+
+    def __len__(self):
+        return len(self.samples)
+
+
+class ExecutorRegistry:
+    """Routes executions across backends with least-loaded selection and failover."""
+
+    def __init__(
+        self,
+        backends,
+        hedge_percentile=None,
+        hedge_min_delay=0.5,
+        hedge_min_samples=20,
+        hedge_pool_size=4,
+    ):
+        self.backends = list(backends)
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_pool_size = hedge_pool_size
+        # Seconds per program of recent runs, per language
+        self.latencies = {}
+        self.stats = {"runs": 0, "hedged": 0, "hedge_wins": 0, "hedges_skipped": 0}
+        self._lock = threading.Lock()
+        self._pool = None
+        self._hedge_slots = threading.BoundedSemaphore(hedge_pool_size)
+
+    @classmethod
+    def from_settings(cls):
+        breaker_options = {
+            "failure_threshold": getattr(settings, "CODE_EXECUTOR_FAILURE_THRESHOLD", 3),
+            "reset_timeout": getattr(settings, "CODE_EXECUTOR_RESET_TIMEOUT", 30),
+        }
+        backends = []
+        for entry in getattr(settings, "CODE_EXECUTORS", []):
+            options = dict(entry)
+            backend_class = BACKEND_TYPES[options.pop("type")]
+            options["breaker"] = CircuitBreaker(**breaker_options)
+            backends.append(backend_class(**options))
+        return cls(
+            backends,
+            hedge_percentile=getattr(settings, "CODE_EXECUTOR_HEDGE_PERCENTILE", None),
+            hedge_min_delay=getattr(settings, "CODE_EXECUTOR_HEDGE_MIN_DELAY", 0.5),
+            hedge_pool_size=getattr(settings, "CODE_EXECUTOR_HEDGE_POOL_SIZE", 4),
+        )
+
+    def candidates(self, exclude=()):
+        """Backends whose breaker is not open, least loaded first."""
+        with self._lock:
+            ordered = sorted(self.backends, key=lambda b: b.load)
+        return [
+            b for b in ordered if b.breaker.state != "open" and b not in exclude
+        ]
+
+    def language_latencies(self, language):
+        with self._lock:
+            return self.latencies.setdefault(language, LatencyHistogram())
+
+    def hedge_delay(self, language, count):
+        """
+        Seconds to wait for a run of `count` programs before duplicating it
+        on another backend.
+        """
+        per_program = self.language_latencies(language).percentile(self.hedge_percentile)
+        if per_program is None:
+            return self.hedge_min_delay
+        return max(self.hedge_min_delay, per_program * count)
+
+    def hedge_rate(self):
+        """Fraction of runs that sent a hedge request."""
+        return self.stats["hedged"] / self.stats["runs"] if self.stats["runs"] else 0.0
+
+    def run_batch(
+        self, codes, language="python", inputs=None, limits=None, profile=None
+    ):
+        """
+        Run the programs on the least-loaded healthy backend, failing over to
+        the next one if it errors, and hedging slow runs when enabled.
+        Raises the last error if every backend fails.
+        """
+        inputs = inputs if inputs is not None else [""] * len(codes)
+        start = time.monotonic()
+
+        latencies = self.language_latencies(language)
+        hedging = (
+            self.hedge_percentile
+            and codes
+            and len(latencies) >= self.hedge_min_samples
+            and len(self.candidates()) > 1
+        )
+        if hedging:
+            records = self._run_hedged(codes, language, inputs, limits, profile)
+        else:
+            records = self._run_with_failover(
+                codes, language, inputs, limits=limits, profile=profile
+            )
+
+        if codes:
+            latencies.record((time.monotonic() - start) / len(codes))
+        with self._lock:
+            self.stats["runs"] += 1
+        return records
+
+    def _run_with_failover(
+        self,
+        codes,
+        language,
+        inputs,
+        used=None,
+        cancel=None,
+        limits=None,
+        profile=None,
+        on_start=None,
+    ):
+        """
+        Try backends least loaded first; record each one picked in `used`
+        and pass it to `on_start` before it runs.
+        """
+        last_error = RuntimeError("No healthy code execution backend available")
+
+        for backend in self.candidates(exclude=used or ()):
+            if cancel is not None and cancel.is_set():
+                break
+            if not backend.breaker.allow():
+                continue
+            if used is not None:
+                used.add(backend)
+            if on_start is not None:
+                on_start(backend)
+            with self._lock:
+                backend.in_flight += 1
+            try:
+                records = backend.run_batch(
+                    codes, language, inputs, cancel, limits, profile
+                )
+            except Exception as e:
+                print(f"[WARNING] Executor {backend.name} failed: {e}")
+                backend.breaker.record_failure()
+                last_error = e
+                continue
+            finally:
+                with self._lock:
+                    backend.in_flight -= 1
+            backend.breaker.record_success()
+            return records
+
+        raise last_error
+
+    async def run_batch_async(
+        self, codes, language="python", inputs=None, limits=None, profile=None
+    ):
+        """
+        Coroutine version of run_batch: the least-loaded healthy backend runs
+        the programs, failing over to the next one if it errors. Not hedged.
+        Raises the last error if every backend fails.
+        """
+        inputs = inputs if inputs is not None else [""] * len(codes)
+        last_error = RuntimeError("No healthy code execution backend available")
+
+        for backend in self.candidates():
+            if not backend.breaker.allow():
+                continue
+            with self._lock:
+                backend.in_flight += 1
+            try:
+                records = await backend.run_batch_async(
+                    codes, language, inputs, limits, profile
+                )
+            except asyncio.CancelledError:
+                # The caller gave up; that says nothing about the backend
+                backend.breaker.record_success()
+                raise
+            except Exception as e:
+                print(f"[WARNING] Executor {backend.name} failed: {e}")
+                backend.breaker.record_failure()
+                last_error = e
+                continue
+            finally:
+                with self._lock:
+                    backend.in_flight -= 1
+            backend.breaker.record_success()
+            return records
+
+        raise last_error
+
+    def stream_batch(
+        self,
+        codes,
+        language="python",
+        inputs=None,
+        limits=None,
+        profile=None,
+        expected=None,
+        testdata=None,
+    ):
+        """
+        Yield (index, record) for each program as soon as it finishes, on the
+        least-loaded healthy backend. If a backend fails mid-stream, the
+        programs it had not finished are run on the next one. Raises the last
+        error if every backend fails.
+        """
+        inputs = inputs if inputs is not None else [""] * len(codes)
+        remaining = list(range(len(codes)))
+        last_error = RuntimeError("No healthy code execution backend available")
+
+        for backend in self.candidates():
+            if not backend.breaker.allow():
+                continue
+            with self._lock:
+                backend.in_flight += 1
+            finished = set()
+            stream = backend.stream_batch(
+                [codes[i] for i in remaining],
+                language,
+                [inputs[i] for i in remaining],
+                limits,
+                profile,
+                None if expected is None else [expected[i] for i in remaining],
+                testdata,
+            )
+            try:
+                with contextlib.closing(stream):
+                    for position, record in stream:
+                        finished.add(position)
+                        yield remaining[position], record
+            except GeneratorExit:
+                # Closed early by the consumer (e.g. at the first wrong
+                # answer) while the backend was serving fine; a half-open
+                # breaker must still hear how its trial call went
+                backend.breaker.record_success()
+                raise
+            except Exception as e:
+                print(f"[WARNING] Executor {backend.name} failed: {e}")
+                backend.breaker.record_failure()
+                last_error = e
+                remaining = [
+                    index for position, index in enumerate(remaining)
+                    if position not in finished
+                ]
+                continue
+            finally:
+                with self._lock:
+                    backend.in_flight -= 1
+            backend.breaker.record_success()
+            return
+
+        raise last_error
+
+    def _run_hedged(self, codes, language, inputs, limits=None, profile=None):
+        """
+        Run on the caller's thread; if the run has not finished within
+        hedge_delay() of starting on its backend, start a duplicate on a
+        different backend from the hedge pool, unless every hedge slot is
+        busy. The first successful result wins and the other run is told to
+        stop.
+        """
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        self.hedge_pool_size, thread_name_prefix="executor-hedge"
+                    )
+
+        delay = self.hedge_delay(language, len(codes))
+        primary_cancel, hedge_cancel = threading.Event(), threading.Event()
+        lock = threading.Lock()
+        state = {"timer": None, "hedge": None, "winner": None, "finished": False}
+
+        def hedge_done(future):
+            self._hedge_slots.release()
+            if future.exception() is None:
+                with lock:
+                    if state["winner"] is None:
+                        state["winner"] = "hedge"
+                        primary_cancel.set()
+
+        def start_hedge(primary_backend):
+            with lock:
+                if state["finished"]:
+                    return
+                if not self._hedge_slots.acquire(blocking=False):
+                    with self._lock:
+                        self.stats["hedges_skipped"] += 1
+                    return
+                with self._lock:
+                    self.stats["hedged"] += 1
+                logger.info(
+                    "Hedging %d %s program(s) running on %s for %.2fs",
+                    len(codes),
+                    language,
+                    primary_backend.name,
+                    delay,
+                )
+                state["hedge"] = self._pool.submit(
+                    self._run_with_failover,
+                    codes,
+                    language,
+                    inputs,
+                    {primary_backend},
+                    hedge_cancel,
+                    limits,
+                    profile,
+                )
+            state["hedge"].add_done_callback(hedge_done)
+
+        def on_start(backend):
+            # Timed from the primary's first backend; failover restarts nothing
+            if state["timer"] is None:
+                state["timer"] = threading.Timer(delay, start_hedge, (backend,))
+                state["timer"].daemon = True
+                state["timer"].start()
+
+        error = None
+        try:
+            records = self._run_with_failover(
+                codes, language, inputs, set(), primary_cancel, limits, profile, on_start
+            )
+        except Exception as e:
+            error = e
+        with lock:
+            state["finished"] = True
+            if state["timer"] is not None:
+                state["timer"].cancel()
+            if error is None and state["winner"] is None:
+                state["winner"] = "primary"
+            hedge = state["hedge"]
+
+        if hedge is None:
+            if error is not None:
+                raise error
+            return records
+        if state["winner"] == "primary":
+            hedge_cancel.set()
+            return records
+        # The hedge won, or is the only run left after the primary failed
+        records = hedge.result()
+        with self._lock:
+            self.stats["hedge_wins"] += 1
+        return records
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Return the process-wide registry, built from settings on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ExecutorRegistry.from_settings()
+    return _registry
+
+
+def scale_limits(language, time_limit, memory_limit):
+    """
+    Limits for running `language` against a problem's base time (seconds) and
+    memory (MB) limits, scaled by CODE_EXECUTOR_LIMIT_MULTIPLIERS.
+    """
+    multipliers = getattr(settings, "CODE_EXECUTOR_LIMIT_MULTIPLIERS", {})
+    multipliers = multipliers.get(language, {})
+    return {
+        "time": time_limit * multipliers.get("time", 1),
+        "memory": int(memory_limit * multipliers.get("memory", 1)),
+    }
+
+
+def languages_over_limits(time_limit, memory_limit):
+    """
+    Languages whose scaled limits for a problem's base time (seconds) and
+    memory (MB) limits are more than Judge0, the default backend, accepts.
+    """
+    return [
+        language
+        for language in code_runner.LANGUAGE_ID_MAP
+        if not code_runner.limits_fit(scale_limits(language, time_limit, memory_limit))
+    ]
+
+
+def problem_limits(problem, language):
+    """Scaled limits for running `language` against `problem`."""
+    return scale_limits(language, problem.time_limit, problem.memory_limit)
+
+
+def problem_testdata(problem, inputs, language=None):
+    """
+    TestData for `problem` with the given stdin per test case; its version
+    changes whenever the inputs do. With `language`, the inputs are kept
+    apart from the problem's other languages' (harness inputs differ per
+    language).
+    """
+    key = f"{problem.id}-{language}" if language else problem.id
+    return code_runner3.TestData(key, inputs)
+
+
+def run_programs(codes, language="python", inputs=None, limits=None, profile=None):
+    """
+    Execute several programs on the best available backend.
+    Returns one record per program, in the order they were given:
+    {"output": display string, "time": CPU seconds, "memory": peak KB,
+    "verdict": "TLE", "MLE", "OLE" or None}, with time and memory None when the
+    backend could not measure them. `limits` is {"time": seconds,
+    "memory": MB}, see problem_limits; `profile` picks the C/C++ compile
+    flags, "run" (fast compile) or "submit" (optimised).
+    """
+    if not codes:
+        return []
+    try:
+        return get_registry().run_batch(codes, language, inputs, limits, profile)
+    except Exception as e:
+        error = {
+            "output": f"Exception occurred: {str(e)}",
+            "time": None,
+            "memory": None,
+            "verdict": None,
+        }
+        return [error] * len(codes)
+
+
+def stream_programs(
+    codes,
+    language="python",
+    inputs=None,
+    limits=None,
+    profile=None,
+    expected=None,
+    testdata=None,
+):
+    """
+    Like run_programs, but yields (index, record) for each program as soon as
+    it finishes. Closing the generator early (e.g. on the first wrong answer)
+    cancels the programs that have not run yet. If every backend fails, the
+    programs without a record get an error record.
+    With `expected`, each program's expected answer as the generated drivers
+    print it, backends that can compare answers themselves do so and set the
+    record's "passed"; it is None where the caller has to compare.
+    With `testdata` (see problem_testdata), `inputs` are indices of its
+    cases, which local runners keep cached instead of receiving every time.
+    """
+    delivered = set()
+    try:
+        for index, record in get_registry().stream_batch(
+            codes, language, inputs, limits, profile, expected, testdata
+        ):
+            delivered.add(index)
+            yield index, record
+    except Exception as e:
+        error = {
+            "output": f"Exception occurred: {str(e)}",
+            "time": None,
+            "memory": None,
+            "verdict": None,
+            "passed": None,
+        }
+        for index in range(len(codes)):
+            if index not in delivered:
+                yield index, error
+
+
+def execute_code_batch(
+    codes, language="python", inputs=None, limits=None, profile=None
+):
+    """
+    Execute several programs on the best available backend.
+    Returns one output string per program, in the order they were given.
+    """
+    records = run_programs(codes, language, inputs, limits, profile)
+    return [record["output"] for record in records]
+
+
+def execute_code(code, language="python", input_data="", limits=None, profile=None):
+    """Execute one program on the best available backend and return its output."""
+    return execute_code_batch([code], language, [input_data], limits, profile)[0]
+
+
+async def close_async_clients():
+    """
+    Close the asyncio clients of the running loop, for every backend type;
+    the ASGI application awaits it at lifespan shutdown.
+    """
+    await code_runner.close_async_clients()
+    await code_runner3.close_async_clients()
+
+
+async def run_programs_async(
+    codes, language="python", inputs=None, limits=None, profile=None
+):
+    """Coroutine version of run_programs, for ASGI views."""
+    if not codes:
+        return []
+    try:
+        return await get_registry().run_batch_async(
+            codes, language, inputs, limits, profile
+        )
+    except Exception as e:
+        error = {
+            "output": f"Exception occurred: {str(e)}",
+            "time": None,
+            "memory": None,
+            "verdict": None,
+        }
+        return [error] * len(codes)
+
+
+async def execute_code_batch_async(
+    codes, language="python", inputs=None, limits=None, profile=None
+):
+    """Coroutine version of execute_code_batch."""
+    records = await run_programs_async(codes, language, inputs, limits, profile)
+    return [record["output"] for record in records]
+
+
+async def execute_code_async(
+    code, language="python", input_data="", limits=None, profile=None
+):
+    """Coroutine version of execute_code."""
+    outputs = await execute_code_batch_async(
+        [code], language, [input_data], limits, profile
+    )
+    return outputs[0]
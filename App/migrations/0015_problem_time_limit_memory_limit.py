@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-16 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('App', '0014_remove_submissionhistory_add_ishistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problem',
+            name='memory_limit',
+            field=models.PositiveIntegerField(default=128),
+        ),
+        migrations.AddField(
+            model_name='problem',
+            name='time_limit',
+            field=models.FloatField(default=2.0),
+        ),
+    ]
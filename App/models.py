@@ -56,6 +56,8 @@ class Problem(models.Model):
     function_signature = models.JSONField(
         default=dict
     )  # e.g. {"python": "def solve(a, b):", "java": "public int solve(int a, int b)"}
+    time_limit = models.FloatField(default=2.0)  # CPU seconds per test case
+    memory_limit = models.PositiveIntegerField(default=128)  # MB per test case
 
     def __str__(self):
         return self.title
@@ -0,0 +1,206 @@
+import asyncio
+import http.client
+import importlib.util
+import json
+import time
+from pathlib import Path
+from unittest import mock
+
+import httpx
+from django.test import SimpleTestCase
+
+from App.code_runner import code_runner, code_runner3
+from App.views.code_views import parse_program_output
+
+
+def load_runner_module(name):
+    """A module of the runner service, which is deployed apart from Django"""
+    path = Path(__file__).resolve().parent.parent / "code_runner_2" / f"{name}.py"
+    spec = importlib.util.spec_from_file_location(f"code_runner_2_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class AnswerHashTestCase(SimpleTestCase):
+    """The runner's hash verdict agrees with the views' own comparison"""
+
+    checker = load_runner_module("checker")
+
+    cases = [
+        ("3.0", "cpp", 3),
+        ("3.0", "python", 3),
+        ("true", "python", 1),
+        ("1", "java", True),
+        ('"  a b "', "python", "a b"),
+        ("  a b  ", "cpp", " a b"),
+        ("[1.0, 2]", "c", [1, 2]),
+        ("3.5", "cpp", 3),
+        ("[2, 1]", "python", [1, 2]),
+        ('"3"', "python", 3),
+        ('[" a"]', "python", ["a"]),
+    ]
+
+    def views_verdict(self, stdout, language, expected):
+        # As iter_test_cases compares a case's output with its expected value
+        output_val = parse_program_output(stdout, language)
+        output_str = output_val.strip() if isinstance(output_val, str) else output_val
+        expected_str = expected.strip() if isinstance(expected, str) else expected
+        return output_str == expected_str
+
+    def test_runner_and_views_agree(self):
+        for stdout, language, expected in self.cases:
+            with self.subTest(stdout=stdout, language=language, expected=expected):
+                result = {"stdout": stdout + "\n", "stderr": "", "verdict": None}
+                judged = self.checker.judge(
+                    result, language, code_runner3.answer_hash(expected)
+                )
+                self.assertEqual(
+                    judged["passed"], self.views_verdict(stdout, language, expected)
+                )
+
+
+class FakeResponse:
+    status = 200
+    will_close = False
+
+    def read(self):
+        return json.dumps({"token": "t"}).encode()
+
+
+class FakeConnection:
+    """HTTP connection that fails while sending or while reading the response"""
+
+    def __init__(self, fail=None):
+        self.fail = fail
+        self.sent = []
+
+    def request(self, method, path, body=None, headers=None):
+        if self.fail == "send":
+            raise BrokenPipeError
+        self.sent.append((method, path))
+
+    def getresponse(self):
+        if self.fail == "response":
+            raise http.client.RemoteDisconnected("closed")
+        return FakeResponse()
+
+    def close(self):
+        pass
+
+
+class Judge0ClientRetryTestCase(SimpleTestCase):
+    """Only requests that cannot have been processed are sent again"""
+
+    def request(self, method, stale, path="/submissions/batch"):
+        client = code_runner.Judge0Client("judge0.test", {})
+        client._idle.append((stale, time.monotonic()))
+        fresh = FakeConnection()
+        with mock.patch.object(
+            code_runner.http.client, "HTTPSConnection", return_value=fresh
+        ):
+            return client.request(method, path), fresh
+
+    def test_post_with_a_lost_response_is_not_resent(self):
+        with self.assertRaises(http.client.RemoteDisconnected):
+            self.request("POST", FakeConnection(fail="response"))
+
+    def test_post_that_failed_to_send_is_retried(self):
+        data, fresh = self.request("POST", FakeConnection(fail="send"))
+        self.assertEqual(data, {"token": "t"})
+        self.assertEqual(fresh.sent, [("POST", "/submissions/batch")])
+
+    def test_get_with_a_lost_response_is_retried(self):
+        path = "/submissions/batch?tokens=t"
+        data, fresh = self.request("GET", FakeConnection(fail="response"), path)
+        self.assertEqual(data, {"token": "t"})
+        self.assertEqual(fresh.sent, [("GET", path)])
+
+
+class StreamTestDataTestCase(SimpleTestCase):
+    """A runner without the test data version is sent it, then asked again"""
+
+    def setUp(self):
+        self.testdata = code_runner3.TestData("sum", ["1 2\n", "3 4\n"])
+        self.requests = []
+        self.missing = 1  # /run_stream requests answered with 409
+
+    def handle(self, request):
+        self.requests.append((request.method, request.url.path))
+        if request.method == "PUT":
+            self.uploaded = json.loads(request.content)
+            return httpx.Response(200, json={"cases": 2})
+        if self.missing:
+            self.missing -= 1
+            return httpx.Response(409, json={"error": "Test data not cached"})
+        cases = json.loads(request.content)["testdata"]["cases"]
+        lines = [
+            json.dumps({"index": index, "stdout": f"{case}\n", "exit_code": 0})
+            for index, case in enumerate(cases)
+        ]
+        return httpx.Response(200, text="\n".join(lines) + "\n")
+
+    def stream(self):
+        client = code_runner3.RunnerClient("http://runner.test", payload_format="json")
+        client.http = httpx.Client(
+            base_url="http://runner.test", transport=httpx.MockTransport(self.handle)
+        )
+        with mock.patch.object(code_runner3, "get_client", return_value=client):
+            return list(
+                code_runner3.stream_batch(
+                    ["print(1)", "print(2)"], inputs=[0, 1], testdata=self.testdata
+                )
+            )
+
+    def test_missing_version_is_uploaded_and_the_run_retried(self):
+        records = self.stream()
+
+        path = f"/testdata/sum/{self.testdata.version}"
+        self.assertEqual(
+            self.requests,
+            [("POST", "/run_stream"), ("PUT", path), ("POST", "/run_stream")],
+        )
+        self.assertEqual(self.uploaded, {"inputs": ["1 2\n", "3 4\n"]})
+        self.assertEqual([index for index, _ in records], [0, 1])
+        self.assertEqual(records[1][1]["output"], "1")
+
+    def test_still_missing_after_the_upload_is_raised(self):
+        self.missing = 2
+        with self.assertRaises(httpx.HTTPStatusError):
+            self.stream()
+        self.assertEqual([method for method, _ in self.requests], ["POST", "PUT", "POST"])
+
+
+class AsyncPayloadFormatTestCase(SimpleTestCase):
+    """The asyncio client negotiates msgpack like the sync one"""
+
+    @mock.patch.object(code_runner3, "RUNNER_FORMAT", "msgpack")
+    def test_run_inputs_async_sends_and_reads_msgpack(self):
+        msgpack = code_runner3.msgpack
+        if msgpack is None:
+            self.skipTest("msgpack is not installed")
+        seen = {}
+
+        def handle(request):
+            seen["headers"] = request.headers
+            seen["payload"] = msgpack.unpackb(request.content)
+            body = msgpack.packb({"results": [{"stdout": "3\n", "exit_code": 0}]})
+            return httpx.Response(
+                200, content=body, headers={"content-type": code_runner3.MSGPACK_TYPE}
+            )
+
+        async def run():
+            client = httpx.AsyncClient(
+                base_url="http://runner.test", transport=httpx.MockTransport(handle)
+            )
+            with mock.patch.object(
+                code_runner3, "get_async_client", return_value=client
+            ):
+                return await code_runner3.run_inputs_async("print(3)", inputs=["1 2"])
+
+        results = asyncio.run(run())
+
+        self.assertEqual(results, [{"stdout": "3\n", "exit_code": 0}])
+        self.assertEqual(seen["headers"]["content-type"], code_runner3.MSGPACK_TYPE)
+        self.assertEqual(seen["headers"]["accept"], code_runner3.MSGPACK_TYPE)
+        self.assertEqual(seen["payload"]["inputs"], ["1 2"])
@@ -0,0 +1,254 @@
+import json
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from App.code_runner import code_runner, executors
+from App.views import code_views
+
+
+def make_problem(signature, cases):
+    """Stand-in for a Problem with `cases` as its test cases' argument lists"""
+    return SimpleNamespace(
+        id=7,
+        slug="add",
+        time_limit=1,
+        memory_limit=256,
+        function_signature=signature,
+        starter_code=SimpleNamespace(
+            get_code=lambda language, slug=None: "int add(int a, int b) {}"
+        ),
+        testcase_group=SimpleNamespace(
+            test_cases=[
+                {
+                    "input_data": json.dumps(
+                        {str(i + 1): arg for i, arg in enumerate(args)}
+                    ),
+                    "output_data": sum(args),
+                }
+                for args in cases
+            ]
+        ),
+    )
+
+
+def record(output):
+    return {"output": output, "time": 0.01, "memory": 1024, "verdict": None}
+
+
+class MixedFitHarnessTestCase(SimpleTestCase):
+    """A submission uses the harness for every case or for none of them"""
+
+    code = "int add(int a, int b) { return a + b; }"
+
+    def judge(self, cases, first_output):
+        """
+        Run iter_test_cases with the one-program run reporting only case 0
+        (it crashed after it), returning the fallback stream's arguments.
+        """
+        problem = make_problem({"cpp": "int add(int a, int b)"}, cases)
+        streamed = {}
+
+        def stream_programs(programs, **kwargs):
+            if kwargs["inputs"] == [0]:
+                # The harness run, with every case read from test data input 0
+                yield 0, record(first_output)
+                return
+            streamed.update(kwargs, programs=programs)
+            for index in range(len(programs)):
+                yield index, {**record(str(sum(cases[index + 1]))), "passed": None}
+
+        with mock.patch.object(
+            code_views, "run_programs", return_value=[record(first_output)]
+        ), mock.patch.object(code_views, "stream_programs", stream_programs):
+            results = list(code_views.iter_test_cases(problem, self.code, "cpp"))
+        return results, streamed
+
+    def test_case_that_does_not_fit_keeps_every_case_on_literal_drivers(self):
+        cases = [[2.5, 1], [3, 1], [4, 1]]
+        results, streamed = self.judge(cases, f"\n{code_views.CASE_MARKER} 0 ok 5 3.5")
+
+        self.assertEqual([result["passed"] for result in results], [True] * 3)
+        # The drivers embed their arguments, so no test data is sent
+        self.assertIsNone(streamed["inputs"])
+        self.assertIsNone(streamed["testdata"])
+        self.assertEqual(len(set(streamed["programs"])), 2)
+        self.assertNotIn("harness_value", streamed["programs"][0])
+        self.assertIn("add(3, 1)", streamed["programs"][0])
+
+    def test_cases_that_fit_all_use_the_harness(self):
+        cases = [[2, 1], [3, 1], [4, 1]]
+        results, streamed = self.judge(cases, f"\n{code_views.CASE_MARKER} 0 ok 5 3")
+
+        self.assertEqual([result["passed"] for result in results], [True] * 3)
+        # Input 0 of the harness test data holds every case at once
+        self.assertEqual(streamed["inputs"], [2, 3])
+        self.assertEqual(streamed["testdata"].problem, "7-cpp")
+        self.assertEqual(streamed["testdata"].inputs[2], "1 0\n3\n1\n")
+        self.assertEqual(len(set(streamed["programs"])), 1)
+        self.assertIn("harness_value", streamed["programs"][0])
+
+    def test_case_harness_rejects_mixed_fit(self):
+        signature = "int add(int a, int b)"
+        self.assertIsNone(
+            code_views.case_harness("cpp", "add", signature, [[2.5, 1], [3, 1]])
+        )
+        self.assertIsNotNone(
+            code_views.case_harness("cpp", "add", signature, [[2, 1], [3, 1]])
+        )
+
+
+class MultiCaseLimitsTestCase(SimpleTestCase):
+    """The one program running every case gets limits Judge0 accepts"""
+
+    def test_many_case_python_program_fits_judge0_maxima(self):
+        limits = executors.scale_limits("python", 2, 128)
+        args_list = [[i, 1] for i in range(50)]
+        with mock.patch.object(
+            code_views, "run_programs", return_value=[record("")]
+        ) as run_programs:
+            code_views.run_cases(
+                "def add(a, b):\n    return a + b\n",
+                "python",
+                "add",
+                args_list,
+                "add",
+                limits,
+                None,
+            )
+        program_limits = run_programs.call_args.kwargs["limits"]
+        [submission] = code_runner.build_batch_payload(
+            ["print(1)"], "python", limits=program_limits
+        )["submissions"]
+
+        self.assertGreater(program_limits["time"], limits["time"])
+        self.assertLessEqual(
+            submission["cpu_time_limit"], code_runner.MAX_CPU_TIME_LIMIT
+        )
+        self.assertLessEqual(
+            submission["wall_time_limit"], code_runner.MAX_WALL_TIME_LIMIT
+        )
+        self.assertLessEqual(submission["memory_limit"], code_runner.MAX_MEMORY_LIMIT)
+
+
+class CaseRecordsTestCase(SimpleTestCase):
+    def test_reads_marker_lines_between_program_output(self):
+        output = "\n".join(
+            [
+                "debug print",
+                f"{code_views.CASE_MARKER} 0 ok 1500 [1, 2]",
+                "more output",
+                f"{code_views.CASE_MARKER} 1 error 20 ValueError: bad input",
+                f"{code_views.CASE_MARKER} 2 ok 7 ",
+            ]
+        )
+        self.assertEqual(
+            code_views.parse_case_records(output),
+            {
+                0: ("ok", 0.0015, "[1, 2]"),
+                1: ("error", 0.00002, "ValueError: bad input"),
+                2: ("ok", 0.000007, ""),
+            },
+        )
+
+    def test_skips_cases_without_a_complete_record(self):
+        output = "\n".join(
+            [
+                f"{code_views.CASE_MARKER} 0 ok",  # Died while printing
+                f"{code_views.CASE_MARKER} x ok 5 1",
+                f"{code_views.CASE_MARKER}0 ok 5 1",
+                f"  {code_views.CASE_MARKER} 3 ok 5 1",
+                f"{code_views.CASE_MARKER} 4 ok 5 1",
+            ]
+        )
+        self.assertEqual(code_views.parse_case_records(output), {4: ("ok", 0.000005, "1")})
+
+
+class ParseSignatureTestCase(SimpleTestCase):
+    def test_reads_return_and_parameter_types(self):
+        cases = [
+            (
+                "cpp",
+                "int findMissingNumber(vector<int>& nums)",
+                ("int", (("int[]", "vector<int>"),)),
+            ),
+            (
+                "cpp",
+                "vector<string> split(const std::string &text, long long limit)",
+                ("vector<string>", (("string", "string"), ("long", "long long"))),
+            ),
+            (
+                "java",
+                "public static boolean check(final int[] values, String name)",
+                ("boolean", (("int[]", "int[]"), ("string", "String"))),
+            ),
+            (
+                "c",
+                "double average(int* nums, int numsSize)",
+                ("double", (("int[]", "int*"),)),
+            ),
+            ("cpp", "int answer()", ("int", ())),
+        ]
+        for language, signature, expected in cases:
+            with self.subTest(signature=signature):
+                self.assertEqual(
+                    code_views.parse_signature(language, signature), expected
+                )
+
+    def test_rejects_what_harnesses_cannot_read(self):
+        cases = [
+            ("cpp", "int f(map<int, int> counts)"),
+            ("java", "int f(List<Integer> values)"),
+            ("c", "int f(int* nums)"),  # No length parameter
+            ("c", "int* f(int n)"),  # Cannot print an array
+            ("cpp", ""),
+            ("cpp", None),
+            ("python", "def f(a, b)"),
+        ]
+        for language, signature in cases:
+            with self.subTest(signature=signature):
+                self.assertIsNone(code_views.parse_signature(language, signature))
+
+
+class HarnessInputTestCase(SimpleTestCase):
+    def test_python_gets_a_json_array_per_case(self):
+        self.assertEqual(
+            code_views.harness_input("python", None, [[1, "a"], [[2, 3], None]], True),
+            '2 1\n[1, "a"]\n[[2, 3], null]\n',
+        )
+
+    def test_arrays_and_scalars(self):
+        signature = "int f(vector<int> nums, string name, vector<string> words, bool on)"
+        self.assertEqual(
+            code_views.harness_input(
+                "cpp", signature, [[[4, 5], "x y", ["a", "b"], True]], False
+            ),
+            "1 0\n2\n4 5\nx y\n2\na\nb\ntrue\n",
+        )
+
+    def test_c_arrays_take_their_length_from_the_value(self):
+        self.assertEqual(
+            code_views.harness_input(
+                "c", "double avg(double* nums, int n)", [[[1.5, 2]], [[]]], True
+            ),
+            "2 1\n2\n1.5 2\n0\n\n",
+        )
+
+    def test_arguments_that_do_not_fit_give_none(self):
+        signature = "int f(int a, string s)"
+        cases = [
+            [[1.5, "a"]],  # Float for an int
+            [[True, "a"]],  # Boolean for an int
+            [[1, "two\nlines"]],
+            [[1]],  # Missing argument
+            [[1, "a"], [1, 2]],  # One case in a batch
+        ]
+        for args_list in cases:
+            with self.subTest(args_list=args_list):
+                self.assertIsNone(
+                    code_views.harness_input("cpp", signature, args_list, True)
+                )
+        self.assertIsNone(
+            code_views.harness_input("cpp", "int f(map<int,int> m)", [[{}]], True)
+        )
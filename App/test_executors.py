@@ -0,0 +1,303 @@
+import asyncio
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from App.code_runner import code_runner, code_runner3
+from App.code_runner.executors import (
+    Backend,
+    CircuitBreaker,
+    ExecutorRegistry,
+    Judge0Backend,
+    LocalRunnerBackend,
+    close_async_clients,
+    languages_over_limits,
+    scale_limits,
+)
+
+
+class Clock:
+    """Stands in for time.monotonic in the executors module"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CircuitBreakerTestCase(SimpleTestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch("App.code_runner.executors.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+    def open_breaker(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "closed")
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "open")
+        self.assertFalse(self.breaker.allow())
+
+    def test_success_resets_the_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_half_open_lets_one_trial_through(self):
+        self.open_breaker()
+        self.clock.now += 30
+        self.assertEqual(self.breaker.state, "half-open")
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+
+    def test_successful_trial_closes(self):
+        self.open_breaker()
+        self.clock.now += 30
+        self.breaker.allow()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, "closed")
+        self.assertTrue(self.breaker.allow())
+
+    def test_failed_trial_reopens(self):
+        self.open_breaker()
+        self.clock.now += 30
+        self.breaker.allow()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "open")
+        self.clock.now += 30
+        self.assertTrue(self.breaker.allow())
+
+
+class ListBackend(Backend):
+    """Backend answering every program with its own code, or failing"""
+
+    def __init__(self, name, fail=False, **kwargs):
+        super().__init__(name, **kwargs)
+        self.fail = fail
+        self.calls = []
+
+    def run_batch(
+        self, codes, language, inputs, cancel=None, limits=None, profile=None
+    ):
+        self.calls.append(list(codes))
+        if self.fail:
+            raise RuntimeError(f"{self.name} is down")
+        return [
+            {"output": code, "time": 0.1, "memory": 1, "verdict": None}
+            for code in codes
+        ]
+
+
+class SlowBackend(ListBackend):
+    """Takes `seconds` per run unless cancelled; records the running thread"""
+
+    def __init__(self, name, seconds, **kwargs):
+        super().__init__(name, **kwargs)
+        self.seconds = seconds
+        self.threads = []
+        self.cancelled = False
+
+    def run_batch(
+        self, codes, language, inputs, cancel=None, limits=None, profile=None
+    ):
+        self.threads.append(threading.current_thread())
+        if cancel is not None and cancel.wait(self.seconds):
+            self.cancelled = True
+            return [{"output": "cancelled"} for code in codes]
+        return super().run_batch(codes, language, inputs, cancel, limits, profile)
+
+
+class HedgeTestCase(SimpleTestCase):
+    def registry(self, *backends):
+        registry = ExecutorRegistry(
+            backends,
+            hedge_percentile=50,
+            hedge_min_delay=0.05,
+            hedge_min_samples=1,
+            hedge_pool_size=1,
+        )
+        registry.language_latencies("python").record(0.01)
+        return registry
+
+    def test_slow_primary_on_the_callers_thread_loses_to_a_hedge(self):
+        slow, fast = SlowBackend("slow", 5), SlowBackend("fast", 0, weight=0.5)
+        registry = self.registry(slow, fast)
+
+        records = registry.run_batch(["a"], "python")
+
+        self.assertEqual(records[0]["output"], "a")
+        self.assertEqual(slow.threads, [threading.current_thread()])
+        self.assertEqual(len(fast.threads), 1)
+        self.assertNotEqual(fast.threads[0], threading.current_thread())
+        self.assertTrue(slow.cancelled)
+        self.assertEqual((registry.stats["hedged"], registry.stats["hedge_wins"]), (1, 1))
+
+    def test_busy_hedge_pool_skips_the_hedge(self):
+        slow, other = SlowBackend("slow", 0.3), SlowBackend("other", 0, weight=0.5)
+        registry = self.registry(slow, other)
+        registry._hedge_slots.acquire()
+
+        records = registry.run_batch(["a"], "python")
+
+        self.assertEqual(records[0]["output"], "a")
+        self.assertEqual(other.threads, [])
+        self.assertEqual(registry.stats["hedges_skipped"], 1)
+        self.assertEqual(registry.stats["hedged"], 0)
+
+    def test_delay_scales_with_the_number_of_programs(self):
+        registry = self.registry(ListBackend("a"), ListBackend("b"))
+        registry.language_latencies("python").record(0.2)
+
+        self.assertAlmostEqual(registry.hedge_delay("python", 10), 2.0)
+        self.assertEqual(registry.hedge_delay("cpp", 1), 0.05)
+
+
+class StreamBatchTestCase(SimpleTestCase):
+    def test_fails_over_with_the_remaining_programs(self):
+        down, up = ListBackend("down", fail=True), ListBackend("up", weight=0.5)
+        registry = ExecutorRegistry([down, up])
+
+        records = dict(registry.stream_batch(["a", "b"], "python"))
+
+        outputs = {index: record["output"] for index, record in records.items()}
+        self.assertEqual(outputs, {0: "a", 1: "b"})
+        self.assertEqual(down.breaker.failures, 1)
+
+    def test_early_close_completes_a_half_open_trial(self):
+        clock = Clock()
+        with mock.patch("App.code_runner.executors.time.monotonic", clock):
+            backend = ListBackend(
+                "node", breaker=CircuitBreaker(failure_threshold=1, reset_timeout=30)
+            )
+            backend.breaker.record_failure()
+            clock.now += 30
+            registry = ExecutorRegistry([backend])
+
+            stream = registry.stream_batch(["a", "b", "c"], "python")
+            next(stream)
+            stream.close()  # As on the first wrong answer
+
+            self.assertEqual(backend.breaker.state, "closed")
+            self.assertFalse(backend.breaker.trial_running)
+            self.assertEqual(backend.in_flight, 0)
+            self.assertEqual(len(list(registry.stream_batch(["d"], "python"))), 1)
+
+
+class RunBatchAsyncTestCase(SimpleTestCase):
+    def test_fails_over_through_the_registry(self):
+        down, up = ListBackend("down", fail=True), ListBackend("up", weight=0.5)
+        registry = ExecutorRegistry([down, up])
+
+        records = asyncio.run(registry.run_batch_async(["a", "b"], "python"))
+
+        self.assertEqual([record["output"] for record in records], ["a", "b"])
+        self.assertEqual(down.breaker.failures, 1)
+        self.assertEqual(up.breaker.failures, 0)
+        self.assertEqual((down.in_flight, up.in_flight), (0, 0))
+
+    def test_backends_use_their_own_hosts(self):
+        judge0 = Judge0Backend("http://judge0.internal:2358", auth_token="secret")
+        local = LocalRunnerBackend("http://runner-2:8002/")
+
+        async def clients():
+            found = (
+                code_runner.get_async_client(judge0.client),
+                code_runner3.get_async_client(local.url),
+            )
+            await close_async_clients()
+            return found
+
+        judge0_client, runner_client = asyncio.run(clients())
+        self.assertEqual(str(judge0_client.base_url), "http://judge0.internal:2358")
+        self.assertEqual(judge0_client.headers["X-Auth-Token"], "secret")
+        self.assertEqual(str(runner_client.base_url), "http://runner-2:8002")
+
+
+class ProblemLimitsTestCase(SimpleTestCase):
+    """Problem limits stay within what Judge0 accepts"""
+
+    def test_largest_upload_limits_are_clamped_in_the_payload(self):
+        limits = scale_limits("python", 30, 1024)
+        [submission] = code_runner.build_batch_payload(
+            ["print(1)"], "python", limits=limits
+        )["submissions"]
+
+        self.assertEqual(submission["cpu_time_limit"], code_runner.MAX_CPU_TIME_LIMIT)
+        self.assertEqual(
+            submission["wall_time_limit"], code_runner.MAX_WALL_TIME_LIMIT
+        )
+        self.assertEqual(submission["memory_limit"], code_runner.MAX_MEMORY_LIMIT)
+
+    def test_limits_too_large_once_scaled_are_reported_per_language(self):
+        self.assertEqual(languages_over_limits(2, 128), [])
+        self.assertEqual(
+            languages_over_limits(5, 128), ["python", "java", "javascript"]
+        )
+        self.assertIn("cpp", languages_over_limits(30, 1024))
+
+
+class AsyncClientLifecycleTestCase(SimpleTestCase):
+    def test_runner_client_is_set_up_like_the_sync_one(self):
+        async def client():
+            async_client = code_runner3.get_async_client("unix:///tmp/runner.sock")
+            await close_async_clients()
+            return async_client
+
+        async_client = asyncio.run(client())
+        sync_client = code_runner3.RunnerClient("unix:///tmp/runner.sock")
+
+        self.assertEqual(async_client.base_url, sync_client.http.base_url)
+        pool = async_client._transport._pool
+        self.assertEqual(pool._uds, "/tmp/runner.sock")
+        self.assertEqual(pool._max_keepalive_connections, code_runner3.ASYNC_POOL_SIZE)
+        sync_client.close()
+
+    def test_clients_are_closed_and_replaced(self):
+        async def lifecycle():
+            first = code_runner3.get_async_client("http://runner:8002")
+            judge0 = code_runner.get_async_client()
+            await close_async_clients()
+            second = code_runner3.get_async_client("http://runner:8002")
+            await close_async_clients()
+            return first, judge0, second
+
+        first, judge0, second = asyncio.run(lifecycle())
+
+        self.assertTrue(first.is_closed)
+        self.assertTrue(judge0.is_closed)
+        self.assertIsNot(first, second)
+        self.assertTrue(second.is_closed)
+
+    def test_asgi_lifespan_shutdown_closes_the_clients(self):
+        from compiler import asgi
+
+        async def lifespan():
+            client = code_runner3.get_async_client("http://runner:8002")
+            messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+            sent = []
+
+            async def receive():
+                return messages.pop(0)
+
+            async def send(message):
+                sent.append(message["type"])
+
+            await asgi.application({"type": "lifespan"}, receive, send)
+            return client, sent
+
+        client, sent = asyncio.run(lifespan())
+
+        self.assertTrue(client.is_closed)
+        self.assertEqual(
+            sent, ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+        )
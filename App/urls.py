@@ -15,6 +15,11 @@ urlpatterns = [
         code_views.compile_code_monaco,
         name="compile_with_problem",
     ),  # Compiler with problem
+    path(
+        "problems/<slug:slug>/submit/stream/",
+        code_views.submit_stream,
+        name="submit-stream",
+    ),
     path(
         "problems/<slug:slug>/comment/",
         code_views.submit_comment,
@@ -6,6 +6,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
 from django.contrib.admin.views.decorators import staff_member_required
 
 # REST Framework imports
@@ -15,13 +16,22 @@ from App.serializers import ProblemSerializer
 # Core models and execution
 from App.models import Problem
 
-# from App.code_runner.code_runner3 import execute_code
-
-from App.code_runner.code_runner import execute_code
+from App.code_runner.executors import (
+    execute_code,
+    execute_code_batch,
+    languages_over_limits,
+    problem_limits,
+    problem_testdata,
+    run_programs,
+    stream_programs,
+)
+from App.code_runner import code_runner
+from App.code_runner.code_runner3 import VERDICT_MESSAGES
 from App.mongo import log_submission_attempt, get_comments_for_problem, save_comment
 
 # Standard library
-import json, re, textwrap, time
+import contextlib, json, re, textwrap, time
+from functools import lru_cache
 
 
 # ------------------------
@@ -221,7 +231,9 @@ def compile_code_basic(request):
         else:
             code_to_run = code
 
-        result = execute_code(code_to_run, language=language, input_data=custom_input)
+        result = execute_code(
+            code_to_run, language=language, input_data=custom_input, profile="run"
+        )
 
         return render(
             request,
@@ -310,6 +322,49 @@ def extract_c_function_name(code, fallback="solution"):
 # ------------------------
 # ✅ Utility: Generate Driver Code for Different Languages
 # ------------------------
+def cpp_args_literal(args):
+    """C++ source for a call's argument list"""
+    cpp_args = []
+    for arg in args:
+        if isinstance(arg, str):
+            cpp_args.append(f'"{arg}"')
+        elif isinstance(arg, list):
+            if all(isinstance(x, int) for x in arg):
+                cpp_args.append("{" + ", ".join(map(str, arg)) + "}")
+            else:
+                cpp_args.append('{"' + '", "'.join(map(str, arg)) + '"}')
+        else:
+            cpp_args.append(str(arg))
+    return ", ".join(cpp_args)
+
+
+def java_args_literal(args):
+    """Java source for a call's argument list"""
+    java_args = []
+    for arg in args:
+        if isinstance(arg, str):
+            java_args.append(f'"{arg}"')
+        elif isinstance(arg, list):
+            if all(isinstance(x, int) for x in arg):
+                java_args.append("new int[]{" + ", ".join(map(str, arg)) + "}")
+            else:
+                java_args.append('new String[]{"' + '", "'.join(map(str, arg)) + '"}')
+        else:
+            java_args.append(str(arg))
+    return ", ".join(java_args)
+
+
+def c_args_literal(args):
+    """C source for a call's argument list"""
+    c_args = []
+    for arg in args:
+        if isinstance(arg, str):
+            c_args.append(f'"{arg}"')
+        else:
+            c_args.append(str(arg))
+    return ", ".join(c_args)
+
+
 def generate_driver_code(language, func_name, args, slug):
     """Generate driver code for different programming languages"""
 
@@ -325,20 +380,7 @@ if __name__ == "__main__":
 """
 
     elif language == "cpp":
-        # Convert Python args to C++ format
-        cpp_args = []
-        for arg in args:
-            if isinstance(arg, str):
-                cpp_args.append(f'"{arg}"')
-            elif isinstance(arg, list):
-                if all(isinstance(x, int) for x in arg):
-                    cpp_args.append("{" + ", ".join(map(str, arg)) + "}")
-                else:
-                    cpp_args.append('{"' + '", "'.join(map(str, arg)) + '"}')
-            else:
-                cpp_args.append(str(arg))
-
-        args_str = ", ".join(cpp_args)
+        args_str = cpp_args_literal(args)
 
         return f"""
 #include <iostream>
@@ -359,22 +401,7 @@ int main() {{
 """
 
     elif language == "java":
-        # Convert Python args to Java format
-        java_args = []
-        for arg in args:
-            if isinstance(arg, str):
-                java_args.append(f'"{arg}"')
-            elif isinstance(arg, list):
-                if all(isinstance(x, int) for x in arg):
-                    java_args.append("new int[]{" + ", ".join(map(str, arg)) + "}")
-                else:
-                    java_args.append(
-                        'new String[]{"' + '", "'.join(map(str, arg)) + '"}'
-                    )
-            else:
-                java_args.append(str(arg))
-
-        args_str = ", ".join(java_args)
+        args_str = java_args_literal(args)
 
         # Simple Java driver code that appends main method inside the user's class
         return f"""
@@ -387,15 +414,7 @@ int main() {{
 }}"""
 
     elif language == "c":
-        # Convert Python args to C format
-        c_args = []
-        for arg in args:
-            if isinstance(arg, str):
-                c_args.append(f'"{arg}"')
-            else:
-                c_args.append(str(arg))
-
-        args_str = ", ".join(c_args)
+        args_str = c_args_literal(args)
 
         return f"""
 #include <stdio.h>
@@ -414,6 +433,664 @@ int main() {{
         return ""
 
 
+# Prefix of the per-case result lines printed by multi-case drivers:
+# "@@case <index> <ok|error> <microseconds> <result>"
+CASE_MARKER = "@@case"
+
+# CPU time cap for a whole multi-case program, the most Judge0 accepts along
+# with its wall-clock limit (time * 2 + 1); cases it does not reach are run
+# one program each
+MULTI_CASE_MAX_SECONDS = min(
+    code_runner.MAX_CPU_TIME_LIMIT, (code_runner.MAX_WALL_TIME_LIMIT - 1) / 2
+)
+
+
+def generate_multi_case_driver(language, func_name, cases, slug):
+    """
+    Generate one driver that calls the function once per entry of `cases`
+    (argument lists), timing each call and catching its exceptions, and
+    prints one CASE_MARKER line per case with the result formatted like the
+    single-case driver would print it.
+    """
+
+    if language == "python":
+        return f"""
+import json as _json, time as _time
+if __name__ == "__main__":
+    for _index, _args in enumerate(_json.loads({json.dumps(json.dumps(cases))})):
+        _start = _time.perf_counter()
+        try:
+            _status, _text = "ok", _json.dumps({func_name}(*_args))
+        except Exception as e:
+            _status, _text = "error", f"{{type(e).__name__}}: {{e}}"
+        _micros = int((_time.perf_counter() - _start) * 1000000)
+        print(f"\\n{CASE_MARKER} {{_index}} {{_status}} {{_micros}} {{_text}}", flush=True)
+"""
+
+    elif language == "cpp":
+        calls = "".join(
+            f"""
+    {{
+        auto start = chrono::steady_clock::now();
+        try {{
+            auto result = {func_name}({cpp_args_literal(args)});
+            cout << "\\n{CASE_MARKER} {index} ok " << elapsed(start) << " " << result << endl;
+        }} catch (const exception& e) {{
+            cout << "\\n{CASE_MARKER} {index} error " << elapsed(start) << " " << e.what() << endl;
+        }}
+    }}"""
+            for index, args in enumerate(cases)
+        )
+
+        return f"""
+#include <iostream>
+#include <vector>
+#include <string>
+#include <sstream>
+#include <chrono>
+using namespace std;
+
+static long long elapsed(chrono::steady_clock::time_point start) {{
+    return chrono::duration_cast<chrono::microseconds>(
+        chrono::steady_clock::now() - start).count();
+}}
+
+int main() {{{calls}
+    return 0;
+}}
+"""
+
+    elif language == "java":
+        calls = "".join(
+            f"""
+        {{
+            long start = System.nanoTime();
+            String status = "ok";
+            Object result;
+            try {{
+                result = solution.{func_name}({java_args_literal(args)});
+            }} catch (Throwable e) {{
+                status = "error";
+                result = e;
+            }}
+            System.out.println();
+            System.out.println("{CASE_MARKER} {index} " + status + " "
+                + (System.nanoTime() - start) / 1000 + " " + result);
+            System.out.flush();
+        }}"""
+            for index, args in enumerate(cases)
+        )
+
+        return f"""
+
+    public static void main(String[] args) {{
+        Main solution = new Main();{calls}
+    }}
+}}"""
+
+    elif language == "c":
+        calls = "".join(
+            f"""
+    {{
+        struct timespec start, end;
+        clock_gettime(CLOCK_MONOTONIC, &start);
+        char* result = {func_name}({c_args_literal(args)});
+        clock_gettime(CLOCK_MONOTONIC, &end);
+        printf("\\n{CASE_MARKER} {index} ok %lld %s\\n", micros_between(start, end), result);
+        fflush(stdout);
+    }}"""
+            for index, args in enumerate(cases)
+        )
+
+        return f"""
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+
+static long long micros_between(struct timespec start, struct timespec end) {{
+    return (end.tv_sec - start.tv_sec) * 1000000LL + (end.tv_nsec - start.tv_nsec) / 1000;
+}}
+
+int main() {{{calls}
+    return 0;
+}}
+"""
+
+    else:
+        print(f"[WARNING] Unsupported language for driver code generation: {language}")
+        return ""
+
+
+def parse_case_records(result_output):
+    """
+    Read the CASE_MARKER lines of a multi-case driver's output into
+    {index: (status, seconds, result text)}. Cases that printed no line
+    (the program died first) are missing.
+    """
+    records = {}
+    for line in result_output.splitlines():
+        if not line.startswith(CASE_MARKER + " "):
+            continue
+        parts = line[len(CASE_MARKER) + 1 :].split(" ", 3)
+        if len(parts) < 3:
+            continue
+        try:
+            index, micros = int(parts[0]), int(parts[2])
+        except ValueError:
+            continue
+        text = parts[3] if len(parts) > 3 else ""
+        records[index] = (parts[1], micros / 1000000, text)
+    return records
+
+
+# ------------------------
+# ✅ Utility: Stdin Harnesses From Function Signatures
+# ------------------------
+# A harness is a driver that reads the arguments from stdin instead of
+# embedding them, so one program (and one compiled binary) serves every test
+# case of a problem. Its stdin starts with a "<cases> <marked>" line followed
+# by each case's arguments: a JSON array per line for Python; for the other
+# languages a line per number or string, and per array a line with its length
+# then a line of space-separated numbers (or a line per string). With marked 1
+# it prints a CASE_MARKER record per case like the multi-case drivers, with 0
+# the result alone like the single-case drivers.
+
+# Parameter types harnesses can read, as "int", "long", "double", "bool",
+# "string" or an array of one of those; C arrays take a length parameter next
+HARNESS_TYPES = {
+    "cpp": {
+        "int": "int",
+        "long": "long",
+        "long long": "long",
+        "double": "double",
+        "bool": "bool",
+        "string": "string",
+        "vector<int>": "int[]",
+        "vector<long>": "long[]",
+        "vector<long long>": "long[]",
+        "vector<double>": "double[]",
+        "vector<string>": "string[]",
+    },
+    "java": {
+        "int": "int",
+        "long": "long",
+        "double": "double",
+        "boolean": "bool",
+        "String": "string",
+        "int[]": "int[]",
+        "long[]": "long[]",
+        "double[]": "double[]",
+        "String[]": "string[]",
+    },
+    "c": {
+        "int": "int",
+        "long": "long",
+        "long long": "long",
+        "double": "double",
+        "bool": "bool",
+        "char*": "string",
+        "int*": "int[]",
+        "long long*": "long[]",
+        "double*": "double[]",
+        "char**": "string[]",
+    },
+}
+
+# printf format and argument for each C return type
+C_RESULT_FORMATS = {
+    "char*": ("%s", "result"),
+    "int": ("%d", "result"),
+    "long": ("%ld", "result"),
+    "long long": ("%lld", "result"),
+    "double": ("%.15g", "result"),
+    "bool": ("%s", 'result ? "true" : "false"'),
+}
+
+CPP_HARNESS_READERS = """
+#include <iostream>
+#include <vector>
+#include <string>
+#include <sstream>
+#include <chrono>
+#include <limits>
+using namespace std;
+
+inline void harness_skip_line() {
+    cin.ignore(numeric_limits<streamsize>::max(), '\\n');
+}
+
+inline string harness_string() {
+    string line;
+    getline(cin, line);
+    if (!line.empty() && line.back() == '\\r') line.pop_back();
+    return line;
+}
+
+template <typename T> T harness_value() {
+    T value{};
+    cin >> value;
+    harness_skip_line();
+    return value;
+}
+
+template <typename T> vector<T> harness_array() {
+    size_t size = harness_value<size_t>();
+    vector<T> values(size);
+    for (auto& value : values) cin >> value;
+    harness_skip_line();
+    return values;
+}
+
+inline vector<string> harness_strings() {
+    size_t size = harness_value<size_t>();
+    vector<string> values(size);
+    for (auto& value : values) value = harness_string();
+    return values;
+}
+
+inline long long harness_elapsed(chrono::steady_clock::time_point start) {
+    return chrono::duration_cast<chrono::microseconds>(
+        chrono::steady_clock::now() - start).count();
+}
+"""
+
+JAVA_HARNESS_READERS = """
+    private static java.io.BufferedReader harnessIn;
+
+    private static String harnessLine() throws java.io.IOException {
+        String line = harnessIn.readLine();
+        return line == null ? "" : line;
+    }
+
+    private static String[] harnessTokens(int size) throws java.io.IOException {
+        String line = harnessLine();
+        String[] tokens = line.isEmpty() ? new String[0] : line.trim().split(" +");
+        return java.util.Arrays.copyOf(tokens, size);
+    }
+
+    private static int[] harnessInts() throws java.io.IOException {
+        String[] tokens = harnessTokens(Integer.parseInt(harnessLine().trim()));
+        int[] values = new int[tokens.length];
+        for (int i = 0; i < values.length; i++) values[i] = Integer.parseInt(tokens[i]);
+        return values;
+    }
+
+    private static long[] harnessLongs() throws java.io.IOException {
+        String[] tokens = harnessTokens(Integer.parseInt(harnessLine().trim()));
+        long[] values = new long[tokens.length];
+        for (int i = 0; i < values.length; i++) values[i] = Long.parseLong(tokens[i]);
+        return values;
+    }
+
+    private static double[] harnessDoubles() throws java.io.IOException {
+        String[] tokens = harnessTokens(Integer.parseInt(harnessLine().trim()));
+        double[] values = new double[tokens.length];
+        for (int i = 0; i < values.length; i++) values[i] = Double.parseDouble(tokens[i]);
+        return values;
+    }
+
+    private static String[] harnessStrings() throws java.io.IOException {
+        String[] values = new String[Integer.parseInt(harnessLine().trim())];
+        for (int i = 0; i < values.length; i++) values[i] = harnessLine();
+        return values;
+    }
+"""
+
+C_HARNESS_READERS = """
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <stdbool.h>
+#include <time.h>
+
+static inline void harness_skip_line(void) {
+    int c;
+    while ((c = getchar()) != EOF && c != '\\n');
+}
+
+static inline char* harness_string(void) {
+    size_t size = 64, length = 0;
+    char* line = malloc(size);
+    int c;
+    while ((c = getchar()) != EOF && c != '\\n') {
+        if (length + 1 == size) line = realloc(line, size *= 2);
+        line[length++] = (char)c;
+    }
+    if (length > 0 && line[length - 1] == '\\r') length--;
+    line[length] = '\\0';
+    return line;
+}
+
+static inline int harness_int(void) {
+    int value = 0;
+    if (scanf("%d", &value) != 1) value = 0;
+    harness_skip_line();
+    return value;
+}
+
+static inline long long harness_long(void) {
+    long long value = 0;
+    if (scanf("%lld", &value) != 1) value = 0;
+    harness_skip_line();
+    return value;
+}
+
+static inline double harness_double(void) {
+    double value = 0;
+    if (scanf("%lf", &value) != 1) value = 0;
+    harness_skip_line();
+    return value;
+}
+
+static inline bool harness_bool(void) {
+    char* line = harness_string();
+    bool value = strcmp(line, "true") == 0;
+    free(line);
+    return value;
+}
+
+#define HARNESS_ARRAY(name, type, format)                              \\
+    static inline type* name(int* size) {                             \\
+        *size = harness_int();                                         \\
+        type* values = malloc(sizeof(type) * (*size > 0 ? *size : 1)); \\
+        for (int i = 0; i < *size; i++)                                \\
+            if (scanf(format, &values[i]) != 1) values[i] = 0;         \\
+        harness_skip_line();                                           \\
+        return values;                                                 \\
+    }
+HARNESS_ARRAY(harness_ints, int, "%d")
+HARNESS_ARRAY(harness_longs, long long, "%lld")
+HARNESS_ARRAY(harness_doubles, double, "%lf")
+
+static inline char** harness_strings(int* size) {
+    *size = harness_int();
+    char** values = malloc(sizeof(char*) * (*size > 0 ? *size : 1));
+    for (int i = 0; i < *size; i++) values[i] = harness_string();
+    return values;
+}
+
+static inline long long harness_micros(struct timespec start, struct timespec end) {
+    return (end.tv_sec - start.tv_sec) * 1000000LL + (end.tv_nsec - start.tv_nsec) / 1000;
+}
+"""
+
+CPP_READERS = {"string": "harness_string()", "string[]": "harness_strings()"}
+JAVA_READERS = {
+    "int": "Integer.parseInt(harnessLine().trim())",
+    "long": "Long.parseLong(harnessLine().trim())",
+    "double": "Double.parseDouble(harnessLine().trim())",
+    "bool": "Boolean.parseBoolean(harnessLine().trim())",
+    "string": "harnessLine()",
+    "int[]": "harnessInts()",
+    "long[]": "harnessLongs()",
+    "double[]": "harnessDoubles()",
+    "string[]": "harnessStrings()",
+}
+C_READERS = {
+    "int": "harness_int()",
+    "long": "harness_long()",
+    "double": "harness_double()",
+    "bool": "harness_bool()",
+    "string": "harness_string()",
+    "int[]": "harness_ints",
+    "long[]": "harness_longs",
+    "double[]": "harness_doubles",
+    "string[]": "harness_strings",
+}
+
+
+def normalize_type(text):
+    """A C, C++ or Java type as written in HARNESS_TYPES"""
+    text = re.sub(r"\b(const|final|std::)\s*|&", "", text)
+    text = re.sub(r"\s*([<>*\[\],])\s*", r"\1", text.strip())
+    return re.sub(r"\s+", " ", text)
+
+
+@lru_cache(maxsize=256)
+def parse_signature(language, signature):
+    """
+    (return type, parameters) of a function signature such as
+    "int findMissingNumber(vector<int>& nums)", each parameter a
+    (kind, type) pair with the HARNESS_TYPES kind and the type as written.
+    None if the signature is missing or uses a type harnesses cannot read
+    (or, in C, print).
+    """
+    types = HARNESS_TYPES.get(language)
+    match = re.match(r"\s*(.*?)\b\w+\s*\((.*)\)", signature or "")
+    if types is None or match is None:
+        return None
+    return_type = normalize_type(
+        re.sub(r"\b(public|private|protected|static|inline)\b", "", match.group(1))
+    )
+    if language == "c" and return_type not in C_RESULT_FORMATS:
+        return None
+
+    params = []
+    declarations = [p for p in match.group(2).split(",") if p.strip()]
+    for declaration in declarations:
+        parts = re.match(r"(.*?)(\w+)$", declaration.strip())
+        param_type = normalize_type(parts.group(1)) if parts else ""
+        params.append((types.get(param_type), param_type))
+
+    harness_params = []
+    while params:
+        kind, param_type = params.pop(0)
+        if kind is None:
+            return None
+        if language == "c" and kind.endswith("[]"):
+            # The array's length comes next
+            if not params or params.pop(0)[0] != "int":
+                return None
+        harness_params.append((kind, param_type))
+    return return_type, tuple(harness_params)
+
+
+def harness_lines(kind, value):
+    """stdin lines of one argument; raises ValueError if it is not a `kind`"""
+    if kind.endswith("[]"):
+        if not isinstance(value, list):
+            raise ValueError(f"Expected an array, got {value!r}")
+        element = kind[:-2]
+        values = [harness_lines(element, item)[0] for item in value]
+        if element == "string":
+            return [str(len(values)), *values]
+        return [str(len(values)), " ".join(values)]
+
+    if kind == "string":
+        if not isinstance(value, str) or "\n" in value or "\r" in value:
+            raise ValueError(f"Expected a single-line string, got {value!r}")
+        return [value]
+    if kind == "bool":
+        if not isinstance(value, bool):
+            raise ValueError(f"Expected a boolean, got {value!r}")
+        return ["true" if value else "false"]
+    number_types = (int, float) if kind == "double" else int
+    if isinstance(value, bool) or not isinstance(value, number_types):
+        raise ValueError(f"Expected a {kind}, got {value!r}")
+    return [repr(value)]
+
+
+def harness_input(language, signature, args_list, marked):
+    """
+    stdin for running the harness on every case of `args_list`, or None if
+    there is no harness for the signature or an argument does not fit it.
+    """
+    lines = [f"{len(args_list)} {int(marked)}"]
+    if language == "python":
+        lines += [json.dumps(args) for args in args_list]
+        return "\n".join(lines) + "\n"
+
+    parsed = parse_signature(language, signature)
+    if parsed is None:
+        return None
+    _, params = parsed
+    for args in args_list:
+        if len(args) != len(params):
+            return None
+        try:
+            for (kind, _), value in zip(params, args):
+                lines += harness_lines(kind, value)
+        except ValueError:
+            return None
+    return "\n".join(lines) + "\n"
+
+
+@lru_cache(maxsize=256)
+def generate_harness(language, func_name, signature):
+    """
+    Generate the harness for a function with the given signature, or None if
+    the signature uses types it cannot read. Python's reads JSON, so it needs
+    no signature.
+    """
+    if language == "python":
+        return f"""
+import json as _json, sys as _sys, time as _time
+if __name__ == "__main__":
+    _lines = _sys.stdin.buffer.read().split(b"\\n")
+    _cases, _marked = map(int, _lines[0].split())
+    for _index in range(_cases):
+        _args = _json.loads(_lines[_index + 1])
+        _start = _time.perf_counter()
+        try:
+            _status, _result = "ok", {func_name}(*_args)
+        except Exception as e:
+            _status, _result = "error", e
+        _micros = int((_time.perf_counter() - _start) * 1000000)
+        if not _marked:
+            print(_json.dumps(_result if _status == "ok" else str(_result)))
+        elif _status == "ok":
+            print(f"\\n{CASE_MARKER} {{_index}} ok {{_micros}} {{_json.dumps(_result)}}", flush=True)
+        else:
+            print(f"\\n{CASE_MARKER} {{_index}} error {{_micros}} {{type(_result).__name__}}: {{_result}}", flush=True)
+"""
+
+    parsed = parse_signature(language, signature)
+    if parsed is None:
+        return None
+    return_type, params = parsed
+    names = [f"arg{i}" for i in range(len(params))]
+
+    if language == "cpp":
+        reads = "".join(
+            f"\n        auto {name} = "
+            + CPP_READERS.get(
+                kind,
+                f"harness_array<{param_type[7:-1]}>()"
+                if kind.endswith("[]")
+                else f"harness_value<{param_type}>()",
+            )
+            + ";"
+            for name, (kind, param_type) in zip(names, params)
+        )
+        return (
+            CPP_HARNESS_READERS
+            + f"""
+int main() {{
+    ios::sync_with_stdio(false);
+    cin.tie(nullptr);
+    cin >> boolalpha;
+    int cases = 0, marked = 0;
+    cin >> cases >> marked;
+    harness_skip_line();
+    for (int index = 0; index < cases; index++) {{{reads}
+        auto start = chrono::steady_clock::now();
+        try {{
+            auto result = {func_name}({", ".join(names)});
+            if (marked)
+                cout << "\\n{CASE_MARKER} " << index << " ok " << harness_elapsed(start) << " " << result << endl;
+            else
+                cout << result << endl;
+        }} catch (const exception& e) {{
+            if (marked)
+                cout << "\\n{CASE_MARKER} " << index << " error " << harness_elapsed(start) << " " << e.what() << endl;
+            else
+                cout << "Error: " << e.what() << endl;
+        }}
+    }}
+    return 0;
+}}
+"""
+        )
+
+    elif language == "java":
+        reads = "".join(
+            f"\n            {param_type} {name} = {JAVA_READERS[kind]};"
+            for name, (kind, param_type) in zip(names, params)
+        )
+        return (
+            JAVA_HARNESS_READERS
+            + f"""
+    public static void main(String[] args) throws Throwable {{
+        harnessIn = new java.io.BufferedReader(new java.io.InputStreamReader(System.in), 1 << 16);
+        String[] header = harnessLine().trim().split(" +");
+        int cases = Integer.parseInt(header[0]);
+        boolean marked = header[1].equals("1");
+        Main solution = new Main();
+        for (int index = 0; index < cases; index++) {{{reads}
+            long start = System.nanoTime();
+            String status = "ok";
+            Object result;
+            try {{
+                result = solution.{func_name}({", ".join(names)});
+            }} catch (Throwable e) {{
+                if (!marked) throw e;
+                status = "error";
+                result = e;
+            }}
+            if (marked) {{
+                System.out.println();
+                System.out.println("{CASE_MARKER} " + index + " " + status + " "
+                    + (System.nanoTime() - start) / 1000 + " " + result);
+                System.out.flush();
+            }} else {{
+                System.out.println(result);
+            }}
+        }}
+    }}
+}}"""
+        )
+
+    elif language == "c":
+        result_format, result_value = C_RESULT_FORMATS[return_type]
+        reads, call_args = "", []
+        for name, (kind, param_type) in zip(names, params):
+            if kind.endswith("[]"):
+                reads += (
+                    f"\n        int {name}_size = 0;"
+                    f"\n        {param_type} {name} = {C_READERS[kind]}(&{name}_size);"
+                )
+                call_args += [name, f"{name}_size"]
+            else:
+                reads += f"\n        {param_type} {name} = {C_READERS[kind]};"
+                call_args.append(name)
+        return (
+            C_HARNESS_READERS
+            + f"""
+int main(void) {{
+    int cases = 0, marked = 0;
+    if (scanf("%d %d", &cases, &marked) != 2) return 1;
+    harness_skip_line();
+    for (int index = 0; index < cases; index++) {{{reads}
+        struct timespec start, end;
+        clock_gettime(CLOCK_MONOTONIC, &start);
+        {return_type} result = {func_name}({", ".join(call_args)});
+        clock_gettime(CLOCK_MONOTONIC, &end);
+        if (marked) {{
+            printf("\\n{CASE_MARKER} %d ok %lld {result_format}\\n", index, harness_micros(start, end), {result_value});
+            fflush(stdout);
+        }} else {{
+            printf("{result_format}\\n", {result_value});
+        }}
+    }}
+    return 0;
+}}
+"""
+        )
+
+    return None
+
+
 # ------------------------
 # ✅ Utility: Get Function Name Based on Language
 # ------------------------
@@ -432,7 +1109,165 @@ def get_function_name(starter_code, language, fallback):
 
 
 # ------------------------
-# ✅ Run Examples (per-case driver)
+# ✅ Utility: Assemble and Parse Per-Case Programs
+# ------------------------
+def build_program(code, driver_code, language):
+    """Combine the user's code with the generated driver into one program"""
+    if language == "java":
+        # For Java, ensure class name is "Main" (required by Docker container)
+        java_code = code.strip()
+        # Replace "class Solution" with "class Main" if present
+        java_code = re.sub(r"\bclass\s+Solution\b", "class Main", java_code)
+
+        # Remove the last closing brace from user code and append driver code + closing brace
+        user_code_without_last_brace = java_code.rstrip("}").rstrip()
+        return user_code_without_last_brace + "\n" + textwrap.dedent(driver_code)
+
+    return code.strip() + "\n\n" + textwrap.dedent(driver_code)
+
+
+def parse_program_output(result_output, language):
+    """Read the driver's result from the last line of the program output"""
+    try:
+        output_lines = result_output.strip().splitlines()
+        if not output_lines:
+            return "No output"
+
+        output_line = output_lines[-1]
+
+        # Parse output based on language
+        if language == "python" or language == "c":
+            try:
+                return json.loads(output_line)
+            except json.JSONDecodeError:
+                return output_line
+
+        # For C++ and Java, the output is usually direct
+        output_val = output_line
+
+        # Try to convert to appropriate type if it's a number
+        try:
+            if "." in output_val:
+                output_val = float(output_val)
+            else:
+                output_val = int(output_val)
+        except (ValueError, TypeError):
+            # Keep as string if can't convert
+            pass
+        return output_val
+
+    except Exception as e:
+        print(f"[ERROR] Parsing output for {language}: {e}")
+        return "Error parsing output"
+
+
+def case_harness(language, func_name, signature, args_list):
+    """
+    (harness code, stdin with every case, [stdin with each case alone]) for
+    running `args_list` through the harness for `signature`, or None if there
+    is none or any case does not fit it. Decided once per run: without a
+    harness, every program of the run uses the literal drivers.
+    """
+    harness = generate_harness(language, func_name, signature)
+    if harness is None or not args_list:
+        return None
+    all_cases = harness_input(language, signature, args_list, marked=True)
+    case_inputs = [
+        harness_input(language, signature, [args], marked=False) for args in args_list
+    ]
+    if all_cases is None or None in case_inputs:
+        return None
+    return harness, all_cases, case_inputs
+
+
+def case_programs(code, language, func_name, args_list, slug, harness=None):
+    """
+    One program per case: with `harness` (see case_harness), the harness,
+    the same program for every case, which reads the case from stdin;
+    otherwise the single-case driver with the case embedded.
+    """
+    if harness is not None:
+        harness_code, _, _ = harness
+        return [build_program(code, harness_code, language)] * len(args_list)
+    return [
+        build_program(
+            code, generate_driver_code(language, func_name, args, slug), language
+        )
+        for args in args_list
+    ]
+
+
+def run_cases(
+    code,
+    language,
+    func_name,
+    args_list,
+    slug,
+    limits,
+    profile,
+    harness=None,
+    testdata=None,
+):
+    """
+    Run every case in one program: with `harness` (see case_harness), the
+    harness with all the cases on its stdin, otherwise the multi-case driver
+    with them embedded. Returns {index: record} for the cases that reported
+    a result, records shaped like run_programs' with "output" holding the
+    case's printed result (or its error) and the "TLE" verdict when its call
+    took longer than the per-case time limit. With `testdata`, whose input 0
+    is the harness's stdin, that stdin is read from the runner's cache.
+    """
+    if not args_list:
+        return {}
+    if harness is not None:
+        driver_code, stdin, _ = harness
+    else:
+        driver_code = generate_multi_case_driver(language, func_name, args_list, slug)
+        stdin = None
+    program = build_program(code, driver_code, language)
+    program_limits = {
+        **limits,
+        "time": min(limits["time"] * len(args_list), MULTI_CASE_MAX_SECONDS),
+    }
+    if harness is not None and testdata is not None:
+        [(_, record)] = stream_programs(
+            [program],
+            language=language,
+            inputs=[0],
+            limits=program_limits,
+            profile=profile,
+            testdata=testdata,
+        )
+    else:
+        [record] = run_programs(
+            [program],
+            language=language,
+            inputs=[stdin or ""],
+            limits=program_limits,
+            profile=profile,
+        )
+    records = {}
+    case_records = parse_case_records(record["output"])
+    for index, (status, seconds, text) in case_records.items():
+        if index >= len(args_list):
+            continue
+        verdict = "TLE" if seconds > limits["time"] else None
+        if verdict:
+            text = VERDICT_MESSAGES[verdict]
+        elif status != "ok":
+            text = f"Error:\n{text}"
+        records[index] = {
+            "output": text,
+            "time": seconds,
+            "memory": record["memory"],
+            "verdict": verdict,
+            "passed": None,
+        }
+    return records
+
+
+# ------------------------
+# ✅ Run Examples (multi-case driver)
 # ------------------------
 def run_examples(problem, code, language):
     print(f"🔄 run_examples called for language: {language}")
@@ -452,10 +1287,23 @@ def run_examples(problem, code, language):
 
     print(f"📝 Using function name: {func_name} for language: {language}")
 
-    results = []
-    for i, (input_val, expected_output) in enumerate(
-        zip(inputs, expected_outputs), start=1
-    ):
+    if language not in language_map:
+        print(f"[ERROR] Unsupported language: {language}")
+        return [
+            {
+                "input": input_val,
+                "expected": expected_output,
+                "output": f"Unsupported language: {language}",
+                "passed": False,
+                "case_number": i,
+            }
+            for i, (input_val, expected_output) in enumerate(
+                zip(inputs, expected_outputs), start=1
+            )
+        ]
+
+    args_list = []
+    for i, input_val in enumerate(inputs[: len(expected_outputs)], start=1):
         try:
             input_dict = (
                 json.loads(input_val) if isinstance(input_val, str) else input_val
@@ -464,75 +1312,41 @@ def run_examples(problem, code, language):
         except Exception as e:
             print(f"[ERROR] run_examples({i}): {e}")
             args = []
+        args_list.append(args)
+
+    # All examples run in one program; any it did not get to (it crashed or
+    # was killed) are run again one program each
+    limits = problem_limits(problem, language)
+    signature = (problem.function_signature or {}).get(language)
+    harness = case_harness(language, func_name, signature, args_list)
+    case_records = run_cases(
+        code, language, func_name, args_list, problem.slug, limits, "run", harness
+    )
+    missing = [i for i in range(len(args_list)) if i not in case_records]
+    outputs = [None] * len(args_list)
+    for index, record in case_records.items():
+        outputs[index] = record["output"]
+    if missing:
+        programs = case_programs(
+            code,
+            language,
+            func_name,
+            [args_list[i] for i in missing],
+            problem.slug,
+            harness,
+        )
+        stdins = [harness[2][i] for i in missing] if harness else None
+        batch = execute_code_batch(
+            programs, language=language, inputs=stdins, limits=limits, profile="run"
+        )
+        for index, output in zip(missing, batch):
+            outputs[index] = output
 
-        # Generate driver code based on language
-        driver_code = generate_driver_code(language, func_name, args, problem.slug)
-
-        if not driver_code:
-            print(f"[ERROR] Unsupported language: {language}")
-            results.append(
-                {
-                    "input": input_val,
-                    "expected": expected_output,
-                    "output": f"Unsupported language: {language}",
-                    "passed": False,
-                    "case_number": i,
-                }
-            )
-            continue
-
-        print(f"🚀 Generated driver code for {language}:")
-        print(f"{'='*50}")
-        print(driver_code[:200] + "..." if len(driver_code) > 200 else driver_code)
-        print(f"{'='*50}")
-
-        if language == "java":
-            # For Java, ensure class name is "Main" (required by Docker container)
-            java_code = code.strip()
-            # Replace "class Solution" with "class Main" if present
-            java_code = re.sub(r"\bclass\s+Solution\b", "class Main", java_code)
-
-            # Remove the last closing brace from user code and append driver code + closing brace
-            user_code_without_last_brace = java_code.rstrip("}").rstrip()
-            final_code = (
-                user_code_without_last_brace + "\n" + textwrap.dedent(driver_code)
-            )
-        else:
-            final_code = code.strip() + "\n\n" + textwrap.dedent(driver_code)
-
-        result_output = execute_code(final_code, language=language, input_data="")
-
-        try:
-            output_lines = result_output.strip().splitlines()
-            if not output_lines:
-                output_val = "No output"
-            else:
-                output_line = output_lines[-1]
-
-                # Parse output based on language
-                if language == "python" or language == "c":
-                    try:
-                        output_val = json.loads(output_line)
-                    except json.JSONDecodeError:
-                        output_val = output_line
-                else:
-                    # For C++ and Java, the output is usually direct
-                    output_val = output_line
-
-                    # Try to convert to appropriate type if it's a number
-                    try:
-                        if "." in output_val:
-                            output_val = float(output_val)
-                        else:
-                            output_val = int(output_val)
-                    except (ValueError, TypeError):
-                        # Keep as string if can't convert
-                        pass
-
-        except Exception as e:
-            print(f"[ERROR] Parsing output for {language}: {e}")
-            output_val = "Error parsing output"
-
+    results = []
+    for i, (input_val, expected_output, result_output) in enumerate(
+        zip(inputs, expected_outputs, outputs), start=1
+    ):
+        output_val = parse_program_output(result_output, language)
         results.append(
             {
                 "input": input_val,
@@ -552,6 +1366,30 @@ def run_examples(problem, code, language):
 def submit_test_cases(problem, code, language, user_id=None):
     print("submit_test_cases called__________________________________")
     test_cases_group = getattr(problem, "testcase_group", None)
+    total_cases = len(test_cases_group.test_cases) if test_cases_group else 0
+    results = list(iter_test_cases(problem, code, language, user_id))
+    passed_cases = sum(1 for result in results if result["passed"])
+    return results, passed_cases, total_cases
+
+
+def in_case_order(stream):
+    """Records of an (index, record) stream, in index order."""
+    pending, next_index = {}, 0
+    for index, record in stream:
+        pending[index] = record
+        while next_index in pending:
+            yield pending.pop(next_index)
+            next_index += 1
+
+
+def iter_test_cases(problem, code, language, user_id=None):
+    """
+    Judge `code` against the problem's test cases, yielding each case's
+    result as soon as the runner reports it, in case order, and stopping at
+    the first failure (the cases not yet run are cancelled). The attempt is
+    logged once judging finishes.
+    """
+    test_cases_group = getattr(problem, "testcase_group", None)
     test_cases = test_cases_group.test_cases if test_cases_group else []
 
     inputs = [tc.get("input_data") for tc in test_cases]
@@ -565,11 +1403,20 @@ def submit_test_cases(problem, code, language, user_id=None):
         starter_code, language, fallback=problem.slug.replace("-", "_")
     )
 
-    results, times, passed_cases = [], [], 0
+    if language not in language_map:
+        print(f"[ERROR] Unsupported language: {language}")
+        if test_cases:
+            yield {
+                "input": inputs[0],
+                "expected": expected_outputs[0],
+                "output": f"Unsupported language: {language}",
+                "passed": False,
+                "case_number": 1,
+            }
+        return
 
-    for i, (input_val, expected_output) in enumerate(
-        zip(inputs, expected_outputs), start=1
-    ):
+    args_list = []
+    for input_val in inputs:
         try:
             input_dict = (
                 json.loads(input_val) if isinstance(input_val, str) else input_val
@@ -577,95 +1424,108 @@ def submit_test_cases(problem, code, language, user_id=None):
             args = [input_dict[key] for key in sorted(input_dict.keys(), key=int)]
         except Exception as e:
             args = []
+        args_list.append(args)
 
-        # Generate driver code based on language
-        driver_code = generate_driver_code(language, func_name, args, problem.slug)
-
-        if not driver_code:
-            print(f"[ERROR] Unsupported language: {language}")
-            results.append(
-                {
-                    "input": input_val,
-                    "expected": expected_output,
-                    "output": f"Unsupported language: {language}",
-                    "passed": False,
-                    "case_number": i,
-                }
-            )
-            break
-
-        if language == "java":
-            # For Java, ensure class name is "Main" (required by Docker container)
-            java_code = code.strip()
-            # Replace "class Solution" with "class Main" if present
-            java_code = re.sub(r"\bclass\s+Solution\b", "class Main", java_code)
-
-            # Remove the last closing brace from user code and append driver code + closing brace
-            user_code_without_last_brace = java_code.rstrip("}").rstrip()
-            final_code = (
-                user_code_without_last_brace + "\n" + textwrap.dedent(driver_code)
-            )
-        else:
-            final_code = code.strip() + "\n\n" + textwrap.dedent(driver_code)
-
-        start_time = time.time()
-        result_output = execute_code(final_code, language=language, input_data="")
-        time_taken = round(time.time() - start_time, 4)
-        times.append(time_taken)
-
-        try:
-            output_lines = result_output.strip().splitlines()
-            if not output_lines:
-                output_val = "No output"
-            else:
-                output_line = output_lines[-1]
-
-                # Parse output based on language
-                if language == "python" or language == "c":
-                    try:
-                        output_val = json.loads(output_line)
-                    except json.JSONDecodeError:
-                        output_val = output_line
-                else:
-                    # For C++ and Java, the output is usually direct
-                    output_val = output_line
-
-                    # Try to convert to appropriate type if it's a number
-                    try:
-                        if "." in output_val:
-                            output_val = float(output_val)
-                        else:
-                            output_val = int(output_val)
-                    except (ValueError, TypeError):
-                        # Keep as string if can't convert
-                        pass
+    expected_values = [
+        expected.strip() if isinstance(expected, str) else expected
+        for expected in expected_outputs
+    ]
 
-        except Exception as e:
-            print(f"[ERROR] Parsing output for {language}: {e}")
-            output_val = "Error parsing output"
-
-        output_str = output_val.strip() if isinstance(output_val, str) else output_val
-        expected_str = (
-            expected_output.strip()
-            if isinstance(expected_output, str)
-            else expected_output
+    # Harnesses read the cases from stdin (input 0 holds all of them, input
+    # i + 1 case i's), which local runners cache per version of the test
+    # cases so it is only sent when they change. Literal drivers embed their
+    # arguments and read no stdin, so they have no test data
+    signature = (problem.function_signature or {}).get(language)
+    harness = case_harness(language, func_name, signature, args_list)
+    testdata = None
+    if harness is not None:
+        _, all_cases, case_inputs = harness
+        testdata = problem_testdata(problem, [all_cases, *case_inputs], language)
+
+    limits = problem_limits(problem, language)
+
+    def records_in_order():
+        # Every test case runs in one program. If it stopped early (crashed
+        # or was killed), the cases from the first one without a result go
+        # to the runner as a streamed batch of one program each; runners
+        # that can check answers themselves only send output for wrong ones
+        case_records = run_cases(
+            code,
+            language,
+            func_name,
+            args_list,
+            problem.slug,
+            limits,
+            "submit",
+            harness,
+            testdata,
+        )
+        first_missing = next(
+            (i for i in range(len(args_list)) if i not in case_records),
+            len(args_list),
         )
-        passed = output_str == expected_str
+        for i in range(first_missing):
+            yield case_records[i]
+        if first_missing == len(args_list):
+            return
+
+        programs = case_programs(
+            code,
+            language,
+            func_name,
+            args_list[first_missing:],
+            problem.slug,
+            harness,
+        )
+        stream = stream_programs(
+            programs,
+            language=language,
+            inputs=(
+                None
+                if testdata is None
+                else [1 + i for i in range(first_missing, len(args_list))]
+            ),
+            limits=limits,
+            profile="submit",
+            expected=expected_values[first_missing:],
+            testdata=testdata,
+        )
+        with contextlib.closing(stream):
+            yield from in_case_order(stream)
+
+    start_time = time.time()
+    times, passed_cases = [], 0
+    records = records_in_order()
+    with contextlib.closing(records):
+        for i, record in enumerate(records, start=1):
+            if record["time"] is not None:
+                times.append(record["time"])
+
+            expected_str = expected_values[i - 1]
+            if record.get("passed"):
+                output_str = expected_str
+            else:
+                output_val = parse_program_output(record["output"], language)
+                output_str = (
+                    output_val.strip() if isinstance(output_val, str) else output_val
+                )
+            passed = record.get("passed")
+            if passed is None:
+                passed = output_str == expected_str and record["verdict"] is None
 
-        results.append(
-            {
-                "input": input_val,
+            yield {
+                "input": inputs[i - 1],
                 "expected": expected_str,
                 "output": output_str,
                 "passed": passed,
                 "case_number": i,
+                "verdict": record["verdict"],
             }
-        )
 
-        if passed:
+            if not passed:
+                break
             passed_cases += 1
-        else:
-            break
+    wall_time = round(time.time() - start_time, 4)
 
     if user_id:
         log_submission_attempt(
@@ -674,10 +1534,43 @@ def submit_test_cases(problem, code, language, user_id=None):
             language=language,
             code=code,
             status="accepted" if passed_cases == len(test_cases) else "failed",
-            time_taken=max(times) if times else 0,
+            # Slowest case as measured by the backend; the batch's wall
+            # time only if it reported none
+            time_taken=max(times) if times else wall_time,
         )
 
-    return results, passed_cases, len(test_cases)
+
+@login_required
+def submit_stream(request, slug):
+    """
+    Judge a submission like the Submit action, but stream progress as NDJSON:
+    one line per judged case as it finishes, then
+    {"done": true, "passed_cases", "total_cases"}.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required"}, status=405)
+    problem = get_object_or_404(Problem, slug=slug)
+    code = request.POST.get("code", "").strip()
+    selected_language = request.POST.get("language", "python").lower()
+    language = language_map.get(selected_language, "python")
+    if not code:
+        return JsonResponse({"error": "No code submitted."}, status=400)
+
+    test_cases_group = getattr(problem, "testcase_group", None)
+    total_cases = len(test_cases_group.test_cases) if test_cases_group else 0
+
+    def progress():
+        passed_cases = 0
+        for result in iter_test_cases(problem, code, language, request.user.id):
+            passed_cases += result["passed"]
+            yield json.dumps({**result, "total_cases": total_cases}) + "\n"
+        yield json.dumps(
+            {"done": True, "passed_cases": passed_cases, "total_cases": total_cases}
+        ) + "\n"
+
+    response = StreamingHttpResponse(progress(), content_type="application/x-ndjson")
+    response["X-Accel-Buffering"] = "no"  # Let nginx pass lines through unbuffered
+    return response
 
 
 @login_required
@@ -869,6 +1762,16 @@ def upload_problem(request):
                     )
                     return render(request, "problems/upload.html")
 
+                # Scaled per language, the limits must fit every backend
+                too_large = languages_over_limits(time_limit, memory_limit)
+                if too_large:
+                    messages.error(
+                        request,
+                        f"The time or memory limit is too large for {', '.join(too_large)} "
+                        "once scaled for the language. Please lower it.",
+                    )
+                    return render(request, "problems/upload.html")
+
                 # Check if slug already exists
                 if Problem.objects.filter(slug=slug).exists():
                     messages.error(
@@ -887,6 +1790,8 @@ def upload_problem(request):
                     constraints=constraints,
                     input_format="",  # You can add this to the form if needed
                     output_format="",  # You can add this to the form if needed
+                    time_limit=time_limit,
+                    memory_limit=memory_limit,
                 )
 
                 # Handle examples
@@ -0,0 +1,65 @@
+"""
+Admission control for the runner.
+
+At most CONCURRENCY requests compile and execute at once; up to QUEUE_SIZE
+more wait for a slot in arrival order. Beyond that requests are rejected
+with QueueFull, carrying a Retry-After estimate from recent slot hold times.
+"""
+
+import asyncio, contextlib, math, os, time
+
+CONCURRENCY = int(os.getenv("RUNNER_CONCURRENCY", os.cpu_count() or 1))
+QUEUE_SIZE = int(os.getenv("RUNNER_QUEUE_SIZE", 4 * CONCURRENCY))
+
+# Weight of the newest sample in the moving average of slot hold time
+SMOOTHING = 0.2
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Runner queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class Admission:
+    def __init__(self, concurrency=CONCURRENCY, queue_size=QUEUE_SIZE):
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.waiting = 0
+        self.average_seconds = 1.0
+
+    def retry_after(self):
+        """Seconds until the current backlog should have drained."""
+        backlog = (self.waiting + 1) / self.concurrency
+        return max(1, math.ceil(backlog * self.average_seconds))
+
+    def check(self):
+        """Raise QueueFull if a new request would be rejected right now."""
+        if self.semaphore.locked() and self.waiting >= self.queue_size:
+            raise QueueFull(self.retry_after())
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        """
+        Hold an execution slot for the duration of the block.
+        Yields {"queue_depth", "queue_wait"}: requests queued ahead of this
+        one on arrival and seconds spent waiting.
+        """
+        self.check()
+
+        depth = self.waiting
+        self.waiting += 1
+        start = time.monotonic()
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        acquired = time.monotonic()
+
+        try:
+            yield {"queue_depth": depth, "queue_wait": round(acquired - start, 4)}
+        finally:
+            self.semaphore.release()
+            held = time.monotonic() - acquired
+            self.average_seconds += SMOOTHING * (held - self.average_seconds)
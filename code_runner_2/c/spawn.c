@@ -0,0 +1,94 @@
+/*
+ * Exec helper that starts a submission and reports its resource usage.
+ *
+ * A process forked from the runner starts with the runner's resident pages,
+ * and the kernel keeps that high-water mark across exec, so wait4 on it
+ * reports the runner's size as the program's peak RSS. This helper is tiny:
+ * it forks the program from its own near-empty image, waits for it and
+ * writes the program's own usage to REPORT_FD as one line:
+ *
+ *   status  user_seconds  system_seconds  max_rss_kb
+ *
+ * where status is the raw wait status. Nothing is written if the helper is
+ * killed first (timeout, output limit).
+ *
+ * Usage: spawn REPORT_FD CGROUP CPU_SOFT CPU_HARD AS_SOFT AS_HARD
+ *              FSIZE_SOFT FSIZE_HARD CMD [ARG...]
+ *
+ * CGROUP is a cgroup v2 directory for the program to join, and the limits
+ * are rlimit values for RLIMIT_CPU, RLIMIT_AS and RLIMIT_FSIZE; "-" skips
+ * any of them.
+ */
+#include <errno.h>
+#include <fcntl.h>
+#include <signal.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/resource.h>
+#include <sys/wait.h>
+#include <unistd.h>
+
+static void join_cgroup(const char *cgroup) {
+    char path[4096];
+    snprintf(path, sizeof path, "%s/cgroup.procs", cgroup);
+    int fd = open(path, O_WRONLY);
+    if (fd < 0 || write(fd, "0", 1) != 1) {
+        dprintf(2, "spawn: cannot join %s: %s\n", cgroup, strerror(errno));
+        _exit(127);
+    }
+    close(fd);
+}
+
+static void set_limit(int resource, const char *soft, const char *hard) {
+    if (strcmp(soft, "-") == 0) {
+        return;
+    }
+    struct rlimit limit = {strtoull(soft, NULL, 10), strtoull(hard, NULL, 10)};
+    if (setrlimit(resource, &limit) != 0) {
+        dprintf(2, "spawn: setrlimit: %s\n", strerror(errno));
+        _exit(127);
+    }
+}
+
+int main(int argc, char **argv) {
+    if (argc < 10) {
+        dprintf(2, "usage: spawn REPORT_FD CGROUP CPU_SOFT CPU_HARD AS_SOFT AS_HARD "
+                   "FSIZE_SOFT FSIZE_HARD CMD [ARG...]\n");
+        return 2;
+    }
+    int report = atoi(argv[1]);
+
+    pid_t pid = fork();
+    if (pid < 0) {
+        dprintf(2, "spawn: fork: %s\n", strerror(errno));
+        return 127;
+    }
+    if (pid == 0) {
+        close(report);
+        if (strcmp(argv[2], "-") != 0) {
+            join_cgroup(argv[2]);
+        }
+        set_limit(RLIMIT_CPU, argv[3], argv[4]);
+        set_limit(RLIMIT_AS, argv[5], argv[6]);
+        set_limit(RLIMIT_FSIZE, argv[7], argv[8]);
+        signal(SIGXFSZ, SIG_DFL);
+        execvp(argv[9], argv + 9);
+        dprintf(2, "spawn: cannot start %s: %s\n", argv[9], strerror(errno));
+        _exit(127);
+    }
+
+    int status;
+    struct rusage usage;
+    while (wait4(pid, &status, 0, &usage) < 0) {
+        if (errno != EINTR) {
+            dprintf(2, "spawn: wait4: %s\n", strerror(errno));
+            return 127;
+        }
+    }
+    dprintf(report, "%d %ld.%06ld %ld.%06ld %ld\n", status,
+            (long)usage.ru_utime.tv_sec, (long)usage.ru_utime.tv_usec,
+            (long)usage.ru_stime.tv_sec, (long)usage.ru_stime.tv_usec,
+            usage.ru_maxrss);
+    return 0;
+}
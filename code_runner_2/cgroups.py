@@ -0,0 +1,59 @@
+"""
+Per-run cgroup v2 memory accounting.
+
+os.wait4 gives exact CPU time for a child, but its peak RSS also counts the
+runner pages the child inherited between fork and exec. When
+RUNNER_CGROUP_DIR names a cgroup v2 directory delegated to the runner
+(writable, "+memory" in its cgroup.subtree_control, and the runner process
+itself living outside it), each run is moved into its own child cgroup and
+memory.peak is reported instead. Without it, wait4's figure is used.
+"""
+
+import contextlib, os, uuid
+
+ROOT = os.getenv("RUNNER_CGROUP_DIR")
+
+
+def available():
+    return bool(ROOT) and os.access(os.path.join(ROOT, "cgroup.procs"), os.W_OK)
+
+
+@contextlib.contextmanager
+def run_cgroup():
+    """Yield a fresh cgroup directory for one run (None if unavailable); removed on exit."""
+    if not available():
+        yield None
+        return
+
+    path = os.path.join(ROOT, f"run_{uuid.uuid4().hex}")
+    try:
+        os.mkdir(path)
+    except OSError as e:
+        print(f"[WARNING] Could not create cgroup {path}: {e}")
+        yield None
+        return
+
+    try:
+        yield path
+    finally:
+        kill_file = os.path.join(path, "cgroup.kill")
+        if os.path.exists(kill_file):
+            with contextlib.suppress(OSError), open(kill_file, "w") as f:
+                f.write("1")
+        with contextlib.suppress(OSError):
+            os.rmdir(path)
+
+
+def enter(path):
+    """Move the calling process into `path`; for use between fork and exec."""
+    with open(os.path.join(path, "cgroup.procs"), "w") as f:
+        f.write("0")
+
+
+def memory_peak(path):
+    """Peak memory of the cgroup in KB, or None if the kernel lacks memory.peak."""
+    try:
+        with open(os.path.join(path, "memory.peak")) as f:
+            return int(f.read()) // 1024
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,93 @@
+"""
+Verdicts against expected-output hashes.
+
+Callers that know a case's expected answer can send its hash instead of
+downloading the program's output and comparing it themselves. The answer is
+the last line of stdout, read the way the generated drivers print results:
+JSON for Python and C, a number or plain text for C++ and Java. Both sides
+normalize the answer the way the Django views compare answers, numbers by
+value (True is 1, 3.0 is 3) and a string answer without surrounding
+whitespace, then hash its canonical JSON (sorted keys, no whitespace) with
+SHA-256.
+A matching run comes back without its output; a mismatching one keeps only
+the last SNIPPET bytes of stdout and stderr, enough to show the answer.
+"""
+
+import hashlib, json, os
+
+SNIPPET = int(os.getenv("RUNNER_VERDICT_SNIPPET", 1024))
+
+JSON_ANSWER_LANGUAGES = ("python", "c")
+
+
+def answer(stdout, language):
+    """The value on the last non-empty line of `stdout`, or None if there is none."""
+    lines = stdout.strip().splitlines()
+    if not lines:
+        return None
+    line = lines[-1].strip()
+    if language in JSON_ANSWER_LANGUAGES:
+        try:
+            return json.loads(line)
+        except ValueError:
+            return line
+    try:
+        return float(line) if "." in line else int(line)
+    except ValueError:
+        return line
+
+
+def normalize(value):
+    """
+    `value` with numbers compared by value, as == does: booleans become
+    integers and integral floats become integers, in nested lists and
+    objects too.
+    """
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, list):
+        return [normalize(item) for item in value]
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    return value
+
+
+def digest(value):
+    """SHA-256 of the canonical JSON of an answer; see code_runner3.answer_hash."""
+    if isinstance(value, str):
+        value = value.strip()
+    canonical = json.dumps(
+        normalize(value), sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def snippet(text):
+    if len(text) <= SNIPPET:
+        return text
+    return f"... [{len(text) - SNIPPET} characters omitted] ...\n" + text[-SNIPPET:]
+
+
+def judge(result, language, expected_hash):
+    """
+    `result` with "passed" set from comparing its answer to `expected_hash`,
+    and "verdict" "WA" on a wrong answer. Output is dropped from passing
+    runs and cut to a snippet otherwise.
+    """
+    if "stdout" not in result or result.get("error"):
+        return {**result, "passed": False}  # Not run, or did not compile
+    passed = (
+        result.get("verdict") is None
+        and digest(answer(result["stdout"], language)) == expected_hash
+    )
+    if passed:
+        return {**result, "stdout": "", "stderr": "", "passed": True}
+    return {
+        **result,
+        "stdout": snippet(result["stdout"]),
+        "stderr": snippet(result.get("stderr", "")),
+        "verdict": result.get("verdict") or "WA",
+        "passed": False,
+    }
@@ -0,0 +1,180 @@
+"""
+Content-addressed cache of compilation artifacts.
+
+Entries are keyed by a hash of (language, compiler version, flags, source)
+and stored as directories under CACHE_DIR. Hits refresh the entry's mtime;
+when the cache grows past CACHE_MAX_BYTES the least recently used entries
+are evicted. Concurrent compiles of the same key are coalesced so only one
+compiler process runs.
+"""
+
+import hashlib, json, os, shutil, subprocess, threading, time, uuid
+from functools import lru_cache
+
+CACHE_DIR = os.getenv("COMPILE_CACHE_DIR", "/tmp/compile_cache")
+CACHE_MAX_BYTES = int(os.getenv("COMPILE_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+# Entries used this recently are never evicted, so a binary is not removed
+# between lookup and execution
+EVICTION_GRACE_SECONDS = 60
+
+# Written next to the artifacts when compilation failed
+ERROR_FILE = "compile_error.json"
+
+
+
+class Uncached(Exception):
+    """Raised by a build whose failed `result` must not be cached."""
+
+    def __init__(self, result):
+        super().__init__("uncached compile failure")
+        self.result = result
+
+
+_inflight = {}  # key -> threading.Event set when that compile finishes
+_inflight_lock = threading.Lock()
+_evict_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def compiler_version(compiler):
+    """First line of `compiler --version`, part of every cache key."""
+    try:
+        result = subprocess.run(
+            [compiler, "--version"], capture_output=True, text=True, timeout=10
+        )
+        return (result.stdout or result.stderr).splitlines()[0]
+    except (OSError, IndexError, subprocess.TimeoutExpired):
+        return "unknown"
+
+
+def cache_key(language, compiler, flags, source):
+    digest = hashlib.sha256()
+    for part in (language, compiler_version(compiler), "\0".join(flags), source):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def lookup(entry_dir):
+    """Return (entry_dir, compile_error) for a finished entry, or None."""
+    if not os.path.isdir(entry_dir):
+        return None
+    try:
+        os.utime(entry_dir)
+    except OSError:
+        return None
+    error_path = os.path.join(entry_dir, ERROR_FILE)
+    if os.path.exists(error_path):
+        with open(error_path) as f:
+            return entry_dir, json.load(f)
+    return entry_dir, None
+
+
+def get_or_compile(language, compiler, flags, source, build):
+    """
+    Return (entry_dir, compile_error, cache_hit) for `source`.
+
+    On a miss, `build(build_dir)` is called with an empty staging directory
+    and must leave the artifacts there, returning the compiler's
+    CompletedProcess. Failed compilations are cached too, as
+    {"stderr": ..., "exit_code": ..., "diagnostics": [...]}, with the
+    staging directory stripped from the paths in stderr so they name the
+    submission's own file; diagnostics are only filled in when the result
+    carries them (the Java compile server). A build that raises Uncached
+    reports its result as the compile error without caching it; other
+    exceptions from `build` (such as a compile timeout) are raised and
+    nothing is cached.
+    """
+    key = cache_key(language, compiler, flags, source)
+    entry_dir = os.path.join(CACHE_DIR, key)
+
+    while True:
+        found = lookup(entry_dir)
+        if found is not None:
+            return found + (True,)
+
+        with _inflight_lock:
+            event = _inflight.get(key)
+            owner = event is None
+            if owner:
+                event = _inflight[key] = threading.Event()
+
+        if not owner:
+            # Another request is compiling the same source; reuse its result
+            event.wait()
+            continue
+
+        try:
+            build_dir = os.path.join(CACHE_DIR, f".build_{key}_{uuid.uuid4().hex}")
+            os.makedirs(build_dir)
+            try:
+                result = build(build_dir)
+                if result.returncode != 0:
+                    with open(os.path.join(build_dir, ERROR_FILE), "w") as f:
+                        json.dump(compile_error(result, build_dir), f)
+                try:
+                    os.rename(build_dir, entry_dir)
+                except OSError:
+                    # Another process published the same key first
+                    shutil.rmtree(build_dir, ignore_errors=True)
+            except Uncached as e:
+                shutil.rmtree(build_dir, ignore_errors=True)
+                return None, compile_error(e.result, build_dir), False
+            except BaseException:
+                shutil.rmtree(build_dir, ignore_errors=True)
+                raise
+            evict()
+            return lookup(entry_dir) + (False,)
+        finally:
+            with _inflight_lock:
+                _inflight.pop(key, None)
+            event.set()
+
+
+def compile_error(result, build_dir):
+    """The cached form of a failed compile's CompletedProcess."""
+    return {
+        "stderr": strip_build_dir(result.stderr.decode(errors="replace"), build_dir),
+        "exit_code": result.returncode,
+        "diagnostics": getattr(result, "diagnostics", []),
+    }
+
+
+def strip_build_dir(text, build_dir):
+    """`text` with paths into `build_dir` made relative to it."""
+    return text.replace(build_dir + os.sep, "").replace(build_dir, ".")
+
+
+def directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def evict():
+    """Remove least recently used entries until the cache fits CACHE_MAX_BYTES."""
+    with _evict_lock:
+        entries = []
+        for entry in os.scandir(CACHE_DIR):
+            if entry.is_dir() and not entry.name.startswith("."):
+                try:
+                    mtime = entry.stat().st_mtime
+                except OSError:
+                    continue
+                entries.append((mtime, entry.path, directory_size(entry.path)))
+
+        total = sum(size for _, _, size in entries)
+        now = time.time()
+        for mtime, path, size in sorted(entries):
+            if total <= CACHE_MAX_BYTES:
+                break
+            if now - mtime < EVICTION_GRACE_SECONDS:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
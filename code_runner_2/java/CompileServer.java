@@ -0,0 +1,161 @@
+import java.io.BufferedInputStream;
+import java.io.BufferedReader;
+import java.io.BufferedWriter;
+import java.io.ByteArrayOutputStream;
+import java.io.DataInputStream;
+import java.io.File;
+import java.io.IOException;
+import java.io.InputStream;
+import java.io.InputStreamReader;
+import java.io.OutputStreamWriter;
+import java.io.Writer;
+import java.net.InetAddress;
+import java.net.ServerSocket;
+import java.net.Socket;
+import java.net.URI;
+import java.nio.charset.StandardCharsets;
+import java.security.MessageDigest;
+import java.util.Arrays;
+import java.util.Collections;
+import java.util.List;
+import java.util.Locale;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.Future;
+import java.util.concurrent.TimeUnit;
+import java.util.concurrent.TimeoutException;
+import javax.tools.Diagnostic;
+import javax.tools.DiagnosticCollector;
+import javax.tools.JavaCompiler;
+import javax.tools.JavaFileObject;
+import javax.tools.SimpleJavaFileObject;
+import javax.tools.StandardJavaFileManager;
+import javax.tools.StandardLocation;
+import javax.tools.ToolProvider;
+
+/**
+ * Resident Java compiler for the runner, built on javax.tools.JavaCompiler so
+ * compiles run on a warm JVM instead of starting javac each time.
+ *
+ * Usage: CompileServer timeoutSeconds [threads], with a token line on stdin.
+ * Listens on an ephemeral 127.0.0.1 port, printed as "READY port" once bound;
+ * one compile per connection, from clients that send the token first.
+ *   request:  token \n  outDir \t className \t sourceByteLength \n  followed by the UTF-8 source
+ *   response: OK|ERROR \t diagnosticCount \n  then per diagnostic
+ *             kind \t line \t column \t message \n  (message with \n, \t, \\ escaped)
+ *             or TIMEOUT \t 0 \n  when the compile took over timeoutSeconds
+ * Class files are written to outDir. javac cannot be interrupted, so after a
+ * TIMEOUT the server exits rather than keep compiling; the runner starts a
+ * new one on its next compile.
+ */
+public class CompileServer {
+
+    static final JavaCompiler COMPILER = ToolProvider.getSystemJavaCompiler();
+
+    static final List<String> OPTIONS = Arrays.asList("-proc:none", "-encoding", "UTF-8");
+
+    static final ThreadLocal<StandardJavaFileManager> FILE_MANAGERS = ThreadLocal.withInitial(
+            () -> COMPILER.getStandardFileManager(null, Locale.ROOT, StandardCharsets.UTF_8));
+
+    /** Compiles run here so their connection's thread can give up on them. */
+    static final ExecutorService COMPILES = Executors.newCachedThreadPool(runnable -> {
+        Thread thread = new Thread(runnable, "compile");
+        thread.setDaemon(true);
+        return thread;
+    });
+
+    static byte[] token;
+    static long timeoutSeconds;
+
+    public static void main(String[] args) throws Exception {
+        timeoutSeconds = Long.parseLong(args[0]);
+        int threads = args.length > 1
+                ? Integer.parseInt(args[1])
+                : Runtime.getRuntime().availableProcessors();
+        String line = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8)).readLine();
+        if (line == null || line.isEmpty()) {
+            throw new IOException("No token on stdin");
+        }
+        token = line.getBytes(StandardCharsets.UTF_8);
+        ExecutorService pool = Executors.newFixedThreadPool(threads);
+
+        try (ServerSocket server = new ServerSocket(0, 50, InetAddress.getLoopbackAddress())) {
+            System.out.println("READY " + server.getLocalPort());
+            System.out.flush();
+            while (true) {
+                Socket socket = server.accept();
+                pool.execute(() -> handle(socket));
+            }
+        }
+    }
+
+    static void handle(Socket socket) {
+        try (Socket s = socket;
+             DataInputStream in = new DataInputStream(new BufferedInputStream(s.getInputStream()));
+             Writer out = new BufferedWriter(
+                     new OutputStreamWriter(s.getOutputStream(), StandardCharsets.UTF_8))) {
+            if (!MessageDigest.isEqual(token, readLine(in).getBytes(StandardCharsets.UTF_8))) {
+                return;  // Not the runner that started this server
+            }
+            String[] header = readLine(in).split("\t");
+            byte[] source = new byte[Integer.parseInt(header[2])];
+            in.readFully(source);
+            Future<String> reply = COMPILES.submit(
+                    () -> compile(header[0], header[1], new String(source, StandardCharsets.UTF_8)));
+            try {
+                out.write(reply.get(timeoutSeconds, TimeUnit.SECONDS));
+                out.flush();
+            } catch (TimeoutException e) {
+                out.write("TIMEOUT\t0\n");
+                out.flush();
+                System.err.println("Compile took over " + timeoutSeconds + "s, exiting");
+                Runtime.getRuntime().halt(1);
+            }
+        } catch (Exception e) {
+            // The runner went away or sent a malformed request; nothing to answer
+        }
+    }
+
+    static String readLine(InputStream in) throws IOException {
+        ByteArrayOutputStream line = new ByteArrayOutputStream();
+        int b;
+        while ((b = in.read()) != '\n') {
+            if (b < 0) {
+                throw new IOException("Connection closed before header");
+            }
+            line.write(b);
+        }
+        return new String(line.toByteArray(), StandardCharsets.UTF_8);
+    }
+
+    static String compile(String outDir, String className, String source) throws IOException {
+        DiagnosticCollector<JavaFileObject> diagnostics = new DiagnosticCollector<>();
+        StandardJavaFileManager files = FILE_MANAGERS.get();
+        files.setLocation(StandardLocation.CLASS_OUTPUT, Collections.singletonList(new File(outDir)));
+
+        JavaFileObject unit = new SimpleJavaFileObject(
+                URI.create("string:///" + className + ".java"), JavaFileObject.Kind.SOURCE) {
+            @Override
+            public CharSequence getCharContent(boolean ignoreEncodingErrors) {
+                return source;
+            }
+        };
+        boolean ok = COMPILER.getTask(
+                null, files, diagnostics, OPTIONS, null, Collections.singletonList(unit)).call();
+
+        List<Diagnostic<? extends JavaFileObject>> found = diagnostics.getDiagnostics();
+        StringBuilder reply = new StringBuilder();
+        reply.append(ok ? "OK" : "ERROR").append('\t').append(found.size()).append('\n');
+        for (Diagnostic<? extends JavaFileObject> d : found) {
+            reply.append(d.getKind()).append('\t')
+                    .append(d.getLineNumber()).append('\t')
+                    .append(d.getColumnNumber()).append('\t')
+                    .append(escape(d.getMessage(Locale.ROOT))).append('\n');
+        }
+        return reply.toString();
+    }
+
+    static String escape(String s) {
+        return s.replace("\\", "\\\\").replace("\n", "\\n").replace("\t", "\\t");
+    }
+}
@@ -0,0 +1,303 @@
+import java.io.BufferedInputStream;
+import java.io.BufferedOutputStream;
+import java.io.BufferedReader;
+import java.io.FileDescriptor;
+import java.io.FileInputStream;
+import java.io.FileOutputStream;
+import java.io.InputStream;
+import java.io.InputStreamReader;
+import java.io.IOException;
+import java.io.OutputStream;
+import java.io.PrintStream;
+import java.lang.management.ManagementFactory;
+import java.lang.management.MemoryPoolMXBean;
+import java.lang.management.MemoryType;
+import java.lang.management.ThreadMXBean;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Paths;
+import java.security.Permission;
+import java.util.Collections;
+import java.util.IdentityHashMap;
+import java.util.Set;
+
+/**
+ * Long-lived JVM that runs compiled submissions without paying JVM startup
+ * for every run. Each submission is loaded in its own class loader and its
+ * main method runs on a fresh thread with System.in/out/err redirected to
+ * the files named in the request.
+ *
+ * Protocol on stdin/stdout, one tab-separated line per message:
+ *   request:  classDir  stdinPath  stdoutPath  stderrPath  wallMillis  cpuMillis  outputBytes
+ *   response: status  exitCode  cpuMillis  heapKb
+ *
+ * heapKb is the peak heap use during the run (MemoryPoolMXBean peak usage,
+ * reset after a GC before each run); the heap itself is capped by the
+ * worker's -Xmx, which the runner sets to the run's memory limit.
+ *
+ * status is OK, TIMEOUT, OUTPUT (stdout or stderr passed outputBytes) or
+ * ESCAPE (the submission left threads running anywhere in the JVM, not only
+ * in its own thread group, or hit a VirtualMachineError). Such a thread would
+ * share System.in/out with the next submission, so the worker must go.
+ * After anything but OK, or after maxRuns runs, the worker exits so the
+ * runner replaces it with a fresh JVM.
+ */
+public class JavaWorker {
+
+    static final class ExitTrap extends SecurityException {
+        final int status;
+
+        ExitTrap(int status) {
+            super("System.exit(" + status + ")");
+            this.status = status;
+        }
+    }
+
+    /** Writes at most `limit` bytes, then drops the rest and raises `exceeded`. */
+    static final class CappedOutputStream extends OutputStream {
+        final OutputStream out;
+        final long limit;
+        long written;
+        volatile boolean exceeded;
+
+        CappedOutputStream(OutputStream out, long limit) {
+            this.out = out;
+            this.limit = limit;
+        }
+
+        @Override
+        public void write(int b) throws IOException {
+            write(new byte[] {(byte) b}, 0, 1);
+        }
+
+        @Override
+        public void write(byte[] b, int off, int len) throws IOException {
+            long allowed = Math.min(len, limit - written);
+            if (allowed > 0) {
+                out.write(b, off, (int) allowed);
+                written += allowed;
+            }
+            if (allowed < len) {
+                exceeded = true;
+                throw new IOException("Output limit exceeded");
+            }
+        }
+
+        @Override
+        public void flush() throws IOException {
+            out.flush();
+        }
+
+        @Override
+        public void close() throws IOException {
+            out.close();
+        }
+    }
+
+    static volatile ThreadGroup userGroup;
+
+    public static void main(String[] args) throws Exception {
+        int maxRuns = args.length > 0 ? Integer.parseInt(args[0]) : 100;
+        PrintStream control =
+                new PrintStream(new FileOutputStream(FileDescriptor.out), true, "UTF-8");
+        BufferedReader requests = new BufferedReader(
+                new InputStreamReader(new FileInputStream(FileDescriptor.in), StandardCharsets.UTF_8));
+        trapExit();
+
+        for (int runs = 0; runs < maxRuns; runs++) {
+            String line = requests.readLine();
+            if (line == null) {
+                break;
+            }
+            String[] f = line.split("\t", -1);
+            String result = run(f[0], f[1], f[2], f[3], Long.parseLong(f[4]), Long.parseLong(f[5]),
+                    Long.parseLong(f[6]));
+            control.println(result);
+            if (!result.startsWith("OK")) {
+                break;
+            }
+        }
+        control.flush();
+        Runtime.getRuntime().halt(0);
+    }
+
+    /** Turn System.exit from submission threads into an ExitTrap exception. */
+    @SuppressWarnings("removal")
+    static void trapExit() {
+        try {
+            System.setSecurityManager(new SecurityManager() {
+                @Override
+                public void checkExit(int status) {
+                    ThreadGroup group = userGroup;
+                    if (group != null && group.parentOf(Thread.currentThread().getThreadGroup())) {
+                        throw new ExitTrap(status);
+                    }
+                }
+
+                @Override
+                public void checkPermission(Permission perm) {
+                }
+
+                @Override
+                public void checkPermission(Permission perm, Object context) {
+                }
+            });
+        } catch (UnsupportedOperationException e) {
+            // No security manager on this JDK: System.exit ends the worker, and
+            // the runner reports the JVM's exit status instead.
+        }
+    }
+
+    static ExitTrap findExit(Throwable t) {
+        while (t != null) {
+            if (t instanceof ExitTrap) {
+                return (ExitTrap) t;
+            }
+            t = t.getCause();
+        }
+        return null;
+    }
+
+    /** Collect what earlier runs left behind and restart the heap pools' peaks from there. */
+    static void resetHeapPeak() {
+        System.gc();
+        for (MemoryPoolMXBean pool : ManagementFactory.getMemoryPoolMXBeans()) {
+            if (pool.getType() == MemoryType.HEAP) {
+                pool.resetPeakUsage();
+            }
+        }
+    }
+
+    /** Peak heap use since resetHeapPeak, summed over the heap pools. */
+    static long heapPeak() {
+        long peak = 0;
+        for (MemoryPoolMXBean pool : ManagementFactory.getMemoryPoolMXBeans()) {
+            if (pool.getType() == MemoryType.HEAP && pool.getPeakUsage() != null) {
+                peak += pool.getPeakUsage().getUsed();
+            }
+        }
+        return peak;
+    }
+
+    /** Every live platform thread in the JVM, by identity. */
+    static Set<Thread> liveThreads() {
+        ThreadGroup root = Thread.currentThread().getThreadGroup();
+        while (root.getParent() != null) {
+            root = root.getParent();
+        }
+        Thread[] threads = new Thread[root.activeCount() + 16];
+        int count;
+        while ((count = root.enumerate(threads, true)) == threads.length) {
+            threads = new Thread[threads.length * 2];
+        }
+        Set<Thread> live = Collections.newSetFromMap(new IdentityHashMap<>());
+        for (int i = 0; i < count; i++) {
+            live.add(threads[i]);
+        }
+        return live;
+    }
+
+    /** True if a thread not in `before` is still alive. */
+    static boolean threadsLeftRunning(Set<Thread> before) {
+        for (Thread thread : liveThreads()) {
+            if (!before.contains(thread) && thread.isAlive()) {
+                return true;
+            }
+        }
+        return false;
+    }
+
+    static String run(String classDir, String in, String out, String err, long wallMillis, long cpuMillis,
+            long outputBytes) throws Exception {
+        InputStream originalIn = System.in;
+        PrintStream originalOut = System.out;
+        PrintStream originalErr = System.err;
+        ThreadGroup group = new ThreadGroup("submission");
+        final int[] exitCode = {0};
+        final long[] usage = {0};  // cpu nanos
+        final boolean[] escaped = {false};
+        CappedOutputStream cappedOut = new CappedOutputStream(new FileOutputStream(out), outputBytes);
+        CappedOutputStream cappedErr = new CappedOutputStream(new FileOutputStream(err), outputBytes);
+
+        try (InputStream stdin = new BufferedInputStream(new FileInputStream(in));
+             PrintStream stdout = new PrintStream(new BufferedOutputStream(cappedOut), false, "UTF-8");
+             PrintStream stderr = new PrintStream(cappedErr, true, "UTF-8");
+             URLClassLoader loader = new URLClassLoader(
+                     new URL[] {Paths.get(classDir).toUri().toURL()},
+                     ClassLoader.getPlatformClassLoader())) {
+            System.setIn(stdin);
+            System.setOut(stdout);
+            System.setErr(stderr);
+            userGroup = group;
+
+            Thread thread = new Thread(group, () -> {
+                ThreadMXBean mx = ManagementFactory.getThreadMXBean();
+                try {
+                    Method main = loader.loadClass("Main").getMethod("main", String[].class);
+                    main.invoke(null, (Object) new String[0]);
+                } catch (InvocationTargetException e) {
+                    Throwable cause = e.getCause();
+                    ExitTrap trap = findExit(cause);
+                    if (trap != null) {
+                        exitCode[0] = trap.status;
+                    } else {
+                        System.err.print("Exception in thread \"main\" ");
+                        cause.printStackTrace();
+                        exitCode[0] = 1;
+                        escaped[0] = cause instanceof VirtualMachineError;
+                    }
+                } catch (Throwable e) {
+                    ExitTrap trap = findExit(e);
+                    if (trap != null) {
+                        exitCode[0] = trap.status;
+                    } else {
+                        e.printStackTrace();
+                        exitCode[0] = 1;
+                        escaped[0] = e instanceof VirtualMachineError;
+                    }
+                } finally {
+                    usage[0] = mx.getCurrentThreadCpuTime();
+                }
+            }, "main");
+
+            resetHeapPeak();
+            ThreadMXBean monitor = ManagementFactory.getThreadMXBean();
+            Set<Thread> threadsBefore = liveThreads();
+            long deadline = System.nanoTime() + wallMillis * 1_000_000L;
+            thread.start();
+            while (thread.isAlive()) {
+                long remaining = (deadline - System.nanoTime()) / 1_000_000L;
+                if (remaining <= 0 || monitor.getThreadCpuTime(thread.getId()) > cpuMillis * 1_000_000L
+                        || cappedOut.exceeded || cappedErr.exceeded) {
+                    break;
+                }
+                thread.join(Math.min(remaining, 50));
+            }
+
+            boolean timedOut = thread.isAlive();
+            long cpuNanos = monitor.getThreadCpuTime(thread.getId());
+            System.out.flush();
+            System.err.flush();
+            userGroup = null;
+            System.setIn(originalIn);
+            System.setOut(originalOut);
+            System.setErr(originalErr);
+
+            if (cappedOut.exceeded || cappedErr.exceeded) {
+                // The submission may still be running; the worker exits after this
+                return "OUTPUT\t-1\t" + Math.max(cpuNanos, usage[0]) / 1_000_000L + "\t0";
+            }
+            if (timedOut) {
+                return "TIMEOUT\t-1\t" + cpuMillis + "\t0";
+            }
+            if (group.activeCount() > 0 || threadsLeftRunning(threadsBefore)) {
+                escaped[0] = true;
+            }
+            return (escaped[0] ? "ESCAPE" : "OK") + "\t" + exitCode[0] + "\t"
+                    + usage[0] / 1_000_000L + "\t" + heapPeak() / 1024;
+        }
+    }
+}
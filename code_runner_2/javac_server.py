@@ -0,0 +1,153 @@
+"""
+Client for the resident Java compile server (java/CompileServer.java).
+
+The server is a warm JVM running javax.tools.JavaCompiler, so a compile
+costs tens of milliseconds instead of a cold `javac` start. It is started on
+first use and restarted if it dies. If it fails to start, it is not tried
+again: available() turns False and callers compile with plain `javac`, as
+they do for a compile the server could not answer.
+
+Each runner process starts its own server on an ephemeral loopback port and
+hands it a fresh token on stdin; the server ignores connections that do not
+send it. A compile that takes longer than COMPILE_TIMEOUT ends the server
+(javac cannot be interrupted) and is raised as subprocess.TimeoutExpired.
+"""
+
+import os, re, secrets, select, socket, subprocess, threading
+
+import jvm_pool
+
+ENABLED = os.getenv("JAVAC_SERVER", "1") != "0"
+COMPILE_TIMEOUT = int(os.getenv("RUNNER_COMPILE_TIMEOUT", 30))
+# Extra seconds the client waits for the server's own timeout reply
+REPLY_GRACE = 5
+# Seconds the server may take to start and print READY
+START_TIMEOUT = 30
+
+_process = None
+_port = None
+_token = None
+_failed = False
+_lock = threading.Lock()
+
+
+class Unavailable(OSError):
+    """The compile server could not be started; use plain `javac`."""
+
+
+class CompileResult(subprocess.CompletedProcess):
+    """CompletedProcess with the compiler's structured diagnostics attached."""
+
+    def __init__(self, returncode, stderr, diagnostics):
+        super().__init__(["javac-server"], returncode, stdout=b"", stderr=stderr)
+        self.diagnostics = diagnostics
+
+
+def available():
+    """False once the server has failed to start (see ensure_running)."""
+    return ENABLED and not _failed
+
+
+def ensure_running():
+    """
+    Start the server unless it is running. Raises Unavailable, and gives up
+    on the server for good, if it cannot be started.
+    """
+    global _process, _port, _token, _failed
+    if _process is not None and _process.poll() is None:
+        return
+    with _lock:
+        if _failed:
+            raise Unavailable("Java compile server failed to start earlier")
+        if _process is not None and _process.poll() is None:
+            return
+        try:
+            jvm_pool.ensure_compiled()
+            token = secrets.token_hex(16)
+            _process = subprocess.Popen(
+                [
+                    "java", "-XX:+UseSerialGC", "-cp", jvm_pool.CLASS_DIR,
+                    "CompileServer", str(COMPILE_TIMEOUT),
+                ],
+                stdout=subprocess.PIPE,
+                stdin=subprocess.PIPE,
+                text=True,
+            )
+            _process.stdin.write(token + "\n")
+            _process.stdin.close()
+            ready, _, _ = select.select([_process.stdout], [], [], START_TIMEOUT)
+            reply = _process.stdout.readline().split() if ready else []
+            if len(reply) != 2 or reply[0] != "READY":
+                raise OSError("it did not report READY")
+            _port, _token = int(reply[1]), token
+        except (OSError, ValueError, subprocess.CalledProcessError) as e:
+            if _process is not None:
+                _process.kill()
+                _process.wait()
+                _process = None
+            _failed = True
+            print(f"Java compile server failed to start, compiling with javac from now on: {e}")
+            raise Unavailable(f"Java compile server failed to start: {e}") from e
+
+
+def stop(process):
+    """Kill `process` if it is still the server; the next compile starts a new one."""
+    global _process
+    with _lock:
+        if _process is process and process is not None:
+            process.kill()
+            process.wait()
+            _process = None
+
+
+def unescape(text):
+    return re.sub(r"\\(.)", lambda m: {"n": "\n", "t": "\t"}.get(m.group(1), m.group(1)), text)
+
+
+def compile(source, out_dir, class_name="Main"):
+    """
+    Compile `source` into `out_dir`; returns a CompileResult. Raises
+    subprocess.TimeoutExpired if the compile took over COMPILE_TIMEOUT, and
+    OSError if the server cannot be used (Unavailable if it never started).
+    """
+    ensure_running()
+    process, port, token = _process, _port, _token
+    data = source.encode()
+    try:
+        with socket.create_connection(
+            ("127.0.0.1", port), timeout=COMPILE_TIMEOUT + REPLY_GRACE
+        ) as sock:
+            sock.sendall(f"{token}\n{out_dir}\t{class_name}\t{len(data)}\n".encode() + data)
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+    except socket.timeout:
+        stop(process)  # Hung past its own timeout
+        raise
+
+    lines = b"".join(chunks).decode().splitlines()
+    if not lines:
+        raise OSError("Java compile server closed the connection")
+    status, _ = lines[0].split("\t")
+    if status == "TIMEOUT":
+        raise subprocess.TimeoutExpired(["javac-server"], COMPILE_TIMEOUT)
+
+    diagnostics = []
+    for line in lines[1:]:
+        kind, line_number, column, message = line.split("\t", 3)
+        diagnostics.append(
+            {
+                "kind": kind.lower(),
+                "line": int(line_number),
+                "column": int(column),
+                "message": unescape(message),
+            }
+        )
+
+    stderr = "\n".join(
+        f"{class_name}.java:{d['line']}: {d['kind']}: {d['message']}" for d in diagnostics
+    )
+    return CompileResult(0 if status == "OK" else 1, stderr.encode(), diagnostics)
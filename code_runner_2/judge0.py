@@ -0,0 +1,243 @@
+"""
+Judge0-compatible submissions API on top of the runner.
+
+Serves the subset of the Judge0 CE REST API the Django client uses:
+POST /submissions, POST and GET /submissions/batch and GET
+/submissions/{token}, with base64_encoded and fields query parameters, the
+same language ids and status ids. Submissions are kept in an in-memory store
+and executed by a fixed set of asyncio workers, so the existing Judge0
+client can talk to a self-hosted runner instead of RapidAPI.
+"""
+
+import asyncio, base64, os, time, uuid
+
+WORKERS = int(os.getenv("JUDGE0_WORKERS", os.cpu_count() or 1))
+# Finished submissions are dropped this many seconds after they complete
+RESULT_TTL = float(os.getenv("JUDGE0_RESULT_TTL", 3600))
+# Most submissions waiting or kept at once; older finished ones go first
+MAX_SUBMISSIONS = int(os.getenv("JUDGE0_MAX_SUBMISSIONS", 10000))
+
+# Judge0 language ids (see LANGUAGE_ID_MAP in the Django client)
+LANGUAGES = {
+    71: "python",
+    54: "cpp",
+    50: "c",
+    62: "java",
+    63: "javascript",
+}
+
+STATUSES = {
+    1: "In Queue",
+    2: "Processing",
+    3: "Accepted",
+    4: "Wrong Answer",
+    5: "Time Limit Exceeded",
+    6: "Compilation Error",
+    7: "Runtime Error (SIGSEGV)",
+    8: "Runtime Error (SIGXFSZ)",
+    9: "Runtime Error (SIGFPE)",
+    10: "Runtime Error (SIGABRT)",
+    11: "Runtime Error (NZEC)",
+    12: "Runtime Error (Other)",
+    13: "Internal Error",
+}
+
+# Status ids for programs killed by these signals
+SIGNAL_STATUSES = {11: 7, 25: 8, 8: 9, 6: 10}
+
+ENCODED_FIELDS = ("source_code", "stdin", "expected_output")
+ENCODED_RESULT_FIELDS = ("stdout", "stderr", "compile_output", "message")
+DEFAULT_FIELDS = (
+    "token", "stdout", "stderr", "compile_output", "message", "status", "time", "memory",
+)
+ALL_FIELDS = DEFAULT_FIELDS + (
+    "source_code", "language_id", "stdin", "expected_output", "exit_code",
+    "exit_signal", "created_at", "finished_at", "cpu_time_limit", "memory_limit",
+    "compiler_options",
+)
+
+
+class InvalidSubmission(Exception):
+    """Carries Judge0's {field: [messages]} error body."""
+
+    def __init__(self, errors):
+        super().__init__(str(errors))
+        self.errors = errors
+
+
+def decode(value, base64_encoded):
+    if value is None or not base64_encoded:
+        return value
+    return base64.b64decode(value, validate=True).decode(errors="replace")
+
+
+def encode(value, base64_encoded):
+    if value is None or not base64_encoded:
+        return value
+    return base64.b64encode(value.encode()).decode()
+
+
+def status_of(result, expected_output=None):
+    """Judge0 status id for a runner result."""
+    if result.get("error") == "Compilation failed":
+        return 6
+    if result.get("verdict") == "TLE":
+        return 5
+    if result.get("verdict") == "OLE":
+        return 8
+    if result.get("verdict") == "MLE":
+        return 11  # Judge0 has no memory limit status
+    if result.get("error") and "exit_code" not in result:
+        return 13
+    exit_code = result.get("exit_code") or 0
+    if exit_code < 0:
+        return SIGNAL_STATUSES.get(-exit_code, 12)
+    if exit_code > 0:
+        return 11
+    stdout = result.get("stdout", "")
+    if expected_output is not None and stdout.rstrip() != expected_output.rstrip():
+        return 4
+    return 3
+
+
+class Emulator:
+    """
+    Token store and worker pool. `run(submission)` is a coroutine executing
+    one submission (a dict with language, source_code, stdin, time_limit in
+    seconds, memory_limit_mb and profile) and returning the runner's result.
+    `profiles` maps compiler_options strings to runner compile profiles.
+    """
+
+    def __init__(self, run, profiles, workers=WORKERS):
+        self.run = run
+        self.profiles = profiles
+        self.workers = workers
+        self.submissions = {}  # token -> submission, in insertion order
+        self.queue = None
+        self.tasks = []
+
+    def start(self):
+        """Start the workers on the running event loop."""
+        if not self.tasks:
+            self.queue = asyncio.Queue()
+            self.tasks = [
+                asyncio.ensure_future(self.worker()) for _ in range(self.workers)
+            ]
+
+    def parse(self, body, base64_encoded):
+        """Validate one submission request body and return it as a new submission."""
+        errors = {}
+        language = LANGUAGES.get(body.get("language_id"))
+        if language is None:
+            errors["language_id"] = [
+                f"language with id {body.get('language_id')} doesn't exist"
+            ]
+        if not body.get("source_code"):
+            errors["source_code"] = ["can't be blank"]
+        profile = None
+        if body.get("compiler_options"):
+            profile = self.profiles.get(body["compiler_options"].strip())
+            if profile is None:
+                errors["compiler_options"] = [
+                    f"only {', '.join(sorted(self.profiles))} are supported"
+                ]
+        if errors:
+            raise InvalidSubmission(errors)
+
+        submission = {key: body.get(key) for key in ALL_FIELDS if key in body}
+        try:
+            for key in ENCODED_FIELDS:
+                submission[key] = decode(body.get(key), base64_encoded)
+        except ValueError:
+            raise InvalidSubmission({"base64_encoded": ["invalid base64 in request"]})
+        memory_limit = body.get("memory_limit")  # KB
+        if memory_limit is not None:
+            memory_limit = max(1, int(memory_limit) // 1024)
+        submission.update(
+            token=str(uuid.uuid4()),
+            language=language,
+            time_limit=body.get("cpu_time_limit"),
+            memory_limit_mb=memory_limit,
+            profile=profile,
+            status_id=1,
+            created_at=time.time(),
+            done=asyncio.Event(),
+        )
+        return submission
+
+    def submit(self, submission):
+        self.expire()
+        self.submissions[submission["token"]] = submission
+        self.queue.put_nowait(submission["token"])
+
+    def get(self, token):
+        return self.submissions.get(token)
+
+    def expire(self):
+        """Drop finished submissions past RESULT_TTL, then the oldest over MAX_SUBMISSIONS."""
+        now = time.time()
+        excess = len(self.submissions) + 1 - MAX_SUBMISSIONS
+        for token, submission in list(self.submissions.items()):
+            finished = submission.get("finished_at")
+            if finished is None:
+                continue
+            if excess > 0 or now - finished > RESULT_TTL:
+                del self.submissions[token]
+                excess -= 1
+
+    async def worker(self):
+        while True:
+            token = await self.queue.get()
+            submission = self.submissions.get(token)
+            if submission is None:
+                continue
+            submission["status_id"] = 2
+            try:
+                result = await self.run(submission)
+            except Exception as e:
+                result = {"error": "Internal error", "message": str(e)}
+            self.finish(submission, result)
+
+    def finish(self, submission, result):
+        status_id = status_of(result, submission.get("expected_output"))
+        exit_code = result.get("exit_code")
+        message = result.get("message")
+        if status_id == 13:
+            message = message or result.get("error")
+        elif result.get("verdict") in ("MLE", "OLE"):
+            message = {"MLE": "Memory limit exceeded", "OLE": "Output limit exceeded"}[
+                result["verdict"]
+            ]
+        compiled = status_id != 6
+        submission.update(
+            status_id=status_id,
+            stdout=result.get("stdout") if compiled else None,
+            stderr=(result.get("stderr") or None) if compiled else None,
+            compile_output=None if compiled else result.get("stderr"),
+            message=message,
+            time=None if result.get("cpu_time") is None else f"{result['cpu_time']:.3f}",
+            memory=result.get("memory_used"),
+            exit_code=exit_code if exit_code is None or exit_code >= 0 else None,
+            exit_signal=-exit_code if exit_code is not None and exit_code < 0 else None,
+            finished_at=time.time(),
+        )
+        submission["done"].set()
+
+    def render(self, submission, base64_encoded, fields=None):
+        """Judge0's JSON for `submission`, limited to `fields` (a list, or "*")."""
+        if fields == "*":
+            fields = ALL_FIELDS
+        rendered = {}
+        for field in fields or DEFAULT_FIELDS:
+            if field == "status":
+                status_id = submission["status_id"]
+                rendered["status"] = {"id": status_id, "description": STATUSES[status_id]}
+            elif field in ENCODED_FIELDS or field in ENCODED_RESULT_FIELDS:
+                rendered[field] = encode(submission.get(field), base64_encoded)
+            elif field in ("created_at", "finished_at") and submission.get(field):
+                rendered[field] = time.strftime(
+                    "%Y-%m-%dT%H:%M:%SZ", time.gmtime(submission[field])
+                )
+            elif field in ALL_FIELDS:
+                rendered[field] = submission.get(field)
+        return rendered
@@ -0,0 +1,168 @@
+"""
+Pool of warm JVM workers for running compiled Java submissions.
+
+Each worker is a long-lived `java JavaWorker` process (see
+java/JavaWorker.java) that loads a submission's classes in a fresh class
+loader and invokes Main.main with redirected stdio, so runs skip JVM
+startup. Workers are replaced after MAX_RUNS runs, after a timeout or any
+run that leaves threads behind, and whenever the process dies.
+
+A worker's -Xmx is the memory limit of the runs it serves, so the JVM itself
+enforces it. A run goes to an idle worker with its heap size; if there is
+none, an idle worker of another size is replaced by a fresh one.
+"""
+
+import os, queue, select, subprocess, threading
+
+POOL_SIZE = int(os.getenv("JAVA_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+MAX_RUNS = int(os.getenv("JAVA_WORKER_MAX_RUNS", 100))
+# Heap of the workers started up front: the runner's default memory limit
+HEAP = os.getenv("JAVA_WORKER_HEAP", "128m")
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "java")
+HELPERS = ["JavaWorker", "CompileServer"]
+CLASS_DIR = os.getenv("JAVA_WORKER_CLASS_DIR", "/tmp/jvm_worker")
+
+# Extra wall time the runner allows over the worker's own watchdog
+GRACE_SECONDS = 2
+
+
+def ensure_compiled():
+    """Build the runner's own Java helpers (worker, compile server) once."""
+    if not all(os.path.exists(os.path.join(CLASS_DIR, f"{name}.class")) for name in HELPERS):
+        os.makedirs(CLASS_DIR, exist_ok=True)
+        sources = [os.path.join(SOURCE_DIR, f"{name}.java") for name in HELPERS]
+        subprocess.run(["javac", "-d", CLASS_DIR, *sources], check=True)
+
+
+class JvmWorker:
+    def __init__(self, heap=HEAP):
+        self.heap = heap
+        self.runs = 0
+        self.process = subprocess.Popen(
+            [
+                "java",
+                f"-Xmx{heap}",
+                "-XX:+UseSerialGC",
+                "-Djava.security.manager=allow",
+                "-cp",
+                CLASS_DIR,
+                "JavaWorker",
+                str(MAX_RUNS),
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def close(self):
+        self.process.kill()
+        self.process.wait()
+
+    def run(self, class_dir, stdin, stdout, stderr, wall_seconds, cpu_seconds, output_bytes):
+        """
+        Run Main from `class_dir` and return the worker's report, or None if
+        it did not answer in time (the worker is killed in that case).
+        The run is stopped with status OUTPUT once stdout or stderr passes
+        `output_bytes`.
+        """
+        fields = [
+            class_dir, stdin, stdout, stderr,
+            str(int(wall_seconds * 1000)), str(int(cpu_seconds * 1000)), str(output_bytes),
+        ]
+        self.process.stdin.write("\t".join(fields) + "\n")
+        self.process.stdin.flush()
+
+        ready, _, _ = select.select(
+            [self.process.stdout], [], [], wall_seconds + GRACE_SECONDS
+        )
+        if not ready:
+            self.close()
+            return None
+
+        line = self.process.stdout.readline()
+        if not line:
+            # The JVM itself exited, e.g. System.exit on a JDK without a
+            # security manager; its status is the submission's exit code
+            return {
+                "status": "EXIT",
+                "exit_code": self.process.wait(),
+                "cpu_ms": 0,
+                "heap_kb": 0,
+            }
+
+        status, exit_code, cpu_ms, heap_kb = line.rstrip("\n").split("\t")
+        self.runs += 1
+        if status != "OK" or self.runs >= MAX_RUNS:
+            self.close()  # The worker is exiting; replace it now
+        return {
+            "status": status,
+            "exit_code": int(exit_code),
+            "cpu_ms": int(cpu_ms),
+            "heap_kb": int(heap_kb),
+        }
+
+
+class JvmPool:
+    """
+    Fixed-size pool of JVM workers; each serves one execution at a time,
+    for runs whose memory limit matches its heap size.
+    """
+
+    def __init__(self, size=POOL_SIZE):
+        ensure_compiled()
+        self.slots = threading.Semaphore(size)
+        self.lock = threading.Lock()
+        self.idle = [JvmWorker() for _ in range(size)]  # Least recently used first
+
+    def run(
+        self, class_dir, stdin, stdout, stderr, wall_seconds, cpu_seconds, output_bytes,
+        heap=HEAP,
+    ):
+        with self.slots:
+            worker = self.take(heap)
+            try:
+                return worker.run(
+                    class_dir, stdin, stdout, stderr, wall_seconds, cpu_seconds, output_bytes
+                )
+            except (OSError, ValueError):
+                worker.close()
+                raise
+            finally:
+                if not worker.alive():
+                    worker = JvmWorker(heap)
+                with self.lock:
+                    self.idle.append(worker)
+
+    def take(self, heap):
+        """
+        An idle worker with `heap`, else a fresh one in place of the least
+        recently used idle worker; the caller holds a slot, so one is idle.
+        """
+        with self.lock:
+            for index, worker in enumerate(self.idle):
+                if worker.heap == heap:
+                    return self.idle.pop(index)
+            evicted = self.idle.pop(0)
+        evicted.close()
+        return JvmWorker(heap)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide pool, started on first use; None if disabled."""
+    global _pool
+    if POOL_SIZE <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = JvmPool()
+    return _pool
@@ -1,121 +1,1008 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-import subprocess, uuid, os, time, resource
+from typing import List, Optional
+import asyncio, contextlib, json, math, subprocess, os, shutil, signal, tempfile, time, resource
+import admission, cgroups, checker, compile_cache, javac_server, judge0, jvm_pool, output, payload, pch, sandbox, spawner, testdata, zygote
 
-app = FastAPI()
+app = FastAPI(default_response_class=payload.NegotiatedResponse)
+app.router.route_class = payload.MsgpackRoute
+gate = admission.Admission()
+
+
+@app.exception_handler(admission.QueueFull)
+async def queue_full(request: Request, exc: admission.QueueFull):
+    return JSONResponse(
+        status_code=429,
+        content={"error": "Runner busy", "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(testdata.Missing)
+async def testdata_missing(request: Request, exc: testdata.Missing):
+    # The client uploads the version with PUT /testdata/... and retries
+    return JSONResponse(
+        status_code=409,
+        content={
+            "error": "Test data not cached",
+            "problem": exc.problem,
+            "version": exc.version,
+        },
+    )
+
+
+class TestDataRef(BaseModel):
+    problem: str
+    version: str
+    cases: List[int]  # Case indices, used in place of inputs
+
+
+class TestData(BaseModel):
+    inputs: List[str]
 
 
 class CodeRequest(BaseModel):
     language: str
     code: str
     input: str = ""
+    time_limit: Optional[float] = None  # CPU seconds
+    memory_limit: Optional[int] = None  # MB
+    profile: Optional[str] = None  # Key of COMPILE_PROFILES
 
 
-def set_limits():
-    # Limit CPU time: 3 seconds
-    resource.setrlimit(resource.RLIMIT_CPU, (3, 3))
-    # Limit memory: 256 MB (in bytes)
-    resource.setrlimit(resource.RLIMIT_AS, (128 * 1024 * 1024, 256 * 1024 * 1024))
+class BatchRequest(BaseModel):
+    language: str
+    code: str
+    inputs: List[str] = []
+    testdata: Optional[TestDataRef] = None  # Cached inputs instead of `inputs`
+    fail_fast: bool = False
+    # SHA-256 of each input's expected answer, see checker; the runner then
+    # returns verdicts instead of full output
+    expected_hashes: Optional[List[str]] = None
+    time_limit: Optional[float] = None  # CPU seconds, per input
+    memory_limit: Optional[int] = None  # MB, per input
+    profile: Optional[str] = None  # Key of COMPILE_PROFILES
 
 
-@app.post("/run")
-def run_code(req: CodeRequest):
-    uid = str(uuid.uuid4())
-    file_path = f"/tmp/code_{uid}"
-    input_path = f"/tmp/input_{uid}.txt"
-    bin_path = f"/tmp/bin_{uid}"
+class StreamRequest(BaseModel):
+    language: str
+    codes: List[str]
+    inputs: List[str] = []  # One per program
+    testdata: Optional[TestDataRef] = None  # Cached inputs instead of `inputs`
+    fail_fast: bool = False
+    expected_hashes: Optional[List[str]] = None  # One per program, see BatchRequest
+    time_limit: Optional[float] = None  # CPU seconds, per program
+    memory_limit: Optional[int] = None  # MB, per program
+    profile: Optional[str] = None  # Key of COMPILE_PROFILES
+
+
+# Limit CPU time: 3 seconds
+CPU_LIMIT = (3, 3)
+# Limit memory: 256 MB (in bytes)
+MEMORY_LIMIT = (128 * 1024 * 1024, 256 * 1024 * 1024)
+# Wall-clock timeout per execution, in seconds
+TIMEOUT = 5
+# Seconds a compile may take in all; longer builds fail and are not cached
+COMPILE_TIMEOUT = int(os.getenv("RUNNER_COMPILE_TIMEOUT", 30))
+
+# Address space allowed on top of a requested memory limit, for the
+# interpreter/runtime mappings that never become resident
+ADDRESS_SPACE_SLACK = 64 * 1024 * 1024
+
+# stderr markers of a program that died because an allocation failed
+OUT_OF_MEMORY_MARKERS = (
+    "MemoryError",
+    "std::bad_alloc",
+    "java.lang.OutOfMemoryError",
+    "JavaScript heap out of memory",
+)
+
+
+def run_limits(time_limit=None, memory_limit=None):
+    """
+    Limits for one execution from a request's time_limit (CPU seconds) and
+    memory_limit (MB); either left None keeps the defaults above.
+    "cpu", "memory" and "fsize" are rlimit pairs, "wall" the wall-clock
+    timeout, "time" and "memory_kb" the thresholds for TLE and MLE verdicts.
+    """
+    limits = {
+        "cpu": CPU_LIMIT,
+        "memory": MEMORY_LIMIT,
+        "fsize": (output.LIMIT, output.LIMIT),
+        "wall": TIMEOUT,
+        "time": CPU_LIMIT[0],
+        "memory_kb": MEMORY_LIMIT[0] // 1024,
+    }
+    if time_limit is not None:
+        seconds = max(1, math.ceil(time_limit))
+        limits["cpu"] = (seconds, seconds + 1)
+        limits["wall"] = time_limit * 2 + 1
+        limits["time"] = time_limit
+    if memory_limit is not None:
+        address_space = memory_limit * 1024 * 1024 + ADDRESS_SPACE_SLACK
+        limits["memory"] = (address_space, address_space)
+        limits["memory_kb"] = memory_limit * 1024
+    return limits
+
+
+def set_limits(limits):
+    resource.setrlimit(resource.RLIMIT_CPU, limits["cpu"])
+    resource.setrlimit(resource.RLIMIT_AS, limits["memory"])
+    resource.setrlimit(resource.RLIMIT_FSIZE, limits["fsize"])
+
+
+def verdict(result, limits, check_memory=True):
+    """
+    "OLE", "TLE" or "MLE" if the run broke `limits`, else None. A run is over the
+    memory limit if its peak passed it or an allocation failure killed it;
+    `check_memory=False` skips the peak check for measurements that include a
+    runtime's own footprint (a whole JVM).
+    """
+    if result.get("output_exceeded"):
+        return "OLE"
+    if result.get("error") == "Execution timed out":
+        return "TLE"
+    if result.get("error") == "Memory limit exceeded":
+        return "MLE"
+    exit_code = result.get("exit_code")
+    cpu_time = result.get("cpu_time")
+    if exit_code == -signal.SIGXCPU or (cpu_time is not None and cpu_time > limits["time"]):
+        return "TLE"
+    if check_memory and (result.get("memory_used") or 0) > limits["memory_kb"]:
+        return "MLE"
+    if exit_code and any(marker in result.get("stderr", "") for marker in OUT_OF_MEMORY_MARKERS):
+        return "MLE"
+    return None
+
 
+def workspace_root():
+    """RUNNER_WORKSPACE_DIR, else tmpfs (/dev/shm) when writable, else /tmp."""
+    root = os.getenv("RUNNER_WORKSPACE_DIR")
+    if root:
+        return root
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm/code_runner"
+    return "/tmp/code_runner"
+
+
+WORKSPACE_ROOT = workspace_root()
+
+
+@contextlib.contextmanager
+def workspace(parent=None):
+    """
+    Private scratch directory for one request (or one run inside it), removed
+    with everything in it on exit.
+    """
+    if parent is None:
+        os.makedirs(WORKSPACE_ROOT, exist_ok=True)
+    path = tempfile.mkdtemp(prefix="ws_", dir=parent or WORKSPACE_ROOT)
     try:
-        with open(input_path, "w") as f:
-            f.write(req.input)
-
-        if req.language == "python":
-            file_path += ".py"
-            with open(file_path, "w") as f:
-                f.write(req.code)
-            cmd = ["python3", file_path]
-
-        elif req.language == "c":
-            file_path += ".c"
-            with open(file_path, "w") as f:
-                f.write(req.code)
-            subprocess.run(["gcc", file_path, "-o", bin_path], check=True)
-            cmd = [bin_path]
-
-        elif req.language == "cpp":
-            file_path += ".cpp"
-            with open(file_path, "w") as f:
-                f.write(req.code)
-            subprocess.run(["g++", file_path, "-o", bin_path], check=True)
-            cmd = [bin_path]
-
-        elif req.language == "java":
-            file_path = "/tmp/Main.java"
-            with open(file_path, "w") as f:
-                f.write(req.code)
-            compile_result = subprocess.run(["javac", file_path], capture_output=True)
-            if compile_result.returncode != 0:
-                return {
-                    "stdout": "",
-                    "stderr": compile_result.stderr.decode(),
-                    "exit_code": compile_result.returncode,
-                }
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
 
-            cmd = ["java", "-cp", "/tmp", "Main"]
 
-        elif req.language == "javascript":
-            file_path += ".js"
-            with open(file_path, "w") as f:
-                f.write(req.code)
-            cmd = ["node", file_path]
-        else:
-            return {"error": "Unsupported language"}
+# Compiler, flags and build/run commands for compiled languages.
+# `build` compiles `source` (a path) into `out_dir`; `run` executes from it.
+# Languages with "profiles" also get the flags of the request's
+# COMPILE_PROFILES entry.
+COMPILED_LANGUAGES = {
+    "c": {
+        "compiler": "gcc",
+        "flags": [],
+        "profiles": True,
+        "file_name": "main.c",
+        "build": lambda flags, source, out_dir: [
+            "gcc", *flags, source, "-o", os.path.join(out_dir, "main")
+        ],
+        "run": lambda out_dir: [os.path.join(out_dir, "main")],
+    },
+    "cpp": {
+        "compiler": "g++",
+        "flags": [],
+        "profiles": True,
+        "pch": True,
+        "file_name": "main.cpp",
+        "build": lambda flags, source, out_dir: [
+            "g++", *flags, source, "-o", os.path.join(out_dir, "main")
+        ],
+        "run": lambda out_dir: [os.path.join(out_dir, "main")],
+    },
+    "java": {
+        "compiler": "javac",
+        "flags": [],
+        "file_name": "Main.java",
+        "build": lambda flags, source, out_dir: [
+            "javac", *flags, "-d", out_dir, source
+        ],
+        "run": lambda out_dir: ["java", "-cp", out_dir, "Main"],
+    },
+}
+
+
+# Named C/C++ optimisation profiles: "run" compiles fastest for the
+# interactive Run action, "submit" optimises judged submissions
+COMPILE_PROFILES = {
+    "run": ["-O0"],
+    "submit": ["-O2"],
+}
+DEFAULT_PROFILE = os.getenv("RUNNER_COMPILE_PROFILE", "run")
 
-        start = time.time()
 
-        # Try to get resource usage, fallback if not available
+def compile_flags(language, profile=None):
+    spec = COMPILED_LANGUAGES[language]
+    if not spec.get("profiles"):
+        return spec["flags"]
+    return spec["flags"] + COMPILE_PROFILES[profile or DEFAULT_PROFILE]
+
+
+@app.on_event("startup")
+def build_precompiled_headers():
+    pch.start([compile_flags("cpp", profile) for profile in COMPILE_PROFILES])
+
+
+@app.on_event("startup")
+def start_sandboxes():
+    sandbox.get_pool()
+
+
+def run_compiler(cmd, deadline):
+    """
+    Run a compiler command, capturing its output, until time.monotonic()
+    passes `deadline`; then kill it with the processes it started (cc1plus,
+    as, ld) and raise subprocess.TimeoutExpired.
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise subprocess.TimeoutExpired(cmd, COMPILE_TIMEOUT)
+    with subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True
+    ) as process:
         try:
-            usage_before = resource.getrusage(resource.RUSAGE_CHILDREN)
-        except (AttributeError, OSError):
-            usage_before = None
-
-        result = subprocess.run(
-            cmd,
-            input=req.input.encode(),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            timeout=5,
-            preexec_fn=(
-                set_limits if req.language != "java" else None
-            ),  # 🚨 Enforces the limits before execution
+            stdout, stderr = process.communicate(timeout=remaining)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.communicate()
+            raise
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+
+def compile_source(language, code, profile=None):
+    """
+    Compile `code` through the artifact cache with the flags of `profile`.
+    C++ sources that only include standard headers use the precompiled
+    header for those flags when it is ready; since it makes every standard
+    header visible, its flags are part of the cache key. A build that takes longer than
+    COMPILE_TIMEOUT seconds is killed and reported as a compile error.
+    Returns (cmd, compile_error, cache_hit).
+    """
+    spec = COMPILED_LANGUAGES[language]
+    flags = compile_flags(language, profile)
+    pch_flags = pch.flags_for(flags, code) if spec.get("pch") else []
+
+    def build(out_dir):
+        deadline = time.monotonic() + COMPILE_TIMEOUT
+        if language == "java" and javac_server.available():
+            try:
+                return javac_server.compile(code, out_dir)
+            except javac_server.Unavailable:
+                pass  # Logged once when it failed to start
+            except OSError as e:
+                print(f"Java compile server did not answer, using javac: {e}")
+
+        source_path = os.path.join(out_dir, spec["file_name"])
+        with open(source_path, "w") as f:
+            f.write(code)
+        result = run_compiler(
+            spec["build"](flags + pch_flags, source_path, out_dir), deadline
         )
+        if result.returncode != 0 and pch_flags:
+            # Everything in <bits/stdc++.h> is visible with the PCH, which can
+            # clash with the program's own names; retry as written
+            result = run_compiler(spec["build"](flags, source_path, out_dir), deadline)
+            if result.returncode != 0:
+                # Not the result of the cache key's flags
+                raise compile_cache.Uncached(result)
+        return result
 
-        end = time.time()
+    try:
+        out_dir, compile_error, cache_hit = compile_cache.get_or_compile(
+            language, spec["compiler"], flags + pch_flags, code, build
+        )
+    except subprocess.TimeoutExpired:
+        compile_error = {
+            "stderr": f"Compilation timed out after {COMPILE_TIMEOUT} seconds",
+            "exit_code": -signal.SIGKILL,
+            "diagnostics": [],
+        }
+        return None, compile_error, False
+    if compile_error is not None:
+        return None, compile_error, cache_hit
+    return spec["run"](out_dir), None, cache_hit
+
+
+def prepare(language, code, workdir, profile=None):
+    """
+    Write the source for `language` into `workdir` and compile it if needed,
+    with the flags of compile `profile`.
+    Returns (cmd, compile_error, cache_hit); cmd is None when compilation
+    failed or the language is unsupported. Compiled artifacts live in the
+    compile cache.
+    """
+    if language == "python":
+        file_path = os.path.join(workdir, "main.py")
+        with open(file_path, "w") as f:
+            f.write(code)
+        return ["python3", file_path], None, False
+
+    elif language in COMPILED_LANGUAGES:
+        return compile_source(language, code, profile)
+
+    elif language == "javascript":
+        file_path = os.path.join(workdir, "main.js")
+        with open(file_path, "w") as f:
+            f.write(code)
+        return ["node", file_path], None, False
+
+    return None, None, False
+
+
+async def execute(cmd, language, input_data, workdir, limits):
+    """
+    Run a prepared command once against `input_data` under `limits` (see
+    run_limits), measure it and add its "verdict".
+    """
+    result = await measure(cmd, language, input_data, workdir, limits)
+    # A plain `java` run's peak is the whole JVM; the heap is capped by -Xmx
+    check_memory = language != "java" or (
+        sandbox.get_pool() is None and jvm_pool.get_pool() is not None
+    )
+    return {**result, "verdict": verdict(result, limits, check_memory)}
 
-        # Try to get resource usage, fallback if not available
+
+async def measure(cmd, language, input_data, workdir, limits):
+    # The worker pools run on the host, so sandboxed runs skip them
+    sandboxed = sandbox.get_pool() is not None
+    # The worker pools block, so they run on a thread; the admission gate
+    # already bounds how many do at once
+    if language == "python" and not sandboxed and zygote.get_pool() is not None:
+        return await asyncio.to_thread(
+            execute_python, cmd[-1], input_data, workdir, limits
+        )
+    if language == "java":
+        if not sandboxed and jvm_pool.get_pool() is not None:
+            # cmd is java -cp <dir> Main
+            return await asyncio.to_thread(
+                execute_java, cmd[2], input_data, workdir, limits
+            )
+        cmd = [cmd[0], f"-Xmx{limits['memory_kb'] // 1024}m", *cmd[1:]]
+
+    with workspace(workdir) as run_dir:
+        paths = stdio_files(run_dir, input_data)
+        start = time.time()
         try:
-            usage_after = resource.getrusage(resource.RUSAGE_CHILDREN)
-            memory_used = usage_after.ru_maxrss if usage_before else 0
-        except (AttributeError, OSError):
-            memory_used = 0
+            report = await spawn(
+                cmd, paths, run_dir, limits, rlimits=language != "java"
+            )
+        except MemoryError:
+            return {"error": "Memory limit exceeded"}
+        end = time.time()
+        if report is None:
+            return {"error": "Execution timed out"}
+        return run_result(paths, report, end - start)
+
+
+async def spawn(cmd, paths, cwd, limits, rlimits=True):
+    """
+    Start `cmd` with stdin from paths["input"] and reap it with os.wait4, so
+    the report covers exactly this child: exit_code, user_time and
+    system_time (seconds), memory_used (peak KB, from its own cgroup when
+    available) and its clipped stdout and stderr. Output is streamed from
+    pipes and the program is killed as soon as either stream passes
+    output.LIMIT bytes, flagged by output_exceeded. Runs in a warm sandbox
+    when the sandbox pool is enabled. Returns None if it ran past
+    limits["wall"] seconds.
+    """
+    pool = sandbox.get_pool()
+    box = await asyncio.to_thread(pool.acquire) if pool is not None else None
+    try:
+        with cgroups.run_cgroup() as cgroup:
+            return await supervise(cmd, paths, cwd, limits, rlimits, cgroup, box)
+    finally:
+        if box is not None:
+            await asyncio.to_thread(pool.release, box)
+
+
+def start_direct(cmd, stdio, cwd, limits, rlimits, cgroup):
+    """
+    Start `cmd` on the host through the exec helper (see spawner); returns
+    (kill, wait) for it, see supervise.
+    """
+    helper = spawner.helper()
+    if helper is None:
+        return start_forked(cmd, stdio, cwd, limits, rlimits, cgroup)
 
-        time_taken = round(end - start, 4)
+    report_read, report_write = os.pipe()
+    try:
+        process = subprocess.Popen(
+            spawner.command(
+                helper, report_write, cmd, limits if rlimits else None, cgroup
+            ),
+            stdin=stdio[0],
+            stdout=stdio[1],
+            stderr=stdio[2],
+            cwd=cwd,
+            pass_fds=[report_write],
+            start_new_session=True,  # Own process group, killed as a whole
+        )
+    except BaseException:
+        os.close(report_read)
+        raise
+    finally:
+        os.close(report_write)
 
+    def wait():
+        _, status, _ = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)  # Reaped already
+        with open(report_read, "rb") as f:
+            report = spawner.parse(f.read().decode())
+        if report is None:
+            # The helper was killed along with the program
+            return {"exit_code": process.returncode, "user_time": None, "system_time": None}
+        status, user_time, system_time, max_rss = report
         return {
-            "stdout": result.stdout.decode(),
-            "stderr": result.stderr.decode(),
-            "exit_code": result.returncode,
-            "time_taken": time_taken,
-            "memory_used": memory_used,
+            "exit_code": os.waitstatus_to_exitcode(status),
+            "user_time": user_time,
+            "system_time": system_time,
+            "max_rss": max_rss,
         }
 
-    except subprocess.TimeoutExpired:
-        return {"error": "Execution timed out"}
-    except subprocess.CalledProcessError as e:
-        return {"error": "Compilation failed", "stderr": str(e)}
-    except MemoryError:
-        return {"error": "Memory limit exceeded"}
+    return kill_group(process.pid), wait
+
+
+def start_forked(cmd, stdio, cwd, limits, rlimits, cgroup):
+    """
+    start_direct without the exec helper. The child's peak RSS would include
+    the runner's own pages, so only the cgroup's peak (if any) is reported.
+    """
+
+    def preexec():
+        if cgroup:
+            cgroups.enter(cgroup)
+        if rlimits:
+            set_limits(limits)  # 🚨 Enforces the limits before execution
+
+    process = subprocess.Popen(
+        cmd,
+        stdin=stdio[0],
+        stdout=stdio[1],
+        stderr=stdio[2],
+        cwd=cwd,
+        preexec_fn=preexec,
+        start_new_session=True,  # Own process group, killed as a whole
+    )
+
+    def wait():
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)  # Reaped already
+        return {
+            "exit_code": process.returncode,
+            "user_time": usage.ru_utime,
+            "system_time": usage.ru_stime,
+        }
+
+    return kill_group(process.pid), wait
+
+
+def kill_group(pid):
+    def kill():
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    return kill
+
+
+def start_sandboxed(box, cmd, stdio, limits, rlimits, cgroup):
+    """Start `cmd` in sandbox `box`; returns (kill, wait) for it, see supervise."""
+    box_limits = None
+    if rlimits:
+        box_limits = {key: limits[key] for key in ("cpu", "memory", "fsize")}
+    box.start(cmd, *stdio, limits=box_limits, cgroup=cgroup)
+    return box.kill, box.wait
+
+
+async def supervise(cmd, paths, cwd, limits, rlimits, cgroup, box=None):
+    """
+    Run `cmd` (in `box` if given) while draining its output; see spawn.
+    The starter's wait() blocks until the program exits and returns its
+    usage, or None if the whole sandbox had to be killed.
+    """
+    stdout_read, stdout_write = os.pipe()
+    stderr_read, stderr_write = os.pipe()
+    try:
+        with open(paths["input"], "rb") as stdin:
+            stdio = (stdin.fileno(), stdout_write, stderr_write)
+            if box is not None:
+                kill, wait = start_sandboxed(box, cmd, stdio, limits, rlimits, cgroup)
+            else:
+                kill, wait = start_direct(cmd, stdio, cwd, limits, rlimits, cgroup)
+    except BaseException:
+        for fd in (stdout_read, stderr_read):
+            os.close(fd)
+        raise
+    finally:
+        os.close(stdout_write)
+        os.close(stderr_write)
+
+    captures = {"stdout": output.Capture(), "stderr": output.Capture()}
+    pipes = [open(stdout_read, "rb", buffering=0), open(stderr_read, "rb", buffering=0)]
+    readers = [
+        asyncio.ensure_future(output.drain(pipe, capture, kill))
+        for pipe, capture in zip(pipes, captures.values())
+    ]
+    waiter = asyncio.ensure_future(asyncio.to_thread(wait))
+    try:
+        done, _ = await asyncio.wait({waiter}, timeout=limits["wall"])
     finally:
-        for path in [file_path, input_path, bin_path if "bin_path" in locals() else ""]:
-            if path and os.path.exists(path):
-                os.remove(path)
+        if not waiter.done():
+            kill()
+        usage = await waiter
+        # Background processes may still hold the pipes open
+        _, pending = await asyncio.wait(readers, timeout=1)
+        for reader in pending:
+            reader.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+        for pipe in pipes:
+            pipe.close()
+
+    exceeded = any(capture.exceeded for capture in captures.values())
+    if not done and not exceeded:
+        return None
+    if usage is None:
+        # Sandbox killed for its output; nothing was measured
+        usage = {"exit_code": -signal.SIGKILL, "user_time": None, "system_time": None}
+    peak = cgroups.memory_peak(cgroup) if cgroup else None
+    report = {
+        "exit_code": usage["exit_code"],
+        "user_time": usage["user_time"],
+        "system_time": usage["system_time"],
+        "memory_used": peak,
+        "stdout": captures["stdout"].text(),
+        "stderr": captures["stderr"].text(),
+        "output_exceeded": exceeded,
+    }
+    if peak is None:
+        report["memory_used"] = usage.get("max_rss")
+    return report
+
+
+def stdio_files(run_dir, input_data):
+    """
+    Paths of a run's stdin/stdout/stderr files, with stdin written (or the
+    cached test input file, for a testdata.CachedInput); the worker pools
+    write output to the files, spawn() reads it from pipes.
+    """
+    paths = {name: os.path.join(run_dir, name) for name in ("input", "stdout", "stderr")}
+    if isinstance(input_data, testdata.CachedInput):
+        paths["input"] = input_data.path  # Read in place, never copied
+    else:
+        with open(paths["input"], "w") as f:
+            f.write(input_data)
+    return paths
+
+
+def run_result(paths, report, elapsed):
+    """
+    Response entry for a finished run. time_taken is wall time; cpu_time is
+    user + system CPU of the program alone when the report has it. Output
+    comes from the report, or from the stdio files for worker pool runs.
+    """
+    exceeded = bool(report.get("output_exceeded"))
+    outputs = {}
+    for name in ("stdout", "stderr"):
+        if name in report:
+            outputs[name] = report[name]
+        else:
+            outputs[name] = output.read_file(paths[name], exceeded)
+
+    user_time, system_time = report.get("user_time"), report.get("system_time")
+    cpu_time = report.get("cpu_time")
+    if cpu_time is None and user_time is not None:
+        cpu_time = user_time + system_time
+
+    result = {
+        "stdout": outputs["stdout"],
+        "stderr": outputs["stderr"],
+        "exit_code": report["exit_code"],
+        "time_taken": round(elapsed, 4),
+        "cpu_time": None if cpu_time is None else round(cpu_time, 4),
+        "user_time": None if user_time is None else round(user_time, 4),
+        "system_time": None if system_time is None else round(system_time, 4),
+        "memory_used": report["memory_used"],
+        "output_exceeded": exceeded,
+    }
+    return result
+
+
+def execute_in_pool(run, input_data, workdir):
+    """
+    Run a program through a warm worker pool using stdio files in a per-run
+    directory under `workdir`.
+    `run(run_dir, stdin, stdout, stderr)` returns the worker's report, which
+    must carry "exit_code" and "memory_used", or None on timeout.
+    """
+    with workspace(workdir) as run_dir:
+        paths = stdio_files(run_dir, input_data)
+        start = time.time()
+        report = run(run_dir, paths["input"], paths["stdout"], paths["stderr"])
+        end = time.time()
+        if report is None:
+            return {"error": "Execution timed out"}
+        return run_result(paths, report, end - start)
+
+
+def execute_python(source, input_data, workdir, limits):
+    """Run a Python script in a child forked from a warm zygote."""
+
+    def run(run_dir, stdin, stdout, stderr):
+        with cgroups.run_cgroup() as cgroup:
+            report = zygote.get_pool().run(
+                source,
+                stdin,
+                stdout,
+                stderr,
+                {"cpu": limits["cpu"], "memory": limits["memory"], "fsize": limits["fsize"]},
+                limits["wall"],
+                cwd=run_dir,
+                cgroup=cgroup,
+            )
+            peak = cgroups.memory_peak(cgroup) if cgroup and report else None
+        if report is None:
+            return None
+        return {
+            **report,
+            "memory_used": report["max_rss"] if peak is None else peak,
+            # The child is killed by SIGXFSZ when a stdio file reaches fsize
+            "output_exceeded": report["exit_code"] == -signal.SIGXFSZ,
+        }
+
+    return execute_in_pool(run, input_data, workdir)
+
+
+def execute_java(class_dir, input_data, workdir, limits):
+    """Run compiled Java classes on a warm JVM worker."""
+
+    def run(run_dir, stdin, stdout, stderr):
+        report = jvm_pool.get_pool().run(
+            class_dir, stdin, stdout, stderr, limits["wall"], limits["time"], output.LIMIT,
+            heap=f"{limits['memory_kb'] // 1024}m",
+        )
+        if report is None or report["status"] == "TIMEOUT":
+            return None
+        # CPU time of the submission's main thread, peak heap use during the run
+        return {
+            **report,
+            "cpu_time": report["cpu_ms"] / 1000,
+            "memory_used": report["heap_kb"],
+            "output_exceeded": report["status"] == "OUTPUT",
+        }
+
+    return execute_in_pool(run, input_data, workdir)
+
+
+def failed(result):
+    return result.get("exit_code") != 0 or result.get("verdict") is not None
+
+
+def compile_failure(compile_error):
+    return {
+        "error": "Compilation failed",
+        "stdout": "",
+        "stderr": compile_error["stderr"],
+        "exit_code": compile_error["exit_code"],
+        "diagnostics": compile_error.get("diagnostics", []),
+    }
+
+
+def unknown_profile(profile):
+    if profile is not None and profile not in COMPILE_PROFILES:
+        return {"error": f"Unknown compile profile: {profile}"}
+    return None
+
+
+def request_inputs(req):
+    """
+    stdin of each case of a batch or stream request: its inline inputs, or
+    its cached test data (raises testdata.Missing if it is not cached).
+    """
+    if req.testdata is None:
+        return req.inputs
+    ref = req.testdata
+    return [testdata.open_case(ref.problem, ref.version, index) for index in ref.cases]
+
+
+def mismatched_hashes(expected_hashes, count):
+    if expected_hashes is not None and len(expected_hashes) != count:
+        return {"error": "expected_hashes must have one entry per input"}
+    return None
+
+
+def judged(result, language, expected_hashes, index):
+    """`result`, checked against its expected answer if hashes were sent."""
+    if expected_hashes is None:
+        return result
+    return checker.judge(result, language, expected_hashes[index])
+
+
+@app.post("/run")
+async def run_code(req: CodeRequest):
+    error = unknown_profile(req.profile)
+    if error:
+        return error
+    async with gate.slot() as queue:
+        with workspace() as workdir:
+            cmd, compile_error, cache_hit = await asyncio.to_thread(
+                prepare, req.language, req.code, workdir, req.profile
+            )
+            if compile_error is not None:
+                return {**compile_failure(compile_error), "cache_hit": cache_hit, **queue}
+            if cmd is None:
+                return {"error": "Unsupported language", **queue}
+
+            limits = run_limits(req.time_limit, req.memory_limit)
+            result = await execute(cmd, req.language, req.input, workdir, limits)
+            return {**result, "cache_hit": cache_hit, **queue}
+
+
+@app.post("/run_batch")
+async def run_batch(req: BatchRequest):
+    """
+    Compile `code` once and run it against every entry of `inputs`.
+    Returns one result per input, in order. With fail_fast, cases after the
+    first non-zero exit or limit verdict are not run and come back as
+    {"skipped": true}. With expected_hashes, results carry "passed" and the
+    "WA" verdict instead of full output. With testdata, the inputs are cases
+    of a cached problem version (409 if this runner does not have it). The
+    whole batch holds one execution slot.
+    """
+    try:
+        inputs = request_inputs(req)
+    except ValueError as e:
+        return {"error": str(e)}
+    error = unknown_profile(req.profile) or mismatched_hashes(
+        req.expected_hashes, len(inputs)
+    )
+    if error:
+        return error
+    async with gate.slot() as queue:
+        with workspace() as workdir:
+            cmd, compile_error, cache_hit = await asyncio.to_thread(
+                prepare, req.language, req.code, workdir, req.profile
+            )
+            if compile_error is not None:
+                failure = compile_failure(compile_error)
+                return {
+                    "compiled": False,
+                    "cache_hit": cache_hit,
+                    "results": [failure] * len(inputs),
+                    **queue,
+                }
+            if cmd is None:
+                return {"error": "Unsupported language", **queue}
+
+            limits = run_limits(req.time_limit, req.memory_limit)
+            results = []
+            for index, input_data in enumerate(inputs):
+                if req.fail_fast and results and failed(results[-1]):
+                    results.append({"skipped": True})
+                    continue
+                result = await execute(cmd, req.language, input_data, workdir, limits)
+                results.append(judged(result, req.language, req.expected_hashes, index))
+
+            return {"compiled": True, "cache_hit": cache_hit, "results": results, **queue}
+
+
+@app.post("/run_stream")
+async def run_stream(req: StreamRequest):
+    """
+    Run each of `codes` against the input at the same position, streaming
+    one NDJSON line per program, {"index": i, ...result}, as soon as it
+    finishes. Identical programs compile once through the compile cache.
+    With fail_fast the stream ends after the first non-zero exit or limit
+    verdict (including "WA" when expected_hashes are sent). A client that
+    disconnects cancels the programs not yet run; the whole stream holds one
+    execution slot.
+    """
+    try:
+        inputs = request_inputs(req)
+    except ValueError as e:
+        return JSONResponse(status_code=422, content={"error": str(e)})
+    error = unknown_profile(req.profile) or mismatched_hashes(
+        req.expected_hashes, len(req.codes)
+    )
+    if error is None and len(req.codes) != len(inputs):
+        error = {"error": "codes and inputs must have the same length"}
+    if error:
+        return JSONResponse(status_code=422, content=error)
+    gate.check()  # Reject with 429 while a status can still be sent
+
+    async def results():
+        try:
+            async with gate.slot() as queue:
+                async for line in stream_results(req, inputs, queue):
+                    yield line
+        except admission.QueueFull as e:
+            busy = {"error": "Runner busy", "retry_after": e.retry_after}
+            yield json.dumps(busy) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+async def stream_results(req, inputs, queue):
+    """NDJSON lines of a /run_stream request, run while holding a slot."""
+    limits = run_limits(req.time_limit, req.memory_limit)
+    for index, (code, input_data) in enumerate(zip(req.codes, inputs)):
+        with workspace() as workdir:
+            cmd, compile_error, cache_hit = await asyncio.to_thread(
+                prepare, req.language, code, workdir, req.profile
+            )
+            if compile_error is not None:
+                result = compile_failure(compile_error)
+            elif cmd is None:
+                result = {"error": "Unsupported language"}
+            else:
+                result = await execute(cmd, req.language, input_data, workdir, limits)
+                result = judged(result, req.language, req.expected_hashes, index)
+        result = {"index": index, **result, "cache_hit": cache_hit, **queue}
+        yield json.dumps(result) + "\n"
+        if req.fail_fast and (failed(result) or "error" in result):
+            return
+
+
+@app.put("/testdata/{problem}/{version}")
+async def put_testdata(problem: str, version: str, body: TestData):
+    """Cache the inputs of one version of a problem's test data."""
+    try:
+        await asyncio.to_thread(testdata.store, problem, version, body.inputs)
+    except ValueError as e:
+        return JSONResponse(status_code=422, content={"error": str(e)})
+    return {"problem": problem, "version": version, "cases": len(body.inputs)}
+
+
+@app.get("/testdata/{problem}/{version}")
+async def get_testdata(problem: str, version: str):
+    try:
+        count = testdata.cases(problem, version)
+    except ValueError as e:
+        return JSONResponse(status_code=422, content={"error": str(e)})
+    if count is None:
+        return JSONResponse(status_code=404, content={"error": "Test data not cached"})
+    return {"problem": problem, "version": version, "cases": count}
+
+
+# ------------------------
+# Judge0-compatible API
+# ------------------------
+class Judge0Submission(BaseModel):
+    source_code: Optional[str] = None
+    language_id: Optional[int] = None
+    stdin: Optional[str] = None
+    expected_output: Optional[str] = None
+    cpu_time_limit: Optional[float] = None  # Seconds
+    wall_time_limit: Optional[float] = None  # Seconds, derived from cpu_time_limit here
+    memory_limit: Optional[int] = None  # KB
+    compiler_options: Optional[str] = None  # Flags of a COMPILE_PROFILES entry
+
+
+class Judge0Batch(BaseModel):
+    submissions: List[Judge0Submission]
+
+
+async def run_submission(submission):
+    """Execute one Judge0 submission, holding an execution slot like /run."""
+    limits = run_limits(submission["time_limit"], submission["memory_limit_mb"])
+    while True:
+        try:
+            async with gate.slot():
+                with workspace() as workdir:
+                    cmd, compile_error, _ = await asyncio.to_thread(
+                        prepare,
+                        submission["language"],
+                        submission["source_code"],
+                        workdir,
+                        submission["profile"],
+                    )
+                    if compile_error is not None:
+                        return compile_failure(compile_error)
+                    if cmd is None:
+                        return {"error": "Unsupported language"}
+                    stdin = submission.get("stdin") or ""
+                    return await execute(
+                        cmd, submission["language"], stdin, workdir, limits
+                    )
+        except admission.QueueFull as e:
+            await asyncio.sleep(e.retry_after)
+
+
+emulator = judge0.Emulator(
+    run_submission,
+    profiles={" ".join(flags): name for name, flags in COMPILE_PROFILES.items()},
+)
+
+
+@app.on_event("startup")
+async def start_judge0_workers():
+    emulator.start()
+
+
+def judge0_fields(fields):
+    if fields is None or fields == "*":
+        return fields
+    return [field.strip() for field in fields.split(",")]
+
+
+@app.post("/submissions", status_code=201)
+async def create_submission(
+    body: Judge0Submission, base64_encoded: bool = False, wait: bool = False
+):
+    try:
+        submission = emulator.parse(body.dict(exclude_none=True), base64_encoded)
+    except judge0.InvalidSubmission as e:
+        return JSONResponse(status_code=422, content=e.errors)
+    emulator.submit(submission)
+    if wait:
+        await submission["done"].wait()
+        return emulator.render(submission, base64_encoded)
+    return {"token": submission["token"]}
+
+
+@app.post("/submissions/batch", status_code=201)
+async def create_submission_batch(body: Judge0Batch, base64_encoded: bool = False):
+    """One {"token"} per submission, or its validation errors, in order."""
+    entries = []
+    for item in body.submissions:
+        try:
+            submission = emulator.parse(item.dict(exclude_none=True), base64_encoded)
+        except judge0.InvalidSubmission as e:
+            entries.append(e.errors)
+            continue
+        emulator.submit(submission)
+        entries.append({"token": submission["token"]})
+    return entries
+
+
+@app.get("/submissions/batch")
+async def get_submission_batch(
+    tokens: str, base64_encoded: bool = False, fields: Optional[str] = None
+):
+    results = []
+    for token in tokens.split(","):
+        submission = emulator.get(token.strip())
+        if submission is None:
+            # Unknown or expired; keep the entry so results line up with tokens
+            results.append(
+                {
+                    "token": token.strip(),
+                    "status": {"id": 13, "description": judge0.STATUSES[13]},
+                    "message": judge0.encode("Submission not found", base64_encoded),
+                }
+            )
+        else:
+            results.append(
+                emulator.render(submission, base64_encoded, judge0_fields(fields))
+            )
+    return {"submissions": results}
+
+
+@app.get("/submissions/{token}")
+async def get_submission(
+    token: str, base64_encoded: bool = False, fields: Optional[str] = None
+):
+    submission = emulator.get(token)
+    if submission is None:
+        return JSONResponse(status_code=404, content={"error": "", "message": "Not Found"})
+    return emulator.render(submission, base64_encoded, judge0_fields(fields))
@@ -0,0 +1,91 @@
+"""
+Bounded capture of a program's stdout and stderr.
+
+Each stream may produce at most LIMIT bytes. Output read from a pipe is
+accumulated by a Capture that reports the overflow as soon as the limit is
+passed, so the runner can kill the program instead of buffering everything
+it prints. Output of runs that exceeded the limit is clipped to its first
+and last KEEP bytes for display.
+"""
+
+import asyncio, os
+
+LIMIT = int(os.getenv("RUNNER_OUTPUT_LIMIT", 1024 * 1024))
+KEEP = int(os.getenv("RUNNER_OUTPUT_KEEP", 32 * 1024))
+
+CHUNK_SIZE = 65536
+
+
+class Capture:
+    """Output of one stream, holding at most `limit` bytes plus one chunk."""
+
+    def __init__(self, limit=LIMIT):
+        self.limit = limit
+        self.data = bytearray()
+        self.size = 0
+
+    @property
+    def exceeded(self):
+        return self.size > self.limit
+
+    def feed(self, chunk):
+        """Add `chunk`; returns False once the stream is over the limit."""
+        if not self.exceeded:
+            self.data += chunk
+        self.size += len(chunk)
+        return not self.exceeded
+
+    def text(self):
+        return clip(bytes(self.data), self.exceeded)
+
+
+def clip(data, exceeded):
+    """Decode `data`, keeping only its head and tail if the limit was exceeded."""
+    if exceeded and len(data) > 2 * KEEP:
+        return join(data[:KEEP], data[-KEEP:], len(data) - 2 * KEEP)
+    return data.decode(errors="replace")
+
+
+def join(head, tail, omitted):
+    marker = f"\n... [{omitted} bytes omitted, output limit exceeded] ...\n"
+    return head.decode(errors="replace") + marker + tail.decode(errors="replace")
+
+
+async def drain(pipe, capture, on_overflow):
+    """
+    Read `pipe` (a file object) into `capture` until EOF, calling
+    `on_overflow()` and stopping as soon as the limit is passed.
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    transport, _ = await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), pipe
+    )
+    try:
+        while True:
+            chunk = await reader.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            if not capture.feed(chunk):
+                on_overflow()
+                return
+    finally:
+        transport.close()
+
+
+def read_file(path, exceeded=False):
+    """
+    Decoded contents of an output file written by a worker, read only up to
+    LIMIT bytes plus the tail; "" if it does not exist.
+    """
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size <= LIMIT:
+                return clip(f.read(), exceeded)
+            head = f.read(KEEP)
+            f.seek(size - KEEP)
+            tail = f.read(KEEP)
+    except FileNotFoundError:
+        return ""
+    return join(head, tail, size - 2 * KEEP)
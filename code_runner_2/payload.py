@@ -0,0 +1,77 @@
+"""
+Optional msgpack encoding for runner requests and responses.
+
+Routes use MsgpackRoute: a body sent as `Content-Type: application/msgpack`
+is unpacked straight into the endpoint's model, with no JSON step, and the
+value an endpoint returns is packed by NegotiatedResponse when the request
+sent `Accept: application/msgpack`. Programs, inputs and outputs are mostly
+strings, so msgpack saves the JSON escaping of newlines and quotes and its
+parsing on both ends. Responses the endpoints build themselves (errors,
+NDJSON streams) stay JSON, and JSON clients are unaffected.
+"""
+
+import contextvars
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+try:
+    import msgpack
+except ImportError:  # Without it only JSON is served
+    msgpack = None
+
+MSGPACK_TYPE = "application/msgpack"
+
+# Whether the request being handled accepts a msgpack response
+_accepts_msgpack = contextvars.ContextVar("accepts_msgpack", default=False)
+
+
+class MsgpackRequest(Request):
+    """Request with a msgpack body, unpacked where FastAPI reads JSON."""
+
+    async def json(self):
+        if not hasattr(self, "_json"):
+            self._json = msgpack.unpackb(await self.body())
+        return self._json
+
+
+class MsgpackRoute(APIRoute):
+    """Route that reads msgpack bodies and negotiates msgpack responses."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def route_handler(request):
+            if request.headers.get("content-type", "").startswith(MSGPACK_TYPE):
+                if msgpack is None:
+                    raise HTTPException(415, "msgpack is not installed")
+                # Labelled JSON so FastAPI reads the body through json()
+                headers = [
+                    (key, value)
+                    for key, value in request.scope["headers"]
+                    if key != b"content-type"
+                ] + [(b"content-type", b"application/json")]
+                request = MsgpackRequest(
+                    dict(request.scope, headers=headers), request.receive
+                )
+            accepts = msgpack is not None and MSGPACK_TYPE in request.headers.get(
+                "accept", ""
+            )
+            token = _accepts_msgpack.set(accepts)
+            try:
+                return await handler(request)
+            finally:
+                _accepts_msgpack.reset(token)
+
+        return route_handler
+
+
+class NegotiatedResponse(JSONResponse):
+    """Default response class: msgpack for clients that accept it, else JSON."""
+
+    def render(self, content):
+        if _accepts_msgpack.get():
+            self.media_type = MSGPACK_TYPE
+            return msgpack.packb(content)
+        return super().render(content)
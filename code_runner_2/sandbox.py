@@ -0,0 +1,353 @@
+"""
+Pool of warm sandboxes for isolated execution.
+
+A sandbox is a long-lived agent process started by `unshare` in its own
+user, mount, PID, network, IPC and UTS namespaces. On startup the agent
+remounts every filesystem read-only inside its mount namespace, mounts a
+fresh /proc and a size-limited tmpfs at WORKDIR, and then waits for jobs.
+For every job it forks a child that joins the run's cgroup, moves into a
+nested user namespace (so it cannot undo the read-only mounts), applies the
+resource limits and execs the command in WORKDIR with the stdio file
+descriptors passed over the control socket, through the exec helper (see
+spawner) so the reported peak memory is the command's own. When the child
+exits the agent kills anything it left behind, replaces the tmpfs with an
+empty one and reports the child's exit status and resource usage, ready for
+the next job.
+
+Setting up the namespaces is paid once per sandbox, not per run; handing a
+job to a warm sandbox costs a socket round trip. A sandbox that is killed
+(timeout, output limit) is replaced by a fresh one.
+
+Run as a script, this module is the agent: it talks to the runner over the
+SOCK_SEQPACKET socket whose file descriptor is passed as argv[1], one JSON
+message per packet.
+"""
+
+import ctypes, json, os, queue, select, signal, socket, subprocess, sys, threading
+
+import spawner
+
+POOL_SIZE = int(os.getenv("RUNNER_SANDBOXES", 0))
+WORKDIR = os.getenv("RUNNER_SANDBOX_WORKDIR", "/sandbox")
+TMPFS_SIZE = os.getenv("RUNNER_SANDBOX_TMPFS_SIZE", "64m")
+
+# Seconds a new sandbox may take to set up its namespaces
+READY_TIMEOUT = 10
+
+UNSHARE = [
+    "unshare", "--user", "--map-root-user", "--mount", "--pid", "--net",
+    "--ipc", "--uts", "--kill-child",
+]
+
+# <sys/mount.h> and <sched.h>
+MS_RDONLY = 1
+MS_NOSUID = 2
+MS_NODEV = 4
+MS_NOEXEC = 8
+MS_REMOUNT = 32
+MS_NOATIME = 1024
+MS_NODIRATIME = 2048
+MS_BIND = 4096
+MS_REC = 16384
+MS_PRIVATE = 1 << 18
+MS_RELATIME = 1 << 21
+MS_STRICTATIME = 1 << 24
+MNT_DETACH = 2
+CLONE_NEWNS = 0x00020000
+CLONE_NEWUSER = 0x10000000
+
+# Per-mount options that must be kept when remounting inside a user namespace
+MOUNT_FLAGS = {
+    "nosuid": MS_NOSUID,
+    "nodev": MS_NODEV,
+    "noexec": MS_NOEXEC,
+    "noatime": MS_NOATIME,
+    "nodiratime": MS_NODIRATIME,
+    "relatime": MS_RELATIME,
+    "strictatime": MS_STRICTATIME,
+}
+
+# Filesystems left writable: per-run cgroups are joined from inside
+WRITABLE_FSTYPES = ("cgroup2",)
+
+libc = ctypes.CDLL(None, use_errno=True)
+
+
+def check(result, what):
+    if result != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, f"{what}: {os.strerror(errno)}")
+
+
+def mount(source, target, fstype, flags, data=None):
+    check(
+        libc.mount(
+            source and source.encode(),
+            target.encode(),
+            fstype and fstype.encode(),
+            flags,
+            data and data.encode(),
+        ),
+        f"mount {target}",
+    )
+
+
+# ------------------------
+# Agent process
+# ------------------------
+def mounts():
+    """Yield (mount point, per-mount flags, fstype) from /proc/self/mountinfo."""
+    with open("/proc/self/mountinfo") as f:
+        for line in f:
+            fields, _, super_fields = line.partition(" - ")
+            fields = fields.split()
+            path = fields[4].encode().decode("unicode_escape")  # Octal escapes
+            flags = 0
+            for option in fields[5].split(","):
+                flags |= MOUNT_FLAGS.get(option, 0)
+            yield path, flags, super_fields.split()[0]
+
+
+def mount_tmpfs():
+    mount("tmpfs", WORKDIR, "tmpfs", MS_NOSUID | MS_NODEV, f"size={TMPFS_SIZE},mode=1777")
+
+
+def setup():
+    mount(None, "/", None, MS_REC | MS_PRIVATE)
+    if not os.path.isdir(WORKDIR):
+        os.makedirs(WORKDIR)
+    for path, flags, fstype in list(mounts()):
+        if fstype in WRITABLE_FSTYPES:
+            continue
+        try:
+            mount(None, path, None, MS_REMOUNT | MS_BIND | MS_RDONLY | flags)
+        except OSError:
+            pass  # Shadowed or vanished mounts cannot be remounted
+    try:
+        mount("proc", "/proc", "proc", MS_NOSUID | MS_NODEV | MS_NOEXEC)
+    except OSError:
+        pass  # Not allowed under some container runtimes; the host's stays read-only
+    mount_tmpfs()
+
+
+def run_child(job, fds, report):
+    """
+    Runs in the forked child; never returns. With the exec helper (see
+    spawner), the helper applies the limits and reports to `report`.
+    """
+    import resource
+
+    try:
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+        for fd in fds:
+            os.close(fd)
+        if job.get("cgroup"):
+            with open(os.path.join(job["cgroup"], "cgroup.procs"), "w") as f:
+                f.write("0")
+        # A nested user namespace locks the read-only mounts in place
+        check(libc.unshare(CLONE_NEWUSER | CLONE_NEWNS), "unshare")
+        os.chdir(WORKDIR)
+        limits = job.get("limits") or {}
+        cmd = job["cmd"]
+        if job.get("spawn"):
+            os.set_inheritable(report, True)
+            cmd = spawner.command(job["spawn"], report, cmd, limits)
+            limits = {}
+        for key, which in (
+            ("cpu", resource.RLIMIT_CPU),
+            ("memory", resource.RLIMIT_AS),
+            ("fsize", resource.RLIMIT_FSIZE),
+        ):
+            if key in limits:
+                resource.setrlimit(which, tuple(limits[key]))
+        signal.signal(signal.SIGXFSZ, signal.SIG_DFL)
+        os.execvp(cmd[0], cmd)
+    except BaseException as e:
+        os.write(2, f"Sandbox could not start {job['cmd'][0]}: {e}\n".encode())
+    os._exit(127)
+
+
+def reset():
+    """Kill whatever the job left running and give WORKDIR a fresh tmpfs."""
+    try:
+        os.kill(-1, signal.SIGKILL)  # As PID 1: every other process in the namespace
+    except ProcessLookupError:
+        pass
+    while True:
+        try:
+            os.waitpid(-1, 0)
+        except ChildProcessError:
+            break
+    check(libc.umount2(WORKDIR.encode(), MNT_DETACH), f"umount {WORKDIR}")
+    mount_tmpfs()
+
+
+def agent_main(fd):
+    sock = socket.socket(fileno=fd)
+    try:
+        setup()
+    except OSError as e:
+        sock.send(json.dumps({"error": str(e)}).encode())
+        return
+    sock.send(json.dumps({"ready": True}).encode())
+
+    while True:
+        message, fds, _, _ = socket.recv_fds(sock, 65536, 3)
+        if not message:
+            return
+        job = json.loads(message)
+        report_read, report_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            sock.close()
+            os.close(report_read)
+            run_child(job, fds, report_write)
+        os.close(report_write)
+        for passed in fds:
+            os.close(passed)
+
+        _, status, usage = os.wait4(pid, 0)
+        with open(report_read, "rb") as f:
+            helper_report = spawner.parse(f.read().decode())
+        reset()
+        result = {
+            "exit_code": os.waitstatus_to_exitcode(status),
+            "user_time": usage.ru_utime,
+            "system_time": usage.ru_stime,
+        }
+        if helper_report is not None:
+            # The program's own usage; a child of this agent starts with its pages
+            status, user_time, system_time, max_rss = helper_report
+            result = {
+                "exit_code": os.waitstatus_to_exitcode(status),
+                "user_time": user_time,
+                "system_time": system_time,
+                "max_rss": max_rss,
+            }
+        sock.send(json.dumps(result).encode())
+
+
+# ------------------------
+# Runner side
+# ------------------------
+class Sandbox:
+    """Handle on one sandbox agent and its control socket."""
+
+    def __init__(self):
+        parent_sock, child_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        self.process = subprocess.Popen(
+            [*UNSHARE, sys.executable, os.path.abspath(__file__), str(child_sock.fileno())],
+            pass_fds=[child_sock.fileno()],
+            stdin=subprocess.DEVNULL,
+        )
+        child_sock.close()
+        self.sock = parent_sock
+        self.ready = False
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def close(self):
+        self.sock.close()
+        self.kill()
+        self.process.wait()
+
+    def kill(self):
+        """Tear the sandbox down, with everything running in it."""
+        try:
+            self.process.kill()  # --kill-child takes the agent (PID 1) with it
+        except ProcessLookupError:
+            pass
+
+    def wait_ready(self, timeout=READY_TIMEOUT):
+        if self.ready:
+            return
+        if not select.select([self.sock], [], [], timeout)[0]:
+            raise RuntimeError("Sandbox did not start in time")
+        message = self.sock.recv(65536)
+        status = json.loads(message) if message else {"error": "agent exited"}
+        if not status.get("ready"):
+            raise RuntimeError(f"Sandbox could not be set up: {status.get('error')}")
+        self.ready = True
+
+    def start(self, cmd, stdin, stdout, stderr, limits=None, cgroup=None):
+        """
+        Start `cmd` on the given stdio file descriptors, under `limits`
+        (rlimit pairs "cpu", "memory", "fsize"; None for none) and in
+        `cgroup` if given.
+        """
+        self.wait_ready()
+        job = {"cmd": cmd, "limits": limits, "cgroup": cgroup, "spawn": spawner.helper()}
+        socket.send_fds(self.sock, [json.dumps(job).encode()], [stdin, stdout, stderr])
+
+    def wait(self):
+        """
+        Block until the job finishes and return the agent's report
+        (exit_code, user_time, system_time, and max_rss when measured), or
+        None if the sandbox was killed.
+        """
+        try:
+            message = self.sock.recv(65536)
+        except OSError:
+            return None
+        return json.loads(message) if message else None
+
+
+class SandboxPool:
+    """Fixed-size pool of warm sandboxes; each runs one job at a time."""
+
+    def __init__(self, size=POOL_SIZE):
+        self.idle = queue.Queue()
+        for _ in range(size):
+            sandbox = Sandbox()
+            try:
+                sandbox.wait_ready()
+            except RuntimeError:
+                sandbox.close()
+                self.close()
+                raise
+            self.idle.put(sandbox)
+
+    def acquire(self):
+        return self.idle.get()
+
+    def release(self, sandbox):
+        """Return `sandbox` to the pool, replacing it if it was killed."""
+        if not sandbox.alive():
+            sandbox.close()
+            sandbox = Sandbox()
+        self.idle.put(sandbox)
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get().close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_disabled = POOL_SIZE <= 0
+
+
+def get_pool():
+    """
+    Return the process-wide pool, started on first use; None if disabled or
+    if namespaces are not available here.
+    """
+    global _pool, _disabled
+    if _disabled:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None and not _disabled:
+                try:
+                    _pool = SandboxPool()
+                except (OSError, RuntimeError) as e:
+                    print(f"Sandboxes unavailable, running code unsandboxed: {e}")
+                    _disabled = True
+                    return None
+    return _pool
+
+
+if __name__ == "__main__":
+    agent_main(int(sys.argv[1]))
@@ -0,0 +1,76 @@
+"""
+Exec helper for runs on the host (see c/spawn.c).
+
+A child forked from the runner starts with the runner's resident pages, and
+the kernel carries that peak across exec, so wait4 would report the
+runner's size as the program's peak RSS. Programs are instead started
+through a small C helper that forks them from its own near-empty image,
+applies the cgroup and rlimits, and reports the program's own exit status,
+CPU times and peak RSS over a pipe. The helper is compiled on first use.
+"""
+
+import os, subprocess, threading
+
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "c", "spawn.c")
+BUILD_DIR = os.getenv("RUNNER_SPAWN_DIR", "/tmp/runner_spawn")
+COMPILER = "gcc"
+BUILD_TIMEOUT = 60
+
+_helper = None
+_lock = threading.Lock()
+
+
+def helper():
+    """Path of the compiled helper, built once; None if it cannot be built."""
+    global _helper
+    if _helper is None:
+        with _lock:
+            if _helper is None:
+                _helper = build() or ""
+    return _helper or None
+
+
+def build():
+    path = os.path.join(BUILD_DIR, "spawn")
+    if os.path.exists(path):
+        return path
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    staging = f"{path}.{os.getpid()}"
+    try:
+        result = subprocess.run(
+            [COMPILER, "-O2", SOURCE, "-o", staging],
+            capture_output=True,
+            timeout=BUILD_TIMEOUT,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print(f"Exec helper not built, peak memory goes unmeasured: {e}")
+        return None
+    if result.returncode != 0:
+        print(f"Exec helper not built, peak memory goes unmeasured: {result.stderr.decode()}")
+        return None
+    os.replace(staging, path)
+    return path
+
+
+def command(path, report_fd, cmd, limits=None, cgroup=None):
+    """
+    argv running `cmd` through the helper at `path`, reporting to
+    `report_fd`, in `cgroup` and under `limits` (rlimit pairs "cpu",
+    "memory", "fsize") when given.
+    """
+    values = []
+    for key in ("cpu", "memory", "fsize"):
+        pair = limits[key] if limits and key in limits else ("-", "-")
+        values += [str(value) for value in pair]
+    return [path, str(report_fd), cgroup or "-", *values, *cmd]
+
+
+def parse(report):
+    """
+    The helper's report as (wait status, user_time, system_time, max_rss),
+    or None if it wrote none (it was killed).
+    """
+    fields = report.split()
+    if len(fields) != 4:
+        return None
+    return int(fields[0]), float(fields[1]), float(fields[2]), int(fields[3])
@@ -0,0 +1,130 @@
+"""
+Local cache of problems' test inputs.
+
+Test inputs are synced to each runner once per problem version and stored
+as files under CACHE_DIR/<problem>/<version>/<index>.in. Run requests can
+then name their cases by (problem, version, index) instead of carrying the
+input inline, and the program's stdin is opened straight from the cached
+file. Storing a new version of a problem removes its older ones; when the
+cache grows past CACHE_MAX_BYTES the least recently used problems are
+evicted, as in the compile cache.
+"""
+
+import os, re, shutil, threading, time, uuid
+
+import compile_cache
+
+CACHE_DIR = os.getenv("RUNNER_TESTDATA_DIR", "/tmp/runner_testdata")
+CACHE_MAX_BYTES = int(os.getenv("RUNNER_TESTDATA_MAX_BYTES", 1024 * 1024 * 1024))
+
+# Versions used this recently are not removed, so a run can still open them
+EVICTION_GRACE_SECONDS = 60
+
+NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+_lock = threading.Lock()
+
+
+class Missing(Exception):
+    """The requested problem version is not cached on this runner."""
+
+    def __init__(self, problem, version):
+        super().__init__(f"Test data {problem}/{version} is not cached")
+        self.problem = problem
+        self.version = version
+
+
+class CachedInput:
+    """stdin of a run, read from a cached test input file."""
+
+    __slots__ = ("path",)
+
+    def __init__(self, path):
+        self.path = path
+
+
+def version_dir(problem, version):
+    if not (NAME_PATTERN.match(problem) and NAME_PATTERN.match(version)):
+        raise ValueError("Problem and version must be 1-64 letters, digits, _ or -")
+    return os.path.join(CACHE_DIR, problem, version)
+
+
+def cases(problem, version):
+    """Number of cached cases of `version`, or None if it is not cached."""
+    directory = version_dir(problem, version)
+    try:
+        os.utime(directory)
+        return len([name for name in os.listdir(directory) if name.endswith(".in")])
+    except FileNotFoundError:
+        return None
+
+
+def store(problem, version, inputs):
+    """Cache `inputs` as `version` of `problem`, replacing its older versions."""
+    directory = version_dir(problem, version)
+    problem_dir = os.path.dirname(directory)
+    staging = os.path.join(problem_dir, f".staging_{uuid.uuid4().hex}")
+    os.makedirs(staging)
+    try:
+        for index, input_data in enumerate(inputs):
+            with open(os.path.join(staging, f"{index}.in"), "w") as f:
+                f.write(input_data)
+        try:
+            os.rename(staging, directory)
+        except OSError:
+            shutil.rmtree(staging)  # Stored concurrently by another request
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    now = time.time()
+    for entry in os.scandir(problem_dir):
+        if entry.name == version or entry.name.startswith("."):
+            continue
+        try:
+            if now - entry.stat().st_mtime >= EVICTION_GRACE_SECONDS:
+                shutil.rmtree(entry.path, ignore_errors=True)
+        except OSError:
+            pass
+    evict()
+
+
+def open_case(problem, version, index):
+    """
+    CachedInput for case `index` of a version; raises Missing if the version
+    is not cached and ValueError if it has no such case.
+    """
+    directory = version_dir(problem, version)
+    try:
+        os.utime(directory)
+    except FileNotFoundError:
+        raise Missing(problem, version)
+    path = os.path.join(directory, f"{index}.in")
+    if not os.path.exists(path):
+        raise ValueError(f"Test data {problem}/{version} has no case {index}")
+    return CachedInput(path)
+
+
+def evict():
+    """Remove least recently used problems until the cache fits CACHE_MAX_BYTES."""
+    with _lock:
+        entries = []
+        for problem in os.scandir(CACHE_DIR):
+            for entry in os.scandir(problem.path):
+                if entry.is_dir() and not entry.name.startswith("."):
+                    try:
+                        mtime = entry.stat().st_mtime
+                    except OSError:
+                        continue
+                    size = compile_cache.directory_size(entry.path)
+                    entries.append((mtime, entry.path, size))
+
+        total = sum(size for _, _, size in entries)
+        now = time.time()
+        for mtime, path, size in sorted(entries):
+            if total <= CACHE_MAX_BYTES:
+                break
+            if now - mtime < EVICTION_GRACE_SECONDS:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
@@ -0,0 +1,68 @@
+import checker
+import pytest
+
+
+@pytest.mark.parametrize(
+    "stdout, language, expected",
+    [
+        ("debug line\n[1, 2]\n", "python", [1, 2]),
+        ('"a b"', "c", "a b"),
+        ("not json", "python", "not json"),
+        ("42\n", "cpp", 42),
+        ("2.5", "java", 2.5),
+        ("  hello  \n\n", "cpp", "hello"),
+        ("", "python", None),
+    ],
+)
+def test_answer_reads_last_line(stdout, language, expected):
+    assert checker.answer(stdout, language) == expected
+
+
+@pytest.mark.parametrize(
+    "output, expected",
+    [
+        (3.0, 3),
+        (True, 1),
+        (False, 0),
+        (" a b ", "a b"),
+        ([1.0, True], [1, 1]),
+        ({"x": 2.0}, {"x": 2}),
+    ],
+)
+def test_digest_matches_values_the_views_find_equal(output, expected):
+    assert checker.digest(output) == checker.digest(expected)
+
+
+@pytest.mark.parametrize(
+    "output, expected",
+    [(3.5, 3), ("3", 3), ([" a"], ["a"]), ([1, 2], [2, 1])],
+)
+def test_digest_tells_different_values_apart(output, expected):
+    assert checker.digest(output) != checker.digest(expected)
+
+
+def test_judge_passes_equal_answers_and_drops_output():
+    result = {"stdout": "3.0\n", "stderr": "", "exit_code": 0, "verdict": None}
+    judged = checker.judge(result, "cpp", checker.digest(3))
+    assert judged["passed"] is True
+    assert judged["stdout"] == ""
+
+
+def test_judge_marks_wrong_answers():
+    result = {"stdout": "4\n", "stderr": "", "exit_code": 0, "verdict": None}
+    judged = checker.judge(result, "python", checker.digest(3))
+    assert judged["passed"] is False
+    assert judged["verdict"] == "WA"
+    assert judged["stdout"] == "4\n"
+
+
+def test_judge_keeps_limit_verdicts():
+    result = {"stdout": "3\n", "stderr": "", "exit_code": -9, "verdict": "TLE"}
+    judged = checker.judge(result, "python", checker.digest(3))
+    assert judged["passed"] is False
+    assert judged["verdict"] == "TLE"
+
+
+def test_judge_fails_programs_that_did_not_run():
+    judged = checker.judge({"error": "Compilation failed"}, "cpp", checker.digest(3))
+    assert judged["passed"] is False
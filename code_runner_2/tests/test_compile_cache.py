@@ -0,0 +1,78 @@
+import os, shutil, subprocess, time
+
+import pytest
+
+import compile_cache, main, pch
+
+pytestmark = pytest.mark.skipif(shutil.which("gcc") is None, reason="no gcc")
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(compile_cache, "CACHE_DIR", str(tmp_path / "cache"))
+    os.makedirs(compile_cache.CACHE_DIR)
+
+
+def test_compile_errors_name_the_submissions_file():
+    cmd, error, cache_hit = main.compile_source("c", "int main() { return x; }")
+
+    assert cmd is None
+    assert error["stderr"].startswith("main.c: In function")
+    assert "main.c:1:" in error["stderr"]
+    assert compile_cache.CACHE_DIR not in error["stderr"]
+    # Cached with the same text
+    assert main.compile_source("c", "int main() { return x; }")[1:] == (error, True)
+
+
+def test_compile_past_the_timeout_fails_uncached(monkeypatch):
+    monkeypatch.setattr(main, "COMPILE_TIMEOUT", 0)
+
+    cmd, error, cache_hit = main.compile_source("c", "int main() { return 0; }")
+
+    assert cmd is None
+    assert error["stderr"] == "Compilation timed out after 0 seconds"
+    assert not cache_hit
+    assert not [name for name in os.listdir(compile_cache.CACHE_DIR)]
+
+
+def test_timeout_kills_the_compilers_children(tmp_path):
+    marker = tmp_path / "survived"
+    start = time.monotonic()
+
+    with pytest.raises(subprocess.TimeoutExpired):
+        main.run_compiler(
+            ["sh", "-c", f"(sleep 1; touch {marker}) & wait"], time.monotonic() + 0.2
+        )
+
+    assert time.monotonic() - start < 1
+    time.sleep(1.2)
+    assert not marker.exists()
+
+
+MISSING_INCLUDE = "#include <cstdio>\nint main() { std::vector<int> v; return 0; }"
+
+
+def use_pch(monkeypatch, tmp_path, header_source):
+    """Make the PCH "ready", as a plain header with `header_source`"""
+    header = tmp_path / "runner_pch.h"
+    header.write_text(header_source)
+    monkeypatch.setattr(pch, "flags_for", lambda flags, source: ["-include", str(header)])
+
+
+def test_builds_with_and_without_the_pch_are_cached_apart(monkeypatch, tmp_path):
+    cmd, error, _ = main.compile_source("cpp", MISSING_INCLUDE)
+    assert cmd is None and "vector" in error["stderr"]
+
+    use_pch(monkeypatch, tmp_path, "#include <vector>\n")
+    cmd, error, cache_hit = main.compile_source("cpp", MISSING_INCLUDE)
+    assert (error, cache_hit) == (None, False)
+
+
+def test_failure_after_the_pch_fallback_is_not_cached(monkeypatch, tmp_path):
+    use_pch(monkeypatch, tmp_path, "#error the PCH does not apply\n")
+
+    cmd, error, cache_hit = main.compile_source("cpp", MISSING_INCLUDE)
+
+    assert cmd is None and "vector" in error["stderr"]
+    assert not cache_hit
+    assert not os.listdir(compile_cache.CACHE_DIR)
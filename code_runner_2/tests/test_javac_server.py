@@ -0,0 +1,109 @@
+import shutil, socket, subprocess, threading
+
+import pytest
+
+import javac_server, jvm_pool
+
+needs_jdk = pytest.mark.skipif(shutil.which("javac") is None, reason="no JDK")
+
+SOURCE = """
+import java.util.Scanner;
+
+public class Main {
+    public static void main(String[] args) {
+        Scanner in = new Scanner(System.in);
+        System.out.println(in.nextInt() + in.nextInt());
+    }
+}
+"""
+
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    """A fresh compile server state"""
+    monkeypatch.setattr(javac_server, "_process", None)
+    monkeypatch.setattr(javac_server, "_failed", False)
+    monkeypatch.setattr(jvm_pool, "CLASS_DIR", str(tmp_path / "helpers"))
+    yield javac_server
+    if javac_server._process is not None:
+        javac_server._process.kill()
+        javac_server._process.wait()
+
+
+@needs_jdk
+def test_compiles_a_submission_that_runs(server, tmp_path):
+    out_dir = tmp_path / "build"
+    out_dir.mkdir()
+
+    result = server.compile(SOURCE, str(out_dir))
+
+    assert result.returncode == 0, result.stderr
+    run = subprocess.run(
+        ["java", "-cp", str(out_dir), "Main"], input="2 3\n", capture_output=True, text=True
+    )
+    assert run.stdout == "5\n"
+
+
+@needs_jdk
+def test_compile_errors_come_with_diagnostics(server, tmp_path):
+    result = server.compile("public class Main { int x = ; }", str(tmp_path))
+
+    assert result.returncode == 1
+    assert result.diagnostics[0]["kind"] == "error"
+    assert result.diagnostics[0]["line"] == 1
+    assert result.stderr.startswith(b"Main.java:1: error:")
+
+
+def test_failed_start_falls_back_to_javac_for_good(server, monkeypatch):
+    monkeypatch.setattr(jvm_pool, "ensure_compiled", lambda: None)
+    starts, real_popen = [], subprocess.Popen
+
+    def popen(cmd, **kwargs):
+        starts.append(cmd)
+        return real_popen(["echo", "Error: no main class"], **kwargs)
+
+    monkeypatch.setattr(javac_server.subprocess, "Popen", popen)
+
+    with pytest.raises(javac_server.Unavailable):
+        server.compile(SOURCE, "/nonexistent")
+    assert not server.available()
+    assert server._process is None
+    with pytest.raises(javac_server.Unavailable):
+        server.ensure_running()
+    assert len(starts) == 1
+
+
+def fake_server(monkeypatch, reply):
+    """Serve one connection like a running compile server, replying `reply`"""
+    listener = socket.create_server(("127.0.0.1", 0))
+    received = []
+
+    def serve():
+        with listener, listener.accept()[0] as conn:
+            received.append(conn.recv(65536))
+            conn.sendall(reply)
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    monkeypatch.setattr(javac_server, "ensure_running", lambda: None)
+    monkeypatch.setattr(javac_server, "_port", listener.getsockname()[1])
+    monkeypatch.setattr(javac_server, "_token", "secret")
+    return thread, received
+
+
+def test_requests_carry_the_servers_token(server, monkeypatch):
+    thread, received = fake_server(monkeypatch, b"OK\t0\n")
+
+    result = server.compile(SOURCE, "/out")
+    thread.join()
+
+    assert result.returncode == 0
+    assert received[0].startswith(b"secret\n/out\tMain\t")
+
+
+def test_server_timeout_is_a_compile_timeout(server, monkeypatch):
+    thread, _ = fake_server(monkeypatch, b"TIMEOUT\t0\n")
+
+    with pytest.raises(subprocess.TimeoutExpired):
+        server.compile(SOURCE, "/out")
+    thread.join()
@@ -0,0 +1,82 @@
+import base64, signal
+
+import pytest
+
+import judge0
+
+
+def b64(text):
+    return base64.b64encode(text.encode()).decode()
+
+
+@pytest.mark.parametrize(
+    "result, expected_output, status",
+    [
+        ({"stdout": "3\n", "exit_code": 0}, None, 3),
+        ({"stdout": "3\n", "exit_code": 0}, "3", 3),
+        ({"stdout": "4\n", "exit_code": 0}, "3\n", 4),
+        ({"error": "Compilation failed", "stderr": "x", "exit_code": 1}, None, 6),
+        ({"verdict": "TLE", "exit_code": -signal.SIGXCPU}, None, 5),
+        ({"verdict": "OLE", "exit_code": -signal.SIGKILL}, None, 8),
+        ({"verdict": "MLE", "exit_code": 1}, None, 11),
+        ({"error": "Execution timed out"}, None, 13),
+        ({"exit_code": -signal.SIGSEGV}, None, 7),
+        ({"exit_code": -signal.SIGFPE}, None, 9),
+        ({"exit_code": -signal.SIGABRT}, None, 10),
+        ({"exit_code": -signal.SIGKILL}, None, 12),
+        ({"stdout": "3\n", "exit_code": 2}, "3", 11),
+    ],
+)
+def test_status_of(result, expected_output, status):
+    assert judge0.status_of(result, expected_output) == status
+
+
+@pytest.fixture
+def emulator():
+    return judge0.Emulator(run=None, profiles={"-O0": "run", "-O2": "submit"})
+
+
+def test_parse_decodes_and_converts_limits(emulator):
+    submission = emulator.parse(
+        {
+            "language_id": 54,
+            "source_code": b64("int main() {}"),
+            "stdin": b64("1 2\n"),
+            "cpu_time_limit": 2,
+            "memory_limit": 262144,  # KB
+            "compiler_options": " -O2 ",
+        },
+        base64_encoded=True,
+    )
+
+    assert submission["language"] == "cpp"
+    assert submission["source_code"] == "int main() {}"
+    assert submission["stdin"] == "1 2\n"
+    assert (submission["time_limit"], submission["memory_limit_mb"]) == (2, 256)
+    assert submission["profile"] == "submit"
+    assert submission["status_id"] == 1
+    assert submission["token"]
+
+
+def test_parse_keeps_plain_text_without_base64(emulator):
+    submission = emulator.parse(
+        {"language_id": 71, "source_code": "print(1)"}, base64_encoded=False
+    )
+    assert submission["source_code"] == "print(1)"
+    assert submission["stdin"] is None
+    assert submission["memory_limit_mb"] is None
+
+
+def test_parse_reports_every_invalid_field(emulator):
+    with pytest.raises(judge0.InvalidSubmission) as raised:
+        emulator.parse(
+            {"language_id": 999, "source_code": "", "compiler_options": "-O3"},
+            base64_encoded=False,
+        )
+    assert set(raised.value.errors) == {"language_id", "source_code", "compiler_options"}
+
+
+def test_parse_rejects_bad_base64(emulator):
+    with pytest.raises(judge0.InvalidSubmission) as raised:
+        emulator.parse({"language_id": 71, "source_code": "!!!"}, base64_encoded=True)
+    assert raised.value.errors == {"base64_encoded": ["invalid base64 in request"]}
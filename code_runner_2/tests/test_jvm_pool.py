@@ -0,0 +1,52 @@
+import pytest
+
+import jvm_pool
+
+
+class FakeWorker:
+    """Stands in for a JVM worker, recording the heap it was started with"""
+
+    started = []
+
+    def __init__(self, heap=jvm_pool.HEAP):
+        self.heap = heap
+        self.closed = False
+        FakeWorker.started.append(heap)
+
+    def alive(self):
+        return not self.closed
+
+    def close(self):
+        self.closed = True
+
+    def run(self, *args):
+        return {"status": "OK", "heap": self.heap}
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(jvm_pool, "JvmWorker", FakeWorker)
+    monkeypatch.setattr(jvm_pool, "ensure_compiled", lambda: None)
+    FakeWorker.started = []
+    return jvm_pool.JvmPool(size=2)
+
+
+def run(pool, heap):
+    return pool.run("classes", "in", "out", "err", 1, 1, 1024, heap=heap)["heap"]
+
+
+def test_runs_use_a_worker_with_their_heap(pool):
+    assert run(pool, jvm_pool.HEAP) == jvm_pool.HEAP
+    assert FakeWorker.started == [jvm_pool.HEAP] * 2
+
+
+def test_other_heap_replaces_the_least_recently_used_worker(pool):
+    first = pool.idle[0]
+
+    assert run(pool, "512m") == "512m"
+    assert first.closed
+    assert sorted(worker.heap for worker in pool.idle) == [jvm_pool.HEAP, "512m"]
+
+    # Warm from now on
+    assert run(pool, "512m") == "512m"
+    assert FakeWorker.started == [jvm_pool.HEAP] * 2 + ["512m"]
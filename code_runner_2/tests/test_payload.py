@@ -0,0 +1,47 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main, testdata
+
+msgpack = pytest.importorskip("msgpack")
+
+MSGPACK = "application/msgpack"
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(testdata, "CACHE_DIR", str(tmp_path / "testdata"))
+    return TestClient(main.app)
+
+
+def put(client, body, **headers):
+    return client.put("/testdata/sum/v1", content=body, headers=headers)
+
+
+def test_msgpack_request_and_response(client):
+    # Binary strings have no JSON form, so this only works without a JSON step
+    body = msgpack.packb({"inputs": [b"1 2\n", "3 4\n"]})
+
+    response = put(client, body, **{"content-type": MSGPACK, "accept": MSGPACK})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == MSGPACK
+    assert msgpack.unpackb(response.content) == {
+        "problem": "sum", "version": "v1", "cases": 2
+    }
+    assert client.get("/testdata/sum/v1").json()["cases"] == 2
+
+
+def test_json_clients_are_unaffected(client):
+    response = client.put("/testdata/sum/v1", json={"inputs": ["1 2\n"]})
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["cases"] == 1
+
+    # A msgpack body still gets a JSON response unless msgpack is accepted
+    response = put(client, msgpack.packb({"inputs": []}), **{"content-type": MSGPACK})
+    assert response.json()["cases"] == 0
+
+
+def test_invalid_msgpack_is_a_bad_request(client):
+    response = put(client, b"\xc1", **{"content-type": MSGPACK})
+    assert response.status_code == 400
@@ -0,0 +1,50 @@
+import asyncio, resource, shutil
+
+import pytest
+
+import main, spawner
+
+pytestmark = pytest.mark.skipif(shutil.which(spawner.COMPILER) is None, reason="no gcc")
+
+
+def measure(cmd, tmp_path, memory_limit=64):
+    limits = main.run_limits(1, memory_limit)
+    return asyncio.run(main.execute(cmd, "c", "", str(tmp_path), limits))
+
+
+def test_peak_is_the_programs_own(tmp_path):
+    ballast = bytearray(64 * 1024 * 1024)  # Runner pages a fork would inherit
+    for page in range(0, len(ballast), 4096):
+        ballast[page] = 1
+    assert resource.getrusage(resource.RUSAGE_SELF).ru_maxrss > 64 * 1024
+
+    result = measure(["true"], tmp_path)
+
+    assert result["exit_code"] == 0
+    assert result["memory_used"] < 16 * 1024
+    assert result["verdict"] is None
+
+
+def test_limits_and_status_reach_the_program(tmp_path):
+    result = measure(["sh", "-c", "echo hi; exit 3"], tmp_path)
+    assert (result["stdout"], result["exit_code"]) == ("hi\n", 3)
+
+    result = measure(["python3", "-c", "while True: pass"], tmp_path)
+    assert result["verdict"] == "TLE"
+
+
+def test_peak_over_the_limit_is_mle(tmp_path):
+    result = measure(
+        ["python3", "-c", "x = bytearray(48 * 1024 * 1024)"], tmp_path, memory_limit=32
+    )
+    assert result["verdict"] == "MLE"
+
+
+def test_command_skips_unset_limits():
+    assert spawner.command("/h", 5, ["prog", "arg"], None, None) == [
+        "/h", "5", "-", "-", "-", "-", "-", "-", "-", "prog", "arg",
+    ]
+    limits = {"cpu": (1, 2), "memory": (3, 4), "fsize": (5, 6)}
+    assert spawner.command("/h", 5, ["prog"], limits, "/cg")[2:9] == [
+        "/cg", "1", "2", "3", "4", "5", "6",
+    ]
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main, testdata, zygote
+
+SOURCE = "a, b = map(int, input().split())\nprint(a + b)\n"
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(testdata, "CACHE_DIR", str(tmp_path / "testdata"))
+    monkeypatch.setattr(zygote, "POOL_SIZE", 0)  # Plain python3 runs
+    return TestClient(main.app)
+
+
+def run_stream(client, cases):
+    ref = {"problem": "sum", "version": "v1", "cases": cases}
+    return client.post(
+        "/run_stream",
+        json={"language": "python", "codes": [SOURCE] * len(cases), "testdata": ref},
+    )
+
+
+def test_uncached_version_is_409_until_it_is_put(client):
+    response = run_stream(client, [0, 1])
+    assert response.status_code == 409
+    assert response.json() == {
+        "error": "Test data not cached", "problem": "sum", "version": "v1"
+    }
+    assert client.get("/testdata/sum/v1").status_code == 404
+
+    put = client.put("/testdata/sum/v1", json={"inputs": ["1 2\n", "3 4\n"]})
+    assert put.json() == {"problem": "sum", "version": "v1", "cases": 2}
+    assert client.get("/testdata/sum/v1").json()["cases"] == 2
+
+    response = run_stream(client, [1, 0])
+    assert response.status_code == 200
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [(r["index"], r["stdout"]) for r in results] == [(0, "7\n"), (1, "3\n")]
+
+
+def test_unknown_case_of_a_cached_version_is_rejected(client):
+    client.put("/testdata/sum/v1", json={"inputs": ["1 2\n"]})
+    response = run_stream(client, [1])
+    assert response.status_code == 422
+    assert "no case 1" in response.json()["error"]
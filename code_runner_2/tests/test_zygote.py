@@ -0,0 +1,60 @@
+import json, resource
+
+import pytest
+
+import zygote
+
+
+@pytest.fixture(scope="module")
+def worker():
+    process = zygote.Zygote()
+    yield process
+    process.close()
+
+
+def run(worker, tmp_path, source):
+    script = tmp_path / "main.py"
+    script.write_text(source)
+    (tmp_path / "stdin").write_text("")
+    paths = {name: str(tmp_path / name) for name in ("stdin", "stdout", "stderr")}
+    limits = {
+        "cpu": (2, 2),
+        "memory": (resource.RLIM_INFINITY, resource.RLIM_INFINITY),
+    }
+    report = worker.run(
+        str(script), paths["stdin"], paths["stdout"], paths["stderr"], limits, 10,
+        cwd=str(tmp_path),
+    )
+    with open(paths["stdout"]) as stdout, open(paths["stderr"]) as stderr:
+        return report["exit_code"], stdout.read(), stderr.read()
+
+
+def test_runner_modules_are_not_importable(worker, tmp_path):
+    # `import main` finds the script itself (main.py), as with plain python3
+    for name in ("checker", "compile_cache", "zygote"):
+        exit_code, _, stderr = run(worker, tmp_path, f"import {name}\n")
+        assert exit_code == 1
+        assert f"No module named '{name}'" in stderr
+
+
+def test_script_starts_from_a_fresh_interpreter(worker, tmp_path):
+    exit_code, stdout, stderr = run(
+        worker,
+        tmp_path,
+        "import __main__, json, sys\n"
+        "print(json.dumps([sys.path[0], sorted(vars(__main__)), 'socket' in sys.modules]))\n",
+    )
+
+    assert exit_code == 0, stderr
+    path0, main_names, socket_loaded = json.loads(stdout)
+    assert path0 == str(tmp_path)
+    assert "run_child" not in main_names
+    assert "__file__" in main_names
+    assert not socket_loaded
+
+
+def test_preloaded_modules_stay_loaded(worker, tmp_path):
+    exit_code, stdout, _ = run(
+        worker, tmp_path, "import sys\nprint('collections' in sys.modules)\n"
+    )
+    assert (exit_code, stdout) == (0, "True\n")
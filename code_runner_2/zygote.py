@@ -0,0 +1,286 @@
+"""
+Pre-forked Python workers ("zygotes").
+
+Each zygote is a python3 process that has already imported the modules
+typical solutions use. For every execution it forks a child, which applies
+the resource limits (including the size of files it writes), redirects
+stdin/stdout/stderr to the files named in the request and runs the user's
+script; the zygote itself never runs user code, so every run starts from
+the same clean state without interpreter startup. Before running it, the
+child resets sys.path and sys.modules to those of a plain `python3` that
+imported PRELOAD_MODULES, so the script sees a fresh __main__ and cannot
+import the runner's own modules (main, checker, ...) or reach the
+zygote's.
+
+Run as a script, this module is the zygote: it talks to the runner over the
+socket whose file descriptor is passed as argv[1], one JSON line per message.
+"""
+
+import json, os, queue, select, socket, subprocess, sys, threading, time
+
+# Imported once in the zygote so forked children get them for free
+PRELOAD_MODULES = [
+    "bisect", "collections", "functools", "heapq", "itertools", "json",
+    "math", "random", "re", "string", "sys", "typing", "traceback",
+]
+
+POOL_SIZE = int(os.getenv("PYTHON_ZYGOTES", os.cpu_count() or 1))
+
+RUNNER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# ------------------------
+# Zygote process
+# ------------------------
+def clean_state():
+    """
+    (sys.path without the script directory, module names) of a plain
+    python3 with PRELOAD_MODULES imported, from a throwaway interpreter.
+    Entries for the runner's own directory are left out of the path.
+    """
+    probe = (
+        "import json, sys\n"
+        f"for name in {PRELOAD_MODULES!r}: __import__(name)\n"
+        "print(json.dumps([sys.path[1:], sorted(sys.modules)]))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", probe], capture_output=True, text=True, check=True
+    ).stdout
+    path, modules = json.loads(output)
+    path = [entry for entry in path if os.path.realpath(entry or ".") != RUNNER_DIR]
+    return path, frozenset(modules)
+
+
+def reset_interpreter(source, clean_path, clean_modules):
+    """
+    Make this process look like `python3 source` with PRELOAD_MODULES
+    imported; returns the globals of the new __main__ module.
+    """
+    import types
+
+    sys.path[:] = [os.path.dirname(os.path.abspath(source)), *clean_path]
+    sys.path_importer_cache.clear()
+    for name in list(sys.modules):
+        if name not in clean_modules:
+            del sys.modules[name]
+    main = types.ModuleType("__main__")
+    main.__file__ = source
+    sys.modules["__main__"] = main
+    return main.__dict__
+
+
+def run_child(request, limits, clean_path, clean_modules):
+    """Runs in the forked child; never returns."""
+    import resource, signal, traceback
+
+    try:
+        os.setpgid(0, 0)
+        if request.get("cgroup"):
+            with open(os.path.join(request["cgroup"], "cgroup.procs"), "w") as f:
+                f.write("0")
+        if request.get("cwd"):
+            os.chdir(request["cwd"])
+        resource.setrlimit(resource.RLIMIT_CPU, limits["cpu"])
+        resource.setrlimit(resource.RLIMIT_AS, limits["memory"])
+        if "fsize" in limits:
+            resource.setrlimit(resource.RLIMIT_FSIZE, limits["fsize"])
+            # Python ignores SIGXFSZ; restore the default so a child that
+            # writes past the limit is killed instead of raising EFBIG
+            signal.signal(signal.SIGXFSZ, signal.SIG_DFL)
+
+        for fd, path, flags in (
+            (0, request["stdin"], os.O_RDONLY),
+            (1, request["stdout"], os.O_WRONLY | os.O_CREAT | os.O_TRUNC),
+            (2, request["stderr"], os.O_WRONLY | os.O_CREAT | os.O_TRUNC),
+        ):
+            target = os.open(path, flags, 0o600)
+            os.dup2(target, fd)
+            os.close(target)
+        sys.stdin = open(0, "r", closefd=False)
+        sys.stdout = open(1, "w", closefd=False)
+        sys.stderr = open(2, "w", closefd=False)
+        sys.argv = [request["source"]]
+
+        with open(request["source"]) as f:
+            code = compile(f.read(), request["source"], "exec")
+        main_globals = reset_interpreter(request["source"], clean_path, clean_modules)
+    except BaseException:
+        traceback.print_exc()
+        sys.stderr.flush()
+        os._exit(1)
+
+    exit_code = 0
+    try:
+        exec(code, main_globals)
+    except SystemExit as e:
+        if isinstance(e.code, int):
+            exit_code = e.code
+        elif e.code is not None:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException as e:
+        # Skip this frame so the traceback matches a plain `python3 file.py`
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        exit_code = 1
+
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    except BaseException:
+        exit_code = exit_code or 1
+    os._exit(exit_code)
+
+
+def zygote_main(fd):
+    clean_path, clean_modules = clean_state()
+    for name in PRELOAD_MODULES:
+        __import__(name)
+    import gc
+
+    gc.collect()
+    gc.freeze()  # Keep preloaded objects out of the children's copy-on-write
+
+    sock = socket.socket(fileno=fd)
+    stream = sock.makefile("rwb")
+    for line in stream:
+        request = json.loads(line)
+        limits = {key: tuple(value) for key, value in request["limits"].items()}
+        pid = os.fork()
+        if pid == 0:
+            stream.close()
+            sock.close()
+            run_child(request, limits, clean_path, clean_modules)
+        try:
+            os.setpgid(pid, pid)  # Also done by the child; whichever runs first wins
+        except OSError:
+            pass
+
+        stream.write(json.dumps({"pid": pid}).encode() + b"\n")
+        stream.flush()
+        _, status, usage = os.wait4(pid, 0)
+        stream.write(
+            json.dumps(
+                {
+                    "exit_code": os.waitstatus_to_exitcode(status),
+                    "user_time": usage.ru_utime,
+                    "system_time": usage.ru_stime,
+                    "max_rss": usage.ru_maxrss,
+                }
+            ).encode()
+            + b"\n"
+        )
+        stream.flush()
+
+
+# ------------------------
+# Runner side
+# ------------------------
+class Zygote:
+    """Handle on one zygote process and its control socket."""
+
+    def __init__(self):
+        parent_sock, child_sock = socket.socketpair()
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), str(child_sock.fileno())],
+            pass_fds=[child_sock.fileno()],
+            stdin=subprocess.DEVNULL,
+        )
+        child_sock.close()
+        self.sock = parent_sock
+        self.buffer = b""
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def close(self):
+        self.sock.close()
+        self.process.kill()
+        self.process.wait()
+
+    def send(self, message):
+        self.sock.sendall(json.dumps(message).encode() + b"\n")
+
+    def receive(self, timeout=None):
+        """Read one message; returns None if `timeout` seconds pass first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while b"\n" not in self.buffer:
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not select.select([self.sock], [], [], remaining)[0]:
+                    return None
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise RuntimeError("Python zygote exited unexpectedly")
+            self.buffer += chunk
+        line, _, self.buffer = self.buffer.partition(b"\n")
+        return json.loads(line)
+
+    def run(self, source, stdin, stdout, stderr, limits, timeout, cwd=None, cgroup=None):
+        """
+        Fork a child for `source`, running in `cwd` and moved into `cgroup`
+        if given, and wait for it.
+        Returns the zygote's report, or None if the child was killed for
+        running past `timeout` seconds of wall time.
+        """
+        self.send(
+            {
+                "source": source,
+                "stdin": stdin,
+                "stdout": stdout,
+                "stderr": stderr,
+                "limits": limits,
+                "cwd": cwd,
+                "cgroup": cgroup,
+            }
+        )
+        pid = self.receive()["pid"]
+
+        report = self.receive(timeout)
+        if report is None:
+            try:
+                os.killpg(pid, 9)
+            except ProcessLookupError:
+                pass
+            self.receive()  # Report for the killed child
+        return report
+
+
+class ZygotePool:
+    """Fixed-size pool of zygotes; each serves one execution at a time."""
+
+    def __init__(self, size=POOL_SIZE):
+        self.idle = queue.Queue()
+        for _ in range(size):
+            self.idle.put(Zygote())
+
+    def run(self, source, stdin, stdout, stderr, limits, timeout, cwd=None, cgroup=None):
+        zygote = self.idle.get()
+        try:
+            return zygote.run(source, stdin, stdout, stderr, limits, timeout, cwd, cgroup)
+        except (OSError, ValueError, RuntimeError):
+            zygote.close()
+            raise
+        finally:
+            if not zygote.alive():
+                zygote = Zygote()
+            self.idle.put(zygote)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide pool, started on first use; None if disabled."""
+    global _pool
+    if POOL_SIZE <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ZygotePool()
+    return _pool
+
+
+if __name__ == "__main__":
+    zygote_main(int(sys.argv[1]))
@@ -13,4 +13,23 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'compiler.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from App.code_runner.executors import close_async_clients  # noqa: E402 (needs setup)
+
+
+async def application(scope, receive, send):
+    """
+    Django, plus the lifespan protocol (which Django does not serve) so the
+    code executors' asyncio clients are closed when the server shuts down.
+    """
+    if scope["type"] != "lifespan":
+        return await django_application(scope, receive, send)
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await close_async_clients()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
@@ -136,6 +136,48 @@ STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 
+# Code execution backends. Each run goes to the least-loaded healthy backend
+# and fails over to the next one. Types: "judge0" (url, optional api_key or
+# auth_token) and "local" (url of a code_runner_2 node). Extra runner nodes
+# can be listed comma separated in CODE_RUNNER_NODES, and self-hosted Judge0
+# APIs (including code_runner_2's Judge0 emulator) in JUDGE0_NODES.
+CODE_EXECUTORS = (
+    [{"type": "judge0", "url": "https://judge0-ce.p.rapidapi.com"}]
+    + [
+        {"type": "judge0", "url": url.strip()}
+        for url in os.getenv("JUDGE0_NODES", "").split(",")
+        if url.strip()
+    ]
+    + [
+        {"type": "local", "url": url.strip()}
+        for url in os.getenv("CODE_RUNNER_NODES", "").split(",")
+        if url.strip()
+    ]
+)
+
+# Consecutive failures before a backend is ejected, and seconds before it is retried
+CODE_EXECUTOR_FAILURE_THRESHOLD = 3
+CODE_EXECUTOR_RESET_TIMEOUT = 30
+
+# Hedging: a run slower than this percentile of recent runs is duplicated on a
+# second backend and the first result wins. Leave unset to disable.
+CODE_EXECUTOR_HEDGE_PERCENTILE = (
+    float(os.getenv("CODE_EXECUTOR_HEDGE_PERCENTILE"))
+    if os.getenv("CODE_EXECUTOR_HEDGE_PERCENTILE")
+    else None
+)
+CODE_EXECUTOR_HEDGE_MIN_DELAY = 0.5
+# Threads running hedges; while all are busy, slow runs are not hedged
+CODE_EXECUTOR_HEDGE_POOL_SIZE = 4
+
+# Per-language multipliers applied to a problem's time and memory limits
+# before they are sent to the executor; languages not listed get 1x.
+CODE_EXECUTOR_LIMIT_MULTIPLIERS = {
+    "python": {"time": 3, "memory": 2},
+    "javascript": {"time": 2, "memory": 2},
+    "java": {"time": 2, "memory": 2},
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 